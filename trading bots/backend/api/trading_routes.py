@@ -3,7 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 
 # Import trading engine components
-from bot_engine.trading_engine import TradingEngine
+from bot_engine.engine_service import create_trading_engine
+from bot_engine.engine_client import EngineClient
 from bot_engine.risk_manager import RiskManager
 from models.trade import Trade
 from models.user import User
@@ -14,14 +15,27 @@ trading_bp = Blueprint('trading', __name__)
 # Initialize trading engine
 trading_engine = None
 
+# Seconds a trade count is reused across pages
+TRADE_COUNT_MAX_AGE = 30
+
+# Largest page of trade history
+MAX_TRADES_PER_PAGE = 100
+
 @trading_bp.before_app_first_request
 def initialize_trading_engine():
-    """Initialize the trading engine when the app starts"""
+    """Initialize the trading engine when the app starts
+    
+    Without ENGINE_SOCKET_PATH every web worker embeds its own engine, so the
+    app must then run in a single worker (e.g. gunicorn -w 1): bots started in
+    one worker are invisible to the others, and with RESTORE_BOTS each worker
+    would resume and trade every registered bot.
+    """
     global trading_engine
-    trading_engine = TradingEngine(
-        api_key=current_app.config['BINANCE_API_KEY'],
-        api_secret=current_app.config['BINANCE_API_SECRET']
-    )
+    if current_app.config.get('ENGINE_SOCKET_PATH'):
+        # Share the standalone engine service with all web workers
+        trading_engine = EngineClient(current_app.config['ENGINE_SOCKET_PATH'])
+    else:
+        trading_engine = create_trading_engine(current_app.config, current_app._get_current_object())
 
 @trading_bp.route('/status', methods=['GET'])
 @jwt_required()
@@ -86,7 +100,7 @@ def start_trading():
         # Update user settings
         User.update(user_id, {
             'settings.is_trading_enabled': True,
-            'settings.active_bots': User.find_by_id(user_id).get('settings', {}).get('active_bots', []) + [bot_id]
+            'settings.active_bots': User.find_by_id(user_id, cached=False).get('settings', {}).get('active_bots', []) + [bot_id]
         })
         
         return jsonify({
@@ -136,7 +150,7 @@ def stop_trading():
             
             if success:
                 # Update user's active bots list
-                user = User.find_by_id(user_id)
+                user = User.find_by_id(user_id, cached=False)
                 active_bots = user.get('settings', {}).get('active_bots', [])
                 
                 if bot_id in active_bots:
@@ -160,13 +174,29 @@ def stop_trading():
 @trading_bp.route('/trades', methods=['GET'])
 @jwt_required()
 def get_trades():
-    """Get user's trade history with pagination"""
+    """Get user's trade history with pagination
+    
+    Pages are numbered (``page``) or, when ``cursor`` is given, follow the
+    ``next_cursor`` of the previous page (an empty cursor starts at the
+    newest trade). Cursor pages cost the same at any depth and include the
+    total only with ``include_total=true``.
+    """
     user_id = get_jwt_identity()
     
     # Pagination parameters
-    limit = int(request.args.get('limit', 20))
-    page = int(request.args.get('page', 1))
+    try:
+        limit = int(request.args.get('limit', 20))
+        page = int(request.args.get('page', 1))
+    except ValueError:
+        return jsonify({'error': 'limit and page must be integers'}), 400
+    
+    if not 1 <= limit <= MAX_TRADES_PER_PAGE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_TRADES_PER_PAGE}'}), 400
+    if page < 1:
+        return jsonify({'error': 'page must be at least 1'}), 400
+    
     skip = (page - 1) * limit
+    cursor = request.args.get('cursor')
     
     # Filtering parameters
     symbol = request.args.get('symbol')
@@ -192,9 +222,28 @@ def get_trades():
     if trade_type and trade_type in ['buy', 'sell']:
         filters['type'] = trade_type
     
+    # Get the page after the cursor, fetching one extra trade to know if more follow
+    if cursor is not None:
+        try:
+            trades = Trade.find(filters, limit=limit + 1, after=cursor or None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        has_more = len(trades) > limit
+        trades = trades[:limit]
+        pagination = {
+            'limit': limit,
+            'next_cursor': Trade.get_cursor(trades[-1]) if has_more else None
+        }
+        
+        if request.args.get('include_total', 'false').lower() == 'true':
+            pagination['total'] = Trade.count(filters, max_age=TRADE_COUNT_MAX_AGE)
+        
+        return jsonify({'trades': trades, 'pagination': pagination}), 200
+    
     # Get trades
     trades = Trade.find(filters, limit=limit, skip=skip)
-    total = Trade.count(filters)
+    total = Trade.count(filters, max_age=TRADE_COUNT_MAX_AGE)
     
     return jsonify({
         'trades': trades,
@@ -2,7 +2,6 @@ import os
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
 # Import routes
@@ -11,6 +10,9 @@ from api.user_routes import user_bp
 from api.trading_routes import trading_bp
 from api.admin_routes import admin_bp
 
+# Import MongoDB index provisioning
+from models.indexes import ensure_indexes
+
 # Load environment variables
 load_dotenv()
 
@@ -20,8 +22,31 @@ app = Flask(__name__)
 # Configure app
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'dev-secret-key')
 app.config['MONGO_URI'] = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/trading_bot')
+app.config['MONGO_MAX_POOL_SIZE'] = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+app.config['MONGO_CONNECT_TIMEOUT_MS'] = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'] = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+app.config['MONGO_SOCKET_TIMEOUT_MS'] = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+app.config['MONGO_WAIT_QUEUE_TIMEOUT_MS'] = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+app.config['MONGO_READ_PREFERENCE'] = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+app.config['MONGO_ENSURE_INDEXES'] = os.environ.get('MONGO_ENSURE_INDEXES', 'True').lower() == 'true'
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', '60'))
+app.config['USER_CACHE_SYNC_INTERVAL'] = float(os.environ.get('USER_CACHE_SYNC_INTERVAL', '1'))
 app.config['BINANCE_API_KEY'] = os.environ.get('BINANCE_API_KEY')
 app.config['BINANCE_API_SECRET'] = os.environ.get('BINANCE_API_SECRET')
+app.config['BINANCE_STREAM_URL'] = os.environ.get('BINANCE_STREAM_URL')
+app.config['STREAM_CONNECTION_SIZE'] = int(os.environ.get('STREAM_CONNECTION_SIZE', '200'))
+app.config['TRADING_ENGINE'] = os.environ.get('TRADING_ENGINE', 'threaded')
+app.config['TRADING_ENGINE_WORKERS'] = int(os.environ.get('TRADING_ENGINE_WORKERS', '0'))
+app.config['ENGINE_SOCKET_PATH'] = os.environ.get('ENGINE_SOCKET_PATH')
+app.config['ENGINE_LEASES'] = os.environ.get('ENGINE_LEASES', 'False').lower() == 'true'
+app.config['ENGINE_NODE_ID'] = os.environ.get('ENGINE_NODE_ID')
+# Embedded engines (no ENGINE_SOCKET_PATH) are created by every web worker, and each one would resume
+# every registered bot; only enable RESTORE_BOTS here when the app runs in a single worker
+app.config['RESTORE_BOTS'] = os.environ.get('RESTORE_BOTS', 'False').lower() == 'true'
+app.config['RISK_LEDGER_SYNC_INTERVAL'] = float(os.environ.get('RISK_LEDGER_SYNC_INTERVAL', '60'))
+app.config['POSITION_RECONCILE_INTERVAL'] = float(os.environ.get('POSITION_RECONCILE_INTERVAL', '60'))
+app.config['RISK_BATCH_WINDOW'] = float(os.environ.get('RISK_BATCH_WINDOW', '0.005'))
 
 # Enable CORS
 CORS(app)
@@ -29,16 +54,20 @@ CORS(app)
 # Initialize JWT
 jwt = JWTManager(app)
 
-# Initialize MongoDB
-mongo_client = MongoClient(app.config['MONGO_URI'])
-db = mongo_client.get_database()
-
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(user_bp, url_prefix='/api/user')
 app.register_blueprint(trading_bp, url_prefix='/api/trading')
 app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
+# Create MongoDB indexes (no-op when they already exist)
+if app.config['MONGO_ENSURE_INDEXES']:
+    with app.app_context():
+        try:
+            ensure_indexes()
+        except Exception as e:
+            print(f"Error creating MongoDB indexes: {str(e)}")
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,2 @@
+# Benchmarks for the bot engine. Run from the backend directory, e.g.:
+#   python -m benchmarks.scheduler_benchmark
@@ -0,0 +1,76 @@
+"""Throughput of the threaded engine versus the asyncio engine
+
+Every bot fetches its market's candles and places a trade (ticker plus entry,
+take-profit and stop-loss orders) against a mock exchange with a fixed
+per-call latency.
+
+Usage:
+    python -m benchmarks.engine_throughput_benchmark [--bots 100 1000] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bot_engine.trading_engine import TradingEngine
+from bot_engine.async_trading_engine import AsyncTradingEngine
+from benchmarks.mock_exchange import MockExchange, AsyncMockExchange
+
+SYMBOLS = [f"COIN{i}/USDT" for i in range(20)]
+
+def run_threaded(bots, latency, workers):
+    """Run one tick of every bot on the threaded engine's worker model"""
+    exchange = MockExchange(latency=latency)
+    engine = TradingEngine(max_workers=workers)
+    engine.exchange = exchange
+    engine.market_data.exchange = exchange
+
+    def tick(index):
+        symbol = SYMBOLS[index % len(SYMBOLS)]
+        engine.market_data.get_candles(symbol, '1m')
+        engine._execute_trade('bench', symbol, 100, 'buy', 3.0, 2.0)
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(tick, range(bots)))
+    elapsed = time.perf_counter() - started_at
+
+    engine.scheduler.stop()
+    return elapsed, sum(exchange.call_counts.values())
+
+def run_async(bots, latency):
+    """Run one tick of every bot concurrently on the async engine's loop"""
+    exchange = AsyncMockExchange(latency=latency)
+    engine = AsyncTradingEngine(exchange=exchange)
+
+    async def tick(index):
+        symbol = SYMBOLS[index % len(SYMBOLS)]
+        await engine._get_candles(symbol, '1m')
+        await engine._execute_trade('bench', symbol, 100, 'buy', 3.0, 2.0)
+
+    async def run_all():
+        await asyncio.gather(*(tick(i) for i in range(bots)))
+
+    started_at = time.perf_counter()
+    engine._call(run_all())
+    elapsed = time.perf_counter() - started_at
+
+    engine.close()
+    return elapsed, sum(exchange.call_counts.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bots', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per exchange call')
+    parser.add_argument('--workers', type=int, default=8, help='worker threads of the threaded engine')
+    args = parser.parse_args()
+
+    for bots in args.bots:
+        elapsed, calls = run_threaded(bots, args.latency, args.workers)
+        print(f"threaded bots={bots:>6} time={elapsed:.2f}s bots/s={bots / elapsed:.1f} calls/s={calls / elapsed:.1f}")
+
+        elapsed, calls = run_async(bots, args.latency)
+        print(f"async    bots={bots:>6} time={elapsed:.2f}s bots/s={bots / elapsed:.1f} calls/s={calls / elapsed:.1f}")
+
+if __name__ == '__main__':
+    main()
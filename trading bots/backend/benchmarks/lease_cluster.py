@@ -0,0 +1,131 @@
+"""Several lease-sharing engine nodes on one machine against a local mongod
+
+Starts ``--nodes`` engine processes that share ``--bots`` bots through
+leases in MongoDB, then kills one node (as in a crash) and later starts a
+replacement. Every second it prints how many bots each node runs and
+counts bots reported by two nodes in the same report window (a handover
+landing between two reports can show up here once; a bot that stays
+duplicated would be a bug). Bots trade against the mock exchange; risk
+checks deny every trade because the benchmark user does not exist.
+
+Usage:
+    python -m benchmarks.lease_cluster --mongo-uri mongodb://localhost:27017/trading_bot_leases [--nodes 3] [--bots 60]
+"""
+import argparse
+import multiprocessing
+import time
+
+from flask import Flask
+
+from bot_engine.trading_engine import TradingEngine
+from bot_engine.lease_manager import BotLeaseManager
+from benchmarks.mock_exchange import MockExchange
+from models.bot_lease import BotLease
+
+SYMBOLS = [f"COIN{i}/USDT" for i in range(20)]
+
+def run_node(node_id, mongo_uri, lease_ttl, renew_interval, reports):
+    """Engine node main loop reporting its running bots every second"""
+    app = Flask(node_id)
+    app.config['MONGO_URI'] = mongo_uri
+
+    engine = TradingEngine(app=app)
+    engine.exchange = MockExchange()
+    engine.market_data.exchange = engine.exchange
+
+    manager = BotLeaseManager(engine, node_id=node_id, lease_ttl=lease_ttl, renew_interval=renew_interval)
+    manager.start()
+
+    while True:
+        reports.put((node_id, time.time(), sorted(engine.active_bots)))
+        time.sleep(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_leases')
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--bots', type=int, default=60)
+    parser.add_argument('--lease-ttl', type=float, default=6)
+    parser.add_argument('--renew-interval', type=float, default=2)
+    parser.add_argument('--kill-after', type=float, default=10, help='seconds until the first node is killed')
+    parser.add_argument('--join-after', type=float, default=25, help='seconds until a replacement node joins')
+    parser.add_argument('--duration', type=float, default=40)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    # Start from an empty cluster with unowned bots
+    with app.app_context():
+        BotLease.get_collection().delete_many({})
+        BotLease.get_node_collection().delete_many({})
+        for index in range(args.bots):
+            BotLease.create({
+                'id': f"bot-{index}",
+                'user_id': 'bench',
+                'symbol': SYMBOLS[index % len(SYMBOLS)],
+                'strategy': 'rsi',
+                'interval': '1m',
+                'amount': 100,
+                'take_profit': 3.0,
+                'stop_loss': 2.0
+            }, None, 0)
+
+    context = multiprocessing.get_context('spawn')
+    reports = context.Queue()
+    node_args = (args.mongo_uri, args.lease_ttl, args.renew_interval, reports)
+    nodes = {}
+
+    def start_node(node_id):
+        nodes[node_id] = context.Process(target=run_node, args=(node_id,) + node_args, daemon=True)
+        nodes[node_id].start()
+
+    for index in range(args.nodes):
+        start_node(f"node-{index}")
+
+    started_at = time.time()
+    running = {}  # Latest report per node: {node_id: set of bot IDs}
+    overlaps = 0
+    killed = joined = False
+
+    while time.time() - started_at < args.duration:
+        elapsed = time.time() - started_at
+
+        if not killed and elapsed >= args.kill_after:
+            nodes['node-0'].kill()
+            running.pop('node-0', None)
+            killed = True
+            print(f"[{elapsed:5.1f}s] killed node-0")
+
+        if not joined and elapsed >= args.join_after:
+            start_node(f"node-{args.nodes}")
+            joined = True
+            print(f"[{elapsed:5.1f}s] started node-{args.nodes}")
+
+        deadline = time.time() + 1
+        while time.time() < deadline:
+            try:
+                node_id, _, bot_ids = reports.get(timeout=max(deadline - time.time(), 0.01))
+            except Exception:
+                break
+            if nodes[node_id].is_alive():
+                running[node_id] = set(bot_ids)
+
+        # A bot reported by two live nodes would be running twice
+        seen = {}
+        for node_id, bot_ids in running.items():
+            for bot_id in bot_ids:
+                seen[bot_id] = seen.get(bot_id, 0) + 1
+        duplicated = [bot_id for bot_id, count in seen.items() if count > 1]
+        overlaps += len(duplicated)
+
+        distribution = ' '.join(f"{node_id}={len(bot_ids)}" for node_id, bot_ids in sorted(running.items()))
+        print(f"[{elapsed:5.1f}s] running={len(seen)}/{args.bots} {distribution} duplicated={len(duplicated)}")
+
+    for process in nodes.values():
+        process.kill()
+
+    print(f"bots observed on two nodes at once: {overlaps}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import asyncio
+import math
+import time
+import uuid
+
+INTERVAL_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200,
+    '1d': 86400
+}
+
+class MockExchange:
+    """In-memory stand-in for a ccxt exchange used by the benchmarks
+
+    Prices follow a deterministic wave per symbol, so repeated runs produce the
+    same candles. An optional latency is added to every call to mimic REST
+    round trips.
+    """
+
+    def __init__(self, latency=0.0, history=1000):
+        """Initialize the mock exchange
+
+        Args:
+            latency (float): Seconds slept on every call
+            history (int): Number of candles available before the current one
+        """
+        self.latency = latency
+        self.history = history
+        self.call_counts = {}
+        self.has = {}
+        self.markets = None
+
+    def _call(self, name):
+        """Count a call and simulate its latency
+
+        Args:
+            name (str): Method name
+        """
+        self.call_counts[name] = self.call_counts.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _price(symbol, timestamp):
+        """Deterministic price for a symbol at a timestamp
+
+        Args:
+            symbol (str): Trading symbol
+            timestamp (int): Timestamp in milliseconds
+
+        Returns:
+            float: Price
+        """
+        phase = sum(ord(c) for c in symbol)
+        minutes = timestamp / 60000
+        return 100 + 10 * math.sin(minutes / 30 + phase) + 3 * math.sin(minutes / 7 + phase)
+
+    def _candles(self, symbol, timeframe, since=None, limit=None):
+        """Build candles for a symbol
+
+        Args:
+            symbol (str): Trading symbol
+            timeframe (str): Candlestick interval
+            since (int, optional): First candle open timestamp in milliseconds
+            limit (int, optional): Maximum number of candles
+
+        Returns:
+            list: Candles as [timestamp, open, high, low, close, volume]
+        """
+        step = INTERVAL_SECONDS[timeframe] * 1000
+        now = int(time.time() * 1000)
+        current = now - now % step
+        limit = limit or 500
+
+        if since is None:
+            start = current - (min(limit, self.history) - 1) * step
+        else:
+            start = since - since % step
+
+        candles = []
+        timestamp = start
+        while timestamp <= current and len(candles) < limit:
+            close_time = min(timestamp + step, now)
+            open_price = self._price(symbol, timestamp)
+            close_price = self._price(symbol, close_time)
+            candles.append([
+                timestamp,
+                open_price,
+                max(open_price, close_price) * 1.001,
+                min(open_price, close_price) * 0.999,
+                close_price,
+                1000.0
+            ])
+            timestamp += step
+
+        return candles
+
+    def load_markets(self):
+        # Like ccxt, markets are only fetched once
+        if self.markets is None:
+            self._call('load_markets')
+            self.markets = {}
+        return self.markets
+
+    def market_id(self, symbol):
+        return symbol.replace('/', '')
+
+    def amount_to_precision(self, symbol, amount):
+        return f"{amount:.8f}"
+
+    def price_to_precision(self, symbol, price):
+        return f"{price:.8f}"
+
+    def _oco_response(self, request):
+        """Build a Binance-style OCO response
+
+        Args:
+            request (dict): OCO request parameters
+
+        Returns:
+            dict: Order list with a stop-loss and a limit-maker report
+        """
+        stop_loss_id, take_profit_id = (int(uuid.uuid4().int % 10 ** 12) for _ in range(2))
+        return {
+            'orderListId': int(uuid.uuid4().int % 10 ** 9),
+            'orderReports': [
+                {'symbol': request['symbol'], 'orderId': stop_loss_id, 'type': 'STOP_LOSS'},
+                {'symbol': request['symbol'], 'orderId': take_profit_id, 'type': 'LIMIT_MAKER'}
+            ]
+        }
+
+    def fetch_time(self):
+        self._call('fetch_time')
+        return int(time.time() * 1000)
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._call('fetch_ohlcv')
+        return self._candles(symbol, timeframe, since, limit)
+
+    def fetch_ticker(self, symbol, params=None):
+        self._call('fetch_ticker')
+        price = self._price(symbol, int(time.time() * 1000))
+        return {'symbol': symbol, 'last': price, 'bid': price * 0.9999, 'ask': price * 1.0001}
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._call('create_order')
+        return {
+            'id': str(uuid.uuid4()),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'amount': amount,
+            'price': price,
+            'status': 'closed' if type == 'market' else 'open'
+        }
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._call('fetch_open_orders')
+        return []
+
+    def fetch_balance(self, params=None):
+        self._call('fetch_balance')
+        return {'total': {'USDT': 10000.0}, 'free': {'USDT': 10000.0}, 'used': {'USDT': 0.0}}
+
+    def fetch_markets(self, params=None):
+        self._call('fetch_markets')
+        return [{'symbol': 'BTC/USDT', 'active': True}, {'symbol': 'ETH/USDT', 'active': True}]
+
+
+class AsyncMockExchange(MockExchange):
+    """Async variant of MockExchange mirroring ccxt.async_support"""
+
+    async def _sleep(self, name):
+        """Count a call and simulate its latency without blocking the loop
+
+        Args:
+            name (str): Method name
+        """
+        self.call_counts[name] = self.call_counts.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def load_markets(self):
+        if self.markets is None:
+            await self._sleep('load_markets')
+            self.markets = {}
+        return self.markets
+
+    async def fetch_time(self):
+        await self._sleep('fetch_time')
+        return int(time.time() * 1000)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        await self._sleep('fetch_ohlcv')
+        return self._candles(symbol, timeframe, since, limit)
+
+    async def fetch_ticker(self, symbol, params=None):
+        await self._sleep('fetch_ticker')
+        price = self._price(symbol, int(time.time() * 1000))
+        return {'symbol': symbol, 'last': price, 'bid': price * 0.9999, 'ask': price * 1.0001}
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        await self._sleep('create_order')
+        return {
+            'id': str(uuid.uuid4()),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'amount': amount,
+            'price': price,
+            'status': 'closed' if type == 'market' else 'open'
+        }
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        await self._sleep('fetch_open_orders')
+        return []
+
+    async def fetch_balance(self, params=None):
+        await self._sleep('fetch_balance')
+        return {'total': {'USDT': 10000.0}, 'free': {'USDT': 10000.0}, 'used': {'USDT': 0.0}}
+
+    async def fetch_markets(self, params=None):
+        await self._sleep('fetch_markets')
+        return [{'symbol': 'BTC/USDT', 'active': True}, {'symbol': 'ETH/USDT', 'active': True}]
+
+    async def close(self):
+        pass
+
+
+class MockOcoExchange(MockExchange):
+    """MockExchange that also accepts Binance OCO orders"""
+
+    def private_post_order_oco(self, params=None):
+        self._call('private_post_order_oco')
+        return self._oco_response(params)
+
+
+class AsyncMockOcoExchange(AsyncMockExchange):
+    """AsyncMockExchange that also accepts Binance OCO orders"""
+
+    async def private_post_order_oco(self, params=None):
+        await self._sleep('private_post_order_oco')
+        return self._oco_response(params)
@@ -0,0 +1,81 @@
+"""Signal-to-order and time-to-protection latency of trade execution
+
+Each trade is executed right after its market's candles were fetched, as a bot
+would after a candle close. With the cache the entry price comes from the
+fetched candles; with ``price_max_age=0`` every trade falls back to a ticker
+round trip first.
+
+Time to protection is measured from the entry order to both protective orders
+being accepted, with the legs placed one after the other (the previous
+behaviour), in parallel, and as a single OCO order.
+
+Usage:
+    python -m benchmarks.order_latency_benchmark [--trades 200] [--latency 0.05]
+"""
+import argparse
+import time
+
+from bot_engine.trading_engine import TradingEngine
+from benchmarks.mock_exchange import MockExchange, MockOcoExchange
+
+SYMBOLS = [f"COIN{i}/USDT" for i in range(20)]
+
+class SequentialProtectionEngine(TradingEngine):
+    """Engine placing the protective legs one after the other"""
+
+    def _place_protective_orders(self, symbol, side, quantity, tp_price, sl_price):
+        exit_side = 'sell' if side == 'buy' else 'buy'
+        return {
+            'mode': 'sequential',
+            'take_profit': self._place_order_leg(symbol=symbol, type='limit', side=exit_side, amount=quantity, price=tp_price),
+            'stop_loss': self._place_order_leg(
+                symbol=symbol, type='stop_loss', side=exit_side, amount=quantity, price=sl_price,
+                params={'stopPrice': sl_price}
+            )
+        }
+
+def run(trades, latency, price_max_age, engine_class=TradingEngine, exchange_class=MockExchange):
+    """Execute trades on the threaded engine and return its latency statistics"""
+    exchange = exchange_class(latency=latency)
+    engine = engine_class(price_max_age=price_max_age)
+    engine.exchange = exchange
+    engine.market_data.exchange = exchange
+
+    for index in range(trades):
+        symbol = SYMBOLS[index % len(SYMBOLS)]
+        engine.market_data.get_candles(symbol, '1m')
+        engine._execute_trade('bench', symbol, 100, 'buy', 3.0, 2.0, signal_time=time.time())
+
+    engine.scheduler.stop()
+    return engine.get_latency_stats(), exchange.call_counts.get('fetch_ticker', 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trades', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per exchange call')
+    args = parser.parse_args()
+
+    for name, price_max_age in (('rest', 0), ('cache', 10)):
+        stats, tickers = run(args.trades, args.latency, price_max_age)
+        latency = stats['all']
+        print(
+            f"{name:<10} trades={latency['count']} tickers={tickers} "
+            f"p50={latency['p50']:.1f}ms p99={latency['p99']:.1f}ms max={latency['max']:.1f}ms "
+            f"hit_ratio={stats['price_cache']['hit_ratio']:.2f}"
+        )
+
+    modes = (
+        ('sequential', SequentialProtectionEngine, MockExchange),
+        ('parallel', TradingEngine, MockExchange),
+        ('oco', TradingEngine, MockOcoExchange)
+    )
+    for name, engine_class, exchange_class in modes:
+        stats, _ = run(args.trades, args.latency, 10, engine_class, exchange_class)
+        protection = stats['protection']
+        print(
+            f"{name:<10} trades={protection['count']} time_to_protection "
+            f"p50={protection['p50']:.1f}ms p99={protection['p99']:.1f}ms max={protection['max']:.1f}ms"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Throughput of the position book under concurrent bot updates
+
+Worker threads stand in for bots of many users: each operation checks a
+position and the user's count and exposure (as RiskManager.can_trade does),
+then books a fill or closes the position. Runs with a single lock and with
+striped locks, and times reconciliation of one symbol. Needs no database or
+exchange.
+
+Usage:
+    python -m benchmarks.position_book_benchmark [--users 5000] [--threads 8] [--operations 200000]
+"""
+import argparse
+import random
+import time
+from threading import Thread
+
+from bot_engine.position_book import PositionBook
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT']
+
+def run_worker(book, users, operations, seed):
+    """Check and update random positions"""
+    rng = random.Random(seed)
+    for index in range(operations):
+        user_id = users[rng.randrange(len(users))]
+        symbol = SYMBOLS[rng.randrange(len(SYMBOLS))]
+        side = 'buy' if rng.random() < 0.5 else 'sell'
+
+        if book.has(user_id, symbol, side):
+            book.remove(user_id, symbol, side)
+        elif book.count(user_id) < 5 and book.get_exposure(user_id) < 1000:
+            book.add_fill(user_id, symbol, side, 0.01, 100.0, 1.0, (f'{seed}-{index}-tp', f'{seed}-{index}-sl'))
+
+def run(stripes, users, threads, operations):
+    """Operations per second of concurrent workers on a fresh book"""
+    book = PositionBook(stripes=stripes)
+    workers = [
+        Thread(target=run_worker, args=(book, users, operations // threads, seed))
+        for seed in range(threads)
+    ]
+
+    started_at = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started_at
+
+    return book, operations / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--operations', type=int, default=200000)
+    args = parser.parse_args()
+
+    users = [f'user-{index}' for index in range(args.users)]
+
+    for stripes in (1, 64):
+        book, rate = run(stripes, users, args.threads, args.operations)
+        stats = book.get_stats()
+        print(f"stripes={stripes:<3} threads={args.threads} users={args.users} ops/s={rate:,.0f} "
+              f"open positions={stats['positions']}")
+
+    # No protective order open: every position on the symbol closes
+    started_at = time.perf_counter()
+    closed = book.reconcile(SYMBOLS[0], set(), time.time())
+    print(f"reconcile {SYMBOLS[0]}: closed={len(closed)} time={(time.perf_counter() - started_at) * 1000:.1f}ms")
+
+if __name__ == '__main__':
+    main()
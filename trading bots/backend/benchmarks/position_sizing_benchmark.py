@@ -0,0 +1,78 @@
+"""Volatility-based position sizing: shared per-bar estimates versus recomputing per bot
+
+Fills the candle buffers of a number of markets with synthetic 1m candles,
+subscribes many bots to each, then times one sizing round (a volatility
+estimate per bot) recomputing the ATR from the buffer for every bot and
+reading the estimate shared through MarketDataHub.get_volatility. Checks
+that no sizing request reached the exchange. Needs no database or exchange.
+
+Usage:
+    python -m benchmarks.position_sizing_benchmark [--markets 50] [--bots 100] [--period 14]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bot_engine.market_data import MarketDataHub
+from bot_engine.volatility import estimate_volatility
+
+def synthetic_candles(rng, count, interval_ms, now_ms):
+    """Random-walk OHLCV rows ending with the in-progress candle"""
+    opens = (now_ms // interval_ms - count + 1 + np.arange(count)) * interval_ms
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.001, count)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    return np.column_stack((opens, open_, high, low, close, rng.uniform(1, 10, count)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--markets', type=int, default=50)
+    parser.add_argument('--bots', type=int, default=100, help='Bots per market')
+    parser.add_argument('--period', type=int, default=14)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    hub = MarketDataHub()
+    now_ms = int(time.time() * 1000)
+    markets = [(f'COIN{index}/USDT', '1m') for index in range(args.markets)]
+
+    for symbol, interval in markets:
+        for bot in range(args.bots):
+            hub.subscribe(f'{symbol}-{bot}', symbol, interval)
+        hub._get_subscription(symbol, interval)['buffer'].extend(synthetic_candles(rng, hub.history_size, 60000, now_ms))
+
+    timings = {'per bot': [], 'shared': []}
+    for _ in range(args.repeats):
+        started_at = time.perf_counter()
+        for symbol, interval in markets:
+            buffer = hub._get_subscription(symbol, interval)['buffer']
+            for _ in range(args.bots):
+                estimate_volatility(buffer.to_array()[:-1], args.period)
+        timings['per bot'].append(time.perf_counter() - started_at)
+
+        hub.volatility.estimates.clear()
+        started_at = time.perf_counter()
+        for symbol, interval in markets:
+            for _ in range(args.bots):
+                hub.get_volatility(symbol, interval, args.period)
+        timings['shared'].append(time.perf_counter() - started_at)
+
+    requests = args.markets * args.bots
+    for name, samples in timings.items():
+        best = min(samples) * 1000
+        print(f"{name:<8} markets={args.markets} bots={requests} round={best:.1f}ms "
+              f"per request={best * 1000 / requests:.2f}us")
+
+    stats = hub.get_stats()
+    estimate = hub.get_volatility(*markets[0], args.period)
+    print(f"estimates computed={stats['volatility']['misses']} hit ratio={stats['volatility']['hit_ratio']:.3f} "
+          f"exchange fetches={stats['total_fetches']}")
+    print(f"{markets[0][0]}: atr={estimate['atr']:.4f} atr_pct={estimate['atr_pct']:.5f} "
+          f"realized={estimate['realized_volatility']:.5f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Local WebSocket stand-in for the Binance combined stream
+
+Replays recorded frames (one JSON frame per line) to every client that
+connects, so MarketStream can be exercised without network access. Set
+``drop_after`` to close each connection after that many frames and exercise
+reconnects and REST backfill.
+
+Usage:
+    python -m benchmarks.replay_stream_server frames.jsonl [--port 9443] [--delay 0.01] [--drop-after N]
+
+Then start the engine with BINANCE_STREAM_URL=ws://127.0.0.1:9443.
+"""
+import argparse
+import base64
+import hashlib
+import socket
+import struct
+import time
+from threading import Thread
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+class ReplayStreamServer:
+    """Minimal WebSocket server replaying recorded text frames"""
+
+    def __init__(self, frames, host='127.0.0.1', port=0, delay=0.0, drop_after=None):
+        """Initialize the replay server
+
+        Args:
+            frames (list): Raw JSON frames to send, in order
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 picks a free port)
+            delay (float): Seconds between frames
+            drop_after (int, optional): Close each connection after this many frames
+        """
+        self.frames = frames
+        self.delay = delay
+        self.drop_after = drop_after
+        self.connections = 0
+        self.requested_paths = []
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen()
+        self.host, self.port = self._socket.getsockname()
+        self._running = False
+
+    @property
+    def url(self):
+        """Base URL to pass as MarketStream base_url"""
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        """Accept connections in a background thread"""
+        self._running = True
+        Thread(target=self._accept, daemon=True).start()
+
+    def stop(self):
+        """Stop accepting connections"""
+        self._running = False
+        self._socket.close()
+
+    def _accept(self):
+        while self._running:
+            try:
+                client, _ = self._socket.accept()
+            except OSError:
+                break
+            self.connections += 1
+            Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        """Complete the WebSocket handshake and replay frames to one client"""
+        try:
+            request = client.recv(65536).decode()
+            lines = request.split('\r\n')
+            self.requested_paths.append(lines[0].split(' ')[1])
+            headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+            key = headers.get('Sec-WebSocket-Key', '')
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+            client.sendall((
+                'HTTP/1.1 101 Switching Protocols\r\n'
+                'Upgrade: websocket\r\n'
+                'Connection: Upgrade\r\n'
+                f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+            ).encode())
+
+            for index, frame in enumerate(self.frames):
+                if self.drop_after is not None and index >= self.drop_after:
+                    break
+                client.sendall(self._encode(frame))
+                if self.delay:
+                    time.sleep(self.delay)
+        except OSError:
+            pass
+        finally:
+            client.close()
+
+    @staticmethod
+    def _encode(text):
+        """Encode an unmasked server text frame"""
+        payload = text.encode()
+        length = len(payload)
+
+        if length < 126:
+            header = struct.pack('!BB', 0x81, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x81, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x81, 127, length)
+
+        return header + payload
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('frames', help='file with one recorded JSON frame per line')
+    parser.add_argument('--port', type=int, default=9443)
+    parser.add_argument('--delay', type=float, default=0.01)
+    parser.add_argument('--drop-after', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.frames) as f:
+        frames = [line.strip() for line in f if line.strip()]
+
+    server = ReplayStreamServer(frames, port=args.port, delay=args.delay, drop_after=args.drop_after)
+    server.start()
+    print(f"Replaying {len(frames)} frames on {server.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
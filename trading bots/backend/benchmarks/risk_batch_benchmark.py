@@ -0,0 +1,93 @@
+"""Risk checks of one tick: RiskManager.can_trade per intent versus can_trade_batch
+
+Seeds users with random risk settings, books some open positions, then
+checks a tick of trade intents (by default 10k over 2k users) one by one
+and as one batch. Checked one by one, every intent sees the same state, so
+bots of a user racing for the last slot would all pass; the batch grants
+the slots in a fixed order. Needs a running mongod; the benchmark users are
+removed from the given database afterwards.
+
+Usage:
+    python -m benchmarks.risk_batch_benchmark --mongo-uri mongodb://localhost:27017/trading_bot_bench [--intents 10000] [--users 2000]
+"""
+import argparse
+import random
+import time
+
+from flask import Flask
+
+from bot_engine.position_book import PositionBook
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.risk_manager import RiskManager
+from models.user import User
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_bench')
+    parser.add_argument('--intents', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    with app.app_context():
+        result = User.get_collection().insert_many([{
+            'email': f'bench-{index}@example.com',
+            'username': f'bench-{index}',
+            'account_balance': 10000,
+            'settings': {'risk_management': {
+                'max_open_positions': rng.randint(1, 5),
+                'max_trades_per_day': rng.randint(2, 20),
+                'max_open_exposure': rng.choice([None, 5, 10])
+            }}
+        } for index in range(args.users)])
+        user_ids = [str(user_id) for user_id in result.inserted_ids]
+
+        try:
+            ledger = RiskLedger()
+            ledger.rebuild()
+            positions = PositionBook()
+            for user_id in user_ids:
+                for _ in range(rng.randint(0, 2)):
+                    positions.add_fill(user_id, rng.choice(SYMBOLS), rng.choice(['buy', 'sell']), 0.01, 100.0, 100.0, ('tp', 'sl'))
+
+            intents = [{
+                'bot_id': f'bot-{index}',
+                'user_id': rng.choice(user_ids),
+                'symbol': rng.choice(SYMBOLS),
+                'amount': rng.choice([50, 100, 500]),
+                'is_buy': rng.random() < 0.5
+            } for index in range(args.intents)]
+
+            risk_manager = RiskManager(ledger=ledger, positions=positions)
+
+            # Warm the user cache so both variants read users from memory
+            risk_manager.can_trade_batch(intents)
+
+            timings = {'per intent': [], 'batch': []}
+            for _ in range(args.repeats):
+                started_at = time.perf_counter()
+                single = [risk_manager.can_trade(i['user_id'], i['symbol'], i['amount'], i['is_buy']) for i in intents]
+                timings['per intent'].append(time.perf_counter() - started_at)
+
+                started_at = time.perf_counter()
+                batch = risk_manager.can_trade_batch(intents)
+                timings['batch'].append(time.perf_counter() - started_at)
+        finally:
+            User.get_collection().delete_many({'email': {'$regex': '^bench-'}})
+
+    for name, samples in timings.items():
+        best = min(samples) * 1000
+        print(f"{name:<10} intents={args.intents} users={args.users} tick={best:.1f}ms "
+              f"per intent={best * 1000 / args.intents:.2f}us")
+
+    print(f"allowed per intent={sum(single)} batch={sum(batch)} "
+          f"(conflicts resolved by the batch: {sum(single) - sum(batch)})")
+
+if __name__ == '__main__':
+    main()
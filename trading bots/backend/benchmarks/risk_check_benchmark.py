@@ -0,0 +1,87 @@
+"""Latency of RiskManager.can_trade with today's totals queried per check versus the risk ledger
+
+Seeds one user with a day of trades, then times can_trade aggregating
+today's trades from MongoDB on every check and reading them from a
+RiskLedger rebuilt once. The user document comes from the user cache in
+both runs. Needs a running mongod; the benchmark user and trades are
+removed from the given database afterwards.
+
+Usage:
+    python -m benchmarks.risk_check_benchmark --mongo-uri mongodb://localhost:27017/trading_bot_bench [--trades 500]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from flask import Flask
+
+from bot_engine.metrics import summarize_latencies
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.risk_manager import RiskManager
+from models.trade import Trade
+from models.user import User
+
+def time_checks(risk_manager, user_id, checks):
+    """Latency summary of repeated risk checks in milliseconds"""
+    samples = []
+    for _ in range(checks):
+        started_at = time.perf_counter()
+        risk_manager.can_trade(user_id, 'BTC/USDT', 10, True)
+        samples.append(time.perf_counter() - started_at)
+    return summarize_latencies(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_bench')
+    parser.add_argument('--trades', type=int, default=500)
+    parser.add_argument('--checks', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    with app.app_context():
+        user_id = str(User.create({
+            'email': 'bench@example.com',
+            'username': 'bench',
+            'account_balance': 100000,
+            'settings': {'risk_management': {'max_trades_per_day': args.trades * 2}}
+        }))
+        now = datetime.utcnow()
+        Trade.get_collection().insert_many([{
+            'user_id': user_id,
+            'symbol': 'BTC/USDT',
+            'type': 'buy' if index % 2 else 'sell',
+            'amount': 10,
+            'profit_loss': (index % 5) - 2.0,
+            'timestamp': now
+        } for index in range(args.trades)])
+
+        try:
+            ledger = RiskLedger()
+            started_at = time.perf_counter()
+            ledger.rebuild()
+            rebuild_ms = (time.perf_counter() - started_at) * 1000
+
+            results = {
+                'query per check': time_checks(RiskManager(), user_id, args.checks),
+                'risk ledger': time_checks(RiskManager(ledger=ledger), user_id, args.checks)
+            }
+
+            started_at = time.perf_counter()
+            for _ in range(args.checks):
+                ledger.get(user_id)
+            ledger_us = (time.perf_counter() - started_at) / args.checks * 1e6
+        finally:
+            Trade.get_collection().delete_many({'user_id': user_id})
+            User.get_collection().delete_one({'_id': ObjectId(user_id)})
+
+    for name, stats in results.items():
+        print(f"{name:<16} checks={stats['count']} mean={stats['mean']:.3f}ms "
+              f"p50={stats['p50']:.3f}ms p99={stats['p99']:.3f}ms")
+
+    print(f"ledger rebuild={rebuild_ms:.1f}ms ledger lookup={ledger_us:.2f}us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Memory and scheduling jitter of the bot scheduler versus one thread per bot
+
+Usage:
+    python -m benchmarks.scheduler_benchmark [--bots 10 1000 10000] [--duration 10] [--threads]
+"""
+import argparse
+import threading
+import time
+
+from bot_engine.market_data import MarketDataHub
+from bot_engine.scheduler import BotScheduler
+from bot_engine.strategies import RSIStrategy, MACDStrategy, EMACrossoverStrategy
+from benchmarks.mock_exchange import MockExchange
+
+SYMBOLS = [f"COIN{i}/USDT" for i in range(20)]
+STRATEGIES = [RSIStrategy, MACDStrategy, EMACrossoverStrategy]
+
+def get_rss_mb():
+    """Resident set size of this process in megabytes"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def make_bot(hub, index):
+    """Build the evaluation callback of one benchmark bot"""
+    symbol = SYMBOLS[index % len(SYMBOLS)]
+    strategy = STRATEGIES[index % len(STRATEGIES)]()
+    hub.subscribe(str(index), symbol, '1m')
+
+    def evaluate():
+        candles = hub.get_candles(symbol, '1m', since=strategy.last_timestamp)
+        strategy.update_many(candles)
+
+    return evaluate
+
+def summarize(samples):
+    """Jitter percentiles in milliseconds"""
+    samples = sorted(samples)
+    if not samples:
+        return 'n/a'
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    return f"p50={p50:.2f}ms p99={p99:.2f}ms max={samples[-1] * 1000:.2f}ms"
+
+def run_scheduler(bots, interval, duration, workers):
+    """Run bots on the shared scheduler"""
+    hub = MarketDataHub(MockExchange(), refresh_interval=interval)
+    rss_before = get_rss_mb()
+    threads_before = threading.active_count()
+
+    scheduler = BotScheduler(max_workers=workers, jitter_samples=1000000)
+    scheduler.start()
+    for i in range(bots):
+        # Spread first runs over one interval like bots started at different times
+        scheduler.schedule(str(i), make_bot(hub, i), interval, delay=interval * i / bots)
+
+    time.sleep(duration)
+    stats = scheduler.get_stats()
+    rss_after = get_rss_mb()
+    threads = threading.active_count() - threads_before
+    scheduler.stop()
+
+    return {
+        'rss_mb': rss_after - rss_before,
+        'threads': threads,
+        'runs': stats['run_count'],
+        'jitter': summarize(list(scheduler._jitter))
+    }
+
+def run_threads(bots, interval, duration):
+    """Run bots with one sleeping thread each (previous engine model)"""
+    hub = MarketDataHub(MockExchange(), refresh_interval=interval)
+    rss_before = get_rss_mb()
+    threads_before = threading.active_count()
+    jitter = []
+    runs = [0]
+    running = [True]
+
+    def loop(evaluate, delay):
+        due = time.time() + delay
+        while running[0]:
+            time.sleep(max(0, due - time.time()))
+            jitter.append(time.time() - due)
+            evaluate()
+            runs[0] += 1
+            due += interval
+
+    workers = [
+        threading.Thread(target=loop, args=(make_bot(hub, i), interval * i / bots), daemon=True)
+        for i in range(bots)
+    ]
+    for worker in workers:
+        worker.start()
+
+    time.sleep(duration)
+    rss_after = get_rss_mb()
+    threads = threading.active_count() - threads_before
+    running[0] = False
+
+    for worker in workers:
+        worker.join()
+
+    return {
+        'rss_mb': rss_after - rss_before,
+        'threads': threads,
+        'runs': runs[0],
+        'jitter': summarize(jitter)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bots', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--interval', type=float, default=5.0, help='seconds between evaluations of a bot')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds to run each scenario')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--threads', action='store_true', help='also run the thread-per-bot model')
+    args = parser.parse_args()
+
+    for bots in args.bots:
+        result = run_scheduler(bots, args.interval, args.duration, args.workers)
+        print(f"scheduler bots={bots:>6} threads=+{result['threads']:<5} rss=+{result['rss_mb']:.1f}MB "
+              f"runs={result['runs']:<7} jitter {result['jitter']}")
+
+        if args.threads:
+            result = run_threads(bots, args.interval, args.duration)
+            print(f"threads   bots={bots:>6} threads=+{result['threads']:<5} rss=+{result['rss_mb']:.1f}MB "
+                  f"runs={result['runs']:<7} jitter {result['jitter']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Signal generation throughput of the sharded engine versus worker count
+
+Bots spread over many (symbol, interval) markets are routed to worker
+processes by the sharded engine. Every round resets all strategies and
+evaluates every bot, so each evaluation replays the full candle history
+through the strategy's indicators. Risk checks deny every trade, so only
+signal generation is measured.
+
+Usage:
+    python -m benchmarks.shard_scaling_benchmark [--bots 400] [--workers 1 2 4] [--rounds 3]
+"""
+import argparse
+import time
+
+from bot_engine.sharded_engine import ShardEngine, ShardedTradingEngine
+from benchmarks.mock_exchange import MockExchange
+
+SYMBOLS = [f"COIN{i}/USDT" for i in range(20)]
+INTERVALS = ['1m', '5m', '15m', '1h']
+STRATEGIES = ['rsi', 'macd', 'ema_crossover']
+
+class SignalOnlyRiskManager:
+    """Risk manager denying every trade"""
+
+    def can_trade(self, user_id, symbol, amount, is_buy):
+        return False
+
+
+class BenchmarkShardEngine(ShardEngine):
+    """Shard engine trading against a mock exchange without risk checks"""
+
+    def start_bot(self, *args, **kwargs):
+        bot_id = super().start_bot(*args, **kwargs)
+        self.active_bots[bot_id]['risk_manager'] = SignalOnlyRiskManager()
+        return bot_id
+
+
+class BenchmarkShardedEngine(ShardedTradingEngine):
+    """Sharded engine dropping notifications"""
+
+    def _notify(self, user_id, message, notification_type='trade'):
+        pass
+
+
+def create_benchmark_engine(shard_id, results, options):
+    """Build a shard engine on a mock exchange (runs in the worker process)"""
+    engine = BenchmarkShardEngine(results, **options)
+    engine.exchange = MockExchange()
+    engine.market_data.exchange = engine.exchange
+    return engine
+
+def run(bots, workers, rounds):
+    """Start bots on a sharded engine and time full evaluation rounds"""
+    engine = BenchmarkShardedEngine(workers=workers, engine_factory=create_benchmark_engine)
+
+    try:
+        for index in range(bots):
+            engine.start_bot(
+                user_id='bench',
+                symbol=SYMBOLS[index % len(SYMBOLS)],
+                strategy=STRATEGIES[index % len(STRATEGIES)],
+                interval=INTERVALS[index // len(SYMBOLS) % len(INTERVALS)],
+                amount=100,
+                take_profit=3.0,
+                stop_loss=2.0
+            )
+
+        # First round fetches the candle history of every market
+        engine.evaluate_all(reset=True)
+
+        started_at = time.perf_counter()
+        signals = sum(engine.evaluate_all(reset=True) for _ in range(rounds))
+        elapsed = time.perf_counter() - started_at
+
+        shard_bots = [shard['bots'] for shard in engine.get_stats()['shards']]
+    finally:
+        engine.close()
+
+    return signals, elapsed, shard_bots
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bots', type=int, default=400)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        signals, elapsed, shard_bots = run(args.bots, workers, args.rounds)
+        print(
+            f"workers={workers:>2} signals={signals} time={elapsed:.2f}s "
+            f"signals/s={signals / elapsed:.1f} bots_per_shard={shard_bots}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Decoding cost of trade query results: full documents versus lean decoding and projection
+
+Encodes trades as BSON (as a server reply would carry them) and decodes
+them the way Trade.find used to (default decoding, then a Python loop
+turning ObjectIds into strings), with the lean codec options that decode
+ObjectIds straight to strings, and with a profit/loss-only projection as
+used by calculate_performance and the risk checks. Needs no database.
+
+Usage:
+    python -m benchmarks.trade_decoding_benchmark [--trades 100000] [--repeats 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import bson
+from bson.objectid import ObjectId
+
+from models.trade import LEAN_CODEC_OPTIONS
+
+def make_trades(count):
+    """Trade documents shaped like the ones the engine stores"""
+    started = datetime.utcnow() - timedelta(seconds=count)
+    return [{
+        '_id': ObjectId(),
+        'user_id': str(ObjectId()),
+        'bot_id': 'f3b1c2d4-5e6f-4a7b-8c9d-0e1f2a3b4c5d',
+        'symbol': 'BTC/USDT',
+        'type': 'buy' if index % 2 else 'sell',
+        'amount': 100.0,
+        'price': 50000.0 + index,
+        'quantity': 0.002,
+        'fee': 0.1,
+        'timestamp': started + timedelta(seconds=index),
+        'status': 'completed',
+        'order_id': str(1000000 + index),
+        'profit_loss': (index % 7) - 3.0
+    } for index in range(count)]
+
+def decode_full_with_loop(data):
+    """Previous Trade.find: default decoding plus per-document conversion"""
+    result = []
+    for trade in bson.decode_all(data):
+        trade['_id'] = str(trade['_id'])
+        if 'user_id' in trade and isinstance(trade['user_id'], ObjectId):
+            trade['user_id'] = str(trade['user_id'])
+        result.append(trade)
+    return result
+
+def best_of(func, data, repeats):
+    """Fastest of several runs in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - started_at)
+    return min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trades', type=int, default=100000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    trades = make_trades(args.trades)
+    full = b''.join(bson.encode(trade) for trade in trades)
+    projected = b''.join(bson.encode({'profit_loss': trade['profit_loss']}) for trade in trades)
+
+    runs = [
+        ('full, default decode + loop', decode_full_with_loop, full),
+        ('full, lean decode', lambda data: bson.decode_all(data, LEAN_CODEC_OPTIONS), full),
+        ('profit_loss projection', lambda data: bson.decode_all(data, LEAN_CODEC_OPTIONS), projected)
+    ]
+
+    for name, func, data in runs:
+        elapsed = best_of(func, data, args.repeats)
+        print(f"{name:<30} trades={args.trades} bytes={len(data)} time={elapsed:.1f}ms "
+              f"per trade={elapsed * 1000 / args.trades:.2f}us")
+
+if __name__ == '__main__':
+    main()
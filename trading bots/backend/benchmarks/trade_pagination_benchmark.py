@@ -0,0 +1,92 @@
+"""Cost of deep trade history pages with skip versus keyset (cursor) pagination
+
+Seeds one user's trades into the trades collection of the given database,
+creates the indexes, then times fetching a page at increasing depths: with
+``skip`` the server walks past every earlier trade, with a cursor it seeks
+straight to the page. Needs a running mongod; use a scratch database, the
+seeded trades are deleted afterwards.
+
+Usage:
+    python -m benchmarks.trade_pagination_benchmark --mongo-uri mongodb://localhost:27017/trading_bot_bench [--trades 100000]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from models.trade import Trade
+from models.indexes import ensure_indexes
+
+USER_ID = 'pagination-bench'
+
+def seed(trades):
+    """Insert trades for the benchmark user, several sharing each timestamp"""
+    collection = Trade.get_collection()
+    collection.delete_many({'user_id': USER_ID})
+    started = datetime.utcnow() - timedelta(seconds=trades)
+
+    batch = []
+    for index in range(trades):
+        batch.append({
+            'user_id': USER_ID,
+            'symbol': 'BTC/USDT',
+            'type': 'buy' if index % 2 else 'sell',
+            'amount': 100,
+            'price': 50000.0,
+            'timestamp': started + timedelta(seconds=index // 3)
+        })
+        if len(batch) == 10000:
+            collection.insert_many(batch)
+            batch = []
+
+    if batch:
+        collection.insert_many(batch)
+
+def time_call(func, repeats):
+    """Mean milliseconds per call"""
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started_at) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_bench')
+    parser.add_argument('--trades', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    with app.app_context():
+        ensure_indexes()
+        seed(args.trades)
+        filters = {'user_id': USER_ID}
+
+        try:
+            pages = args.trades // args.limit
+            page = 1
+            while page <= pages:
+                skip = (page - 1) * args.limit
+
+                # The cursor a client would hold after reading the previous page
+                previous = Trade.find(filters, limit=1, skip=skip - 1) if skip else []
+                cursor = Trade.get_cursor(previous[0]) if previous else None
+
+                skip_ms = time_call(lambda: Trade.find(filters, limit=args.limit, skip=skip), args.repeats)
+                cursor_ms = time_call(lambda: Trade.find(filters, limit=args.limit, after=cursor), args.repeats)
+                print(f"page={page:>6} skip={skip_ms:7.2f}ms cursor={cursor_ms:7.2f}ms")
+
+                page *= 10
+
+            count_ms = time_call(lambda: Trade.count(filters), 5)
+            cached_ms = time_call(lambda: Trade.count(filters, max_age=30), args.repeats)
+            print(f"count exact={count_ms:.2f}ms cached={cached_ms:.3f}ms")
+        finally:
+            Trade.get_collection().delete_many({'user_id': USER_ID})
+
+if __name__ == '__main__':
+    main()
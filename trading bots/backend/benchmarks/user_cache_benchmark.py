@@ -0,0 +1,100 @@
+"""MongoDB operations per trade with and without the user cache
+
+Runs what every trade costs in user lookups (RiskManager.can_trade and the
+trade notification) for one user, first with the user cache disabled and
+then enabled, and counts the commands sent to MongoDB with a command
+listener. Needs a running mongod; the benchmark user is inserted into and
+removed from the users collection of the given database.
+
+Usage:
+    python -m benchmarks.user_cache_benchmark --mongo-uri mongodb://localhost:27017/trading_bot_bench [--trades 1000]
+"""
+import argparse
+import time
+from collections import Counter
+
+from bson.objectid import ObjectId
+from flask import Flask
+from pymongo import monitoring
+
+from bot_engine.risk_manager import RiskManager
+from models.user import User
+from utils.notification import NotificationManager
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts started commands per (command, collection)"""
+
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self.commands[(event.command_name, collection if isinstance(collection, str) else None)] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def run_trades(user_id, trades, counter):
+    """Run the per-trade user lookups and count the MongoDB commands"""
+    risk_manager = RiskManager()
+    notification_manager = NotificationManager()
+    counter.commands.clear()
+
+    started_at = time.perf_counter()
+    for _ in range(trades):
+        risk_manager.can_trade(user_id, 'BTC/USDT', 10, True)
+        notification_manager.send_notification(user_id, 'Bought BTC/USDT', 'trade')
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'ops_per_trade': sum(counter.commands.values()) / trades,
+        'user_finds_per_trade': counter.commands[('find', 'users')] / trades,
+        'ms_per_trade': elapsed / trades * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_bench')
+    parser.add_argument('--trades', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Registered before the first client is created so it sees every command
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    with app.app_context():
+        user_id = str(User.create({
+            'email': 'bench@example.com',
+            'username': 'bench',
+            'account_balance': 10000,
+            'settings': {'notifications': {'methods': ['in_app']}}
+        }))
+        cache = User.get_cache()
+
+        try:
+            max_size = cache.max_size
+            cache.max_size = 0
+            uncached = run_trades(user_id, args.trades, counter)
+
+            cache.max_size = max_size
+            cache.clear()
+            cache.hits = cache.misses = 0
+            cached = run_trades(user_id, args.trades, counter)
+        finally:
+            User.get_collection().delete_one({'_id': ObjectId(user_id)})
+
+    for name, stats in (('no user cache', uncached), ('user cache', cached)):
+        print(f"{name:<14} trades={args.trades} mongo ops/trade={stats['ops_per_trade']:.2f} "
+              f"user finds/trade={stats['user_finds_per_trade']:.2f} time/trade={stats['ms_per_trade']:.3f}ms")
+
+    print(f"user cache hit ratio={cache.get_stats()['hit_ratio']:.3f} "
+          f"ops saved/trade={uncached['ops_per_trade'] - cached['ops_per_trade']:.2f}")
+
+if __name__ == '__main__':
+    main()
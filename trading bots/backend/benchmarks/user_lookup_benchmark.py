@@ -0,0 +1,65 @@
+"""Latency of User.find_by_id with a new MongoClient per call versus the shared client
+
+The per-call variant repeats what every model query used to do: build a
+MongoClient (connection setup, server discovery, a fresh pool), query and
+drop it. The shared variant is the current ``User.find_by_id`` on the
+process-wide client. Needs a running mongod; the benchmark user is inserted
+into and removed from the users collection of the given database.
+
+Usage:
+    python -m benchmarks.user_lookup_benchmark --mongo-uri mongodb://localhost:27017/trading_bot_bench [--lookups 1000]
+"""
+import argparse
+import time
+
+from bson.objectid import ObjectId
+from flask import Flask
+from pymongo import MongoClient
+
+from bot_engine.metrics import summarize_latencies
+from models.user import User
+
+def find_by_id_new_client(mongo_uri, user_id):
+    """User lookup through a client created for the call (the previous behaviour)"""
+    mongo_client = MongoClient(mongo_uri)
+    try:
+        return mongo_client.get_database().users.find_one({'_id': ObjectId(user_id)})
+    finally:
+        mongo_client.close()
+
+def time_lookups(lookup, lookups):
+    """Latency summary of repeated lookups in milliseconds"""
+    samples = []
+    for _ in range(lookups):
+        started_at = time.perf_counter()
+        if lookup() is None:
+            raise Exception("Benchmark user not found")
+        samples.append(time.perf_counter() - started_at)
+    return summarize_latencies(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/trading_bot_bench')
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['MONGO_URI'] = args.mongo_uri
+
+    with app.app_context():
+        user_id = str(User.create({'email': 'bench@example.com', 'username': 'bench'}))
+
+        try:
+            results = {
+                'new client per call': time_lookups(lambda: find_by_id_new_client(args.mongo_uri, user_id), args.lookups),
+                'shared client': time_lookups(lambda: User.find_by_id(user_id), args.lookups)
+            }
+        finally:
+            User.get_collection().delete_one({'_id': ObjectId(user_id)})
+
+    for name, stats in results.items():
+        print(f"{name:<20} lookups={stats['count']} mean={stats['mean']:.3f}ms "
+              f"p50={stats['p50']:.3f}ms p99={stats['p99']:.3f}ms max={stats['max']:.3f}ms")
+
+if __name__ == '__main__':
+    main()
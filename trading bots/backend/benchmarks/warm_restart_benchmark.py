@@ -0,0 +1,108 @@
+"""Time to first evaluation of every bot after an engine restart
+
+Bots run once on a first engine, which is then closed; its bot registry
+documents (configs plus the saved strategy state) are handed to a fresh
+engine. The cold restart resumes the configs only and lets every market be
+fetched by the first bot that evaluates it, so each bot replays the full
+candle history through its indicators. The warm restart prewarms all
+markets in parallel and resumes the saved strategy state. Trades are
+blocked by the trade guard, so only evaluation is measured.
+
+Usage:
+    python -m benchmarks.warm_restart_benchmark [--bots 1000] [--symbols 50] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import time
+from threading import Event, Lock
+
+from bot_engine.trading_engine import TradingEngine
+from bot_engine.metrics import summarize_latencies
+from benchmarks.mock_exchange import MockExchange
+
+STRATEGIES = ['rsi', 'macd', 'ema_crossover']
+
+class TimedEngine(TradingEngine):
+    """Trading engine recording when each bot first finished an evaluation"""
+
+    def __init__(self, bots, **kwargs):
+        super().__init__(**kwargs)
+        self.expected = bots
+        self.first_evaluations = {}
+        self.done = Event()
+        self._timing_lock = Lock()
+        self.trade_guard = lambda bot_id: False
+
+    def _run_bot(self, bot_id):
+        super()._run_bot(bot_id)
+
+        with self._timing_lock:
+            if bot_id not in self.first_evaluations:
+                self.first_evaluations[bot_id] = time.perf_counter()
+                if len(self.first_evaluations) >= self.expected:
+                    self.done.set()
+
+def make_engine(bots, latency, workers):
+    """Engine on its own mock exchange"""
+    exchange = MockExchange(latency=latency)
+    engine = TimedEngine(bots, max_workers=workers)
+    engine.exchange = exchange
+    engine.market_data.exchange = exchange
+    return engine, exchange
+
+def build_registry(bots, symbols, latency, workers):
+    """Run every bot once and return its registry documents with saved state"""
+    documents = [{
+        '_id': f"bot-{index}",
+        'user_id': 'bench',
+        'symbol': f"COIN{index % symbols}/USDT",
+        'strategy': STRATEGIES[index % len(STRATEGIES)],
+        'interval': '1m',
+        'amount': 100,
+        'take_profit': 3.0,
+        'stop_loss': 2.0,
+        'status': 'running'
+    } for index in range(bots)]
+
+    engine, _ = make_engine(bots, latency, workers)
+    engine.restore_bots(documents)
+    engine.done.wait()
+    engine.close()
+
+    for document in documents:
+        document['state'] = engine.active_bots[document['_id']]['state']
+
+    return documents
+
+def run_restart(documents, latency, workers, warm):
+    """Restore the bots on a fresh engine and time their first evaluations"""
+    if not warm:
+        documents = [{key: value for key, value in document.items() if key != 'state'} for document in documents]
+
+    engine, exchange = make_engine(len(documents), latency, workers)
+
+    started_at = time.perf_counter()
+    engine.restore_bots(documents, prewarm=warm)
+    engine.done.wait()
+    elapsed = time.perf_counter() - started_at
+
+    engine.close()
+    samples = [at - started_at for at in engine.first_evaluations.values()]
+    return elapsed, summarize_latencies(samples), exchange.call_counts.get('fetch_ohlcv', 0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bots', type=int, default=1000)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per exchange call')
+    parser.add_argument('--workers', type=int, default=8, help='scheduler worker threads')
+    args = parser.parse_args()
+
+    documents = build_registry(args.bots, args.symbols, args.latency, args.workers)
+
+    for name, warm in (('cold', False), ('warm', True)):
+        elapsed, first, fetches = run_restart(documents, args.latency, args.workers, warm)
+        print(f"{name} bots={args.bots} all evaluated in {elapsed * 1000:.0f}ms "
+              f"first evaluation p50={first['p50']:.0f}ms p99={first['p99']:.0f}ms ohlcv fetches={fetches}")
+
+if __name__ == '__main__':
+    main()
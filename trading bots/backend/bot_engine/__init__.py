@@ -1,6 +1,21 @@
 # Import main classes for easier access
 from bot_engine.trading_engine import TradingEngine
+from bot_engine.async_trading_engine import AsyncTradingEngine
+from bot_engine.sharded_engine import ShardedTradingEngine
+from bot_engine.lease_manager import BotLeaseManager
 from bot_engine.risk_manager import RiskManager
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.position_book import PositionBook, SharedPositionBook
+from bot_engine.market_data import MarketDataHub
+from bot_engine.market_stream import MarketStream
+from bot_engine.candle_buffer import CandleBuffer
+from bot_engine.price_cache import PriceCache
+from bot_engine.volatility import VolatilityCache
+from bot_engine.rate_limiter import RequestBudget, RequestBudgetExceeded, BudgetedExchange
+from bot_engine.scheduler import BotScheduler
 from bot_engine.strategies import RSIStrategy, MACDStrategy, EMACrossoverStrategy, StrategyFactory
 
-__all__ = ['TradingEngine', 'RiskManager', 'RSIStrategy', 'MACDStrategy', 'EMACrossoverStrategy', 'StrategyFactory']
\ No newline at end of file
+__all__ = ['TradingEngine', 'AsyncTradingEngine', 'ShardedTradingEngine', 'BotLeaseManager', 'RiskManager', 'RiskLedger',
+    'PositionBook', 'SharedPositionBook', 'MarketDataHub', 'MarketStream', 'CandleBuffer', 'PriceCache', 'VolatilityCache',
+    'RequestBudget', 'RequestBudgetExceeded', 'BudgetedExchange', 'BotScheduler', 'RSIStrategy', 'MACDStrategy',
+    'EMACrossoverStrategy', 'StrategyFactory']
\ No newline at end of file
@@ -0,0 +1,973 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from threading import Thread
+
+import aiohttp
+import ccxt.async_support as ccxt_async
+
+# Import strategies
+from bot_engine.strategies.rsi_strategy import RSIStrategy
+from bot_engine.strategies.macd_strategy import MACDStrategy
+from bot_engine.strategies.ema_crossover_strategy import EMACrossoverStrategy
+
+# Import risk manager, candle buffers and engine helpers
+from bot_engine.risk_manager import RiskManager
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.position_book import PositionBook
+from bot_engine.candle_buffer import CandleBuffer
+from bot_engine.price_cache import PriceCache
+from bot_engine.volatility import VolatilityCache
+from bot_engine.orders import supports_oco
+from bot_engine.rate_limiter import RequestBudget, RequestBudgetExceeded, BudgetedExchange
+from bot_engine.timeframes import interval_to_seconds, last_candle_close, next_candle_close
+from bot_engine.engine_common import (
+    get_active_bot_ids, build_bot_config, get_unsaved_states, mark_states_saved, get_protective_prices,
+    build_protective_legs, build_protective_oco_request, build_oco_protection, build_leg_result,
+    build_trade_latency, build_trade_result, summarize_balance, build_trade_record, rebuild_risk_ledger,
+    load_protected_positions, get_latency_stats, get_request_budget_stats, calculate_performance
+)
+
+# Import models
+from models.bot import Bot
+from models.trade import Trade
+from models.user import User
+
+# Import utils
+from utils.notification import NotificationManager
+
+class AsyncTradingEngine:
+    """Trading engine multiplexing all bots on a single asyncio event loop
+
+    Exchange I/O goes through ``ccxt.async_support`` with one shared aiohttp
+    session, so fetches and order placements of many bots overlap instead of
+    blocking worker threads. Each bot is a lightweight task that wakes after
+    every candle close. Blocking database and notification calls run in the
+    loop's default executor.
+
+    The public methods are synchronous and mirror ``TradingEngine`` so the API
+    routes can use either engine.
+    """
+
+    def __init__(self, api_key=None, api_secret=None, candle_close_grace=2, history_size=500, exchange=None, price_max_age=10,
+                 use_oco=True, request_weight_limit=6000, app=None, position_reconcile_interval=None,
+                 risk_batch_window=None, time_sync_interval=3600, persist_bots=False, checkpoint_interval=60):
+        """Initialize the async trading engine
+
+        Args:
+            api_key (str, optional): Binance API key
+            api_secret (str, optional): Binance API secret
+            candle_close_grace (float): Seconds after a candle close before bots evaluate it
+            history_size (int): Number of candles kept per market
+            exchange (ccxt.async_support.Exchange, optional): Preconfigured async exchange
+            price_max_age (float): Seconds a cached price may be used instead of fetching a ticker
+            use_oco (bool): Place take profit and stop loss as one OCO order when supported
+            request_weight_limit (int): Exchange request weight per minute shared by all bots
+            app (flask.Flask, optional): App whose context risk checks and trade records run in
+            position_reconcile_interval (float, optional): Seconds between reconciliations of
+                the position book with the exchange's open orders (never if omitted)
+            risk_batch_window (float, optional): Seconds risk checks are collected for one
+                batched check (each bot is checked on its own if omitted)
+            time_sync_interval (float): Seconds between exchange server time syncs
+            persist_bots (bool): Keep bot configs and strategy state in the bots collection
+            checkpoint_interval (float): Seconds between bulk saves of strategy state
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.app = app
+        self.request_budget = RequestBudget(limit=request_weight_limit)
+        self.exchange = BudgetedExchange(exchange, self.request_budget) if exchange else None
+        self.session = None
+        self.candle_close_grace = candle_close_grace
+        self.history_size = history_size
+        self.time_offset = 0.0  # Exchange clock minus local clock, in seconds
+        self.time_sync_interval = time_sync_interval
+        self.persist_bots = persist_bots
+        self.active_bots = {}  # Dict of active bots: {bot_id: bot_data}
+        self.markets = {}  # Dict of shared market data: {(symbol, interval): market}
+        self.prices = PriceCache(max_age=price_max_age)
+        self.volatility = VolatilityCache()  # Volatility per market, estimated from the candle buffers
+        self.trade_latencies = deque(maxlen=10000)  # Recent per-trade latency records
+        self.use_oco = use_oco
+        self.risk_ledger = RiskLedger()  # Today's trade count, profit/loss and exposure per user
+        self.positions = PositionBook()  # Open positions per user, symbol and side
+        self.risk_manager = RiskManager(ledger=self.risk_ledger, positions=self.positions, market_data=self)  # Batched checks
+        self.risk_batch_window = risk_batch_window
+        self._risk_batch = []  # Trade intents awaiting the next batched check: [(intent, future)]
+        self._reconcile_task = None
+        self._time_sync_task = None
+        self._checkpoint_task = None
+        self.strategies = {
+            'rsi': RSIStrategy,
+            'macd': MACDStrategy,
+            'ema_crossover': EMACrossoverStrategy
+        }
+        self.notification_manager = NotificationManager()
+
+        # Run the event loop in a background thread
+        self.loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self.loop.run_forever, name='async-trading-engine', daemon=True)
+        self._thread.start()
+
+        # Initialize exchange if API credentials are provided
+        if api_key and api_secret:
+            self.initialize_exchange()
+        elif self.exchange:
+            self._call(self._start_time_sync())
+
+        # Periodically close positions whose protective orders filled or were cancelled
+        if position_reconcile_interval:
+            self._reconcile_task = asyncio.run_coroutine_threadsafe(
+                self._reconcile_positions_forever(position_reconcile_interval), self.loop
+            )
+
+        # Periodically save the strategy state of bots that evaluated since the last save
+        if persist_bots:
+            self._checkpoint_task = asyncio.run_coroutine_threadsafe(
+                self._checkpoint_bots_forever(checkpoint_interval), self.loop
+            )
+
+    def _call(self, coroutine):
+        """Run a coroutine on the engine loop and wait for its result
+
+        Args:
+            coroutine (coroutine): Coroutine to run
+
+        Returns:
+            object: Coroutine result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def initialize_exchange(self):
+        """Initialize the exchange connection"""
+        self._call(self._initialize_exchange())
+
+    async def _initialize_exchange(self):
+        """Create the async exchange client sharing one aiohttp session"""
+        try:
+            self.session = aiohttp.ClientSession()
+            # Every call is charged against the request weight budget shared by all bots
+            self.exchange = BudgetedExchange(ccxt_async.binance({
+                'apiKey': self.api_key,
+                'secret': self.api_secret,
+                'enableRateLimit': True,
+                'session': self.session
+            }), self.request_budget)
+            await self.exchange.load_markets()
+
+            await self._start_time_sync()
+            print("Exchange initialized successfully")
+        except Exception as e:
+            print(f"Error initializing exchange: {str(e)}")
+            self.exchange = None
+
+    async def _sync_time(self):
+        """Synchronize the clock offset with the exchange server time"""
+        try:
+            request_time = time.time()
+            server_time = await self.exchange.fetch_time() / 1000
+            response_time = time.time()
+            self.time_offset = server_time - (request_time + response_time) / 2
+        except Exception as e:
+            print(f"Error synchronizing exchange time: {str(e)}")
+
+    async def _start_time_sync(self):
+        """Synchronize the clock offset now and every time_sync_interval seconds"""
+        # Keep bot wake-ups aligned with the exchange clock
+        await self._sync_time()
+        if self._time_sync_task is None:
+            self._time_sync_task = asyncio.ensure_future(self._sync_time_forever(self.time_sync_interval))
+
+    async def _sync_time_forever(self, interval):
+        """Resynchronize the clock offset every interval seconds, so clock drift does not build up
+
+        Args:
+            interval (float): Seconds between syncs
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if self.exchange:
+                await self._sync_time()
+
+    def close(self):
+        """Stop all bot tasks, close exchange connections and stop the loop"""
+        self._call(self._close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+        # Keep the latest strategy state so the bots resume where they stopped
+        if self.persist_bots:
+            self.checkpoint_bots()
+
+    async def _close(self):
+        """Cancel bot tasks and release network resources"""
+        for bot_data in self.active_bots.values():
+            bot_data['is_running'] = False
+            bot_data['task'].cancel()
+
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+        if self._checkpoint_task:
+            self._checkpoint_task.cancel()
+        if self._time_sync_task:
+            self._time_sync_task.cancel()
+
+        if self.exchange:
+            await self.exchange.close()
+        if self.session:
+            await self.session.close()
+
+    def get_active_bots(self, user_id):
+        """Get active bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of active bot IDs
+        """
+        return get_active_bot_ids(user_id, self.persist_bots)
+
+    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss):
+        """Start a new trading bot
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol (e.g., 'BTCUSDT')
+            strategy (str): Strategy ID
+            interval (str): Candlestick interval (e.g., '1h', '4h', '1d')
+            amount (float): Amount to trade
+            take_profit (float): Take profit percentage
+            stop_loss (float): Stop loss percentage
+
+        Returns:
+            str: Bot ID
+        """
+        # Validate parameters
+        if not self.exchange:
+            raise Exception("Exchange not initialized")
+
+        if strategy not in self.strategies:
+            raise Exception(f"Strategy '{strategy}' not found")
+
+        interval_to_seconds(interval)  # Raises ValueError for unknown intervals
+
+        # Generate bot ID
+        bot_id = str(uuid.uuid4())
+
+        # Create bot configuration
+        bot_config = {
+            'id': bot_id,
+            'user_id': user_id,
+            'symbol': symbol,
+            'strategy': strategy,
+            'interval': interval,
+            'amount': amount,
+            'take_profit': take_profit,
+            'stop_loss': stop_loss,
+            'is_running': True,
+            'created_at': datetime.utcnow()
+        }
+
+        # Register the bot so it survives engine restarts
+        if self.persist_bots:
+            Bot.create(bot_config)
+
+        self._call(self._start_bot(bot_config))
+        print(f"Bot {bot_id} started for {symbol} using {strategy} strategy")
+
+        # Notify user
+        self.notification_manager.send_notification(
+            user_id,
+            f"Trading bot started for {symbol} using {strategy} strategy"
+        )
+
+        return bot_id
+
+    async def _start_bot(self, bot_config, state=None):
+        """Register a bot and create its task on the engine loop
+
+        Args:
+            bot_config (dict): Bot configuration
+            state (dict, optional): Saved 'last_acted_bar' and 'strategy' state to resume from
+        """
+        bot_id = bot_config['id']
+        state = state or {}
+
+        strategy = self.strategies[bot_config['strategy']]()
+
+        # Resume the indicators only if the buffered candles continue where they stopped
+        strategy_state = state.get('strategy')
+        if strategy_state:
+            market = self.markets.get((bot_config['symbol'], bot_config['interval']))
+            first_timestamp = market['buffer'].first_timestamp if market else None
+            if first_timestamp is not None and first_timestamp <= strategy_state['last_timestamp']:
+                strategy.set_state(strategy_state)
+
+        bot_data = {
+            'config': bot_config,
+            'is_running': True,
+            'strategy': strategy,
+            'risk_manager': RiskManager(bot_config['user_id'], ledger=self.risk_ledger, positions=self.positions,
+                                        market_data=self),
+            'last_acted_bar': state.get('last_acted_bar'),  # Open timestamp of the last bar a signal was executed for
+            'state': None,  # Strategy state after the latest evaluation
+            'saved_state': None  # Strategy state last written to the bots collection
+        }
+        self.active_bots[bot_id] = bot_data
+        bot_data['task'] = self.loop.create_task(self._run_bot(bot_id))
+
+    def stop_bot(self, user_id, bot_id):
+        """Stop a trading bot
+
+        Args:
+            user_id (str): User ID
+            bot_id (str): Bot ID
+
+        Returns:
+            bool: True if bot was stopped, False otherwise
+        """
+        bot_config = self._call(self._stop_bot(user_id, bot_id))
+        if not bot_config:
+            return False
+
+        if self.persist_bots:
+            Bot.set_status(bot_id, 'stopped')
+
+        print(f"Bot {bot_id} stopped")
+
+        # Notify user
+        self.notification_manager.send_notification(
+            user_id,
+            f"Trading bot stopped for {bot_config['symbol']}"
+        )
+
+        return True
+
+    async def _stop_bot(self, user_id, bot_id):
+        """Remove a bot from the registry, cancel its task and drop its market if no other bot uses it
+
+        Args:
+            user_id (str): User ID
+            bot_id (str): Bot ID
+
+        Returns:
+            dict: Configuration of the stopped bot, or None if not stopped
+        """
+        bot_data = self.active_bots.get(bot_id)
+
+        # Check if bot exists and belongs to user
+        if not bot_data or bot_data['config']['user_id'] != user_id:
+            return None
+
+        del self.active_bots[bot_id]
+        bot_data['is_running'] = False
+        bot_data['config']['is_running'] = False
+        bot_data['task'].cancel()
+
+        # Drop the market's candles once its last bot stopped
+        symbol = bot_data['config']['symbol']
+        interval = bot_data['config']['interval']
+        if not any(other['config']['symbol'] == symbol and other['config']['interval'] == interval
+                   for other in self.active_bots.values()):
+            self.markets.pop((symbol, interval), None)
+            self.volatility.discard(symbol, interval)
+
+        return bot_data['config']
+
+    def stop_all_bots(self, user_id):
+        """Stop all trading bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of stopped bot IDs
+        """
+        stopped_bots = []
+
+        for bot_id, bot_data in list(self.active_bots.items()):
+            if bot_data['config']['user_id'] == user_id:
+                if self.stop_bot(user_id, bot_id):
+                    stopped_bots.append(bot_id)
+
+        return stopped_bots
+
+    def restore_bots(self):
+        """Resume the running bots of the bot registry after a restart
+
+        The candle history of every market is loaded up front, all markets
+        concurrently, and each bot resumes its saved strategy state, so its
+        first evaluation only feeds the candles since its last one through its
+        indicators. The saved last acted bar keeps each bot from acting on a
+        bar twice.
+
+        Returns:
+            list: List of restored bot IDs
+        """
+        try:
+            bots = self._call_in_app_context(Bot.find_running)
+        except Exception as e:
+            print(f"Error loading bot registry: {str(e)}")
+            return []
+
+        if self.exchange:
+            self._call(self._prewarm({(bot['symbol'], bot['interval']) for bot in bots}))
+
+        restored = []
+
+        for bot in bots:
+            try:
+                self._call(self._start_bot(build_bot_config(bot), bot.get('state')))
+                restored.append(bot['_id'])
+            except Exception as e:
+                print(f"Error restoring bot {bot['_id']}: {str(e)}")
+
+        print(f"Restored {len(restored)} of {len(bots)} bots")
+        return restored
+
+    async def _prewarm(self, markets):
+        """Load the candle history of several markets concurrently
+
+        Args:
+            markets (iterable): (symbol, interval) pairs
+        """
+        markets = list(markets)
+        results = await asyncio.gather(
+            *(self._get_candles(symbol, interval) for symbol, interval in markets), return_exceptions=True
+        )
+
+        for (symbol, interval), result in zip(markets, results):
+            if isinstance(result, Exception):
+                print(f"Error loading {symbol} {interval}: {str(result)}")
+
+    def checkpoint_bots(self):
+        """Save the strategy state of every bot that evaluated since the last checkpoint
+
+        Returns:
+            int: Number of bots saved
+        """
+        states = get_unsaved_states(self.active_bots)
+
+        try:
+            self._call_in_app_context(Bot.save_states, states)
+        except Exception as e:
+            print(f"Error saving bot states: {str(e)}")
+            return 0
+
+        mark_states_saved(self.active_bots, states)
+        return len(states)
+
+    async def _checkpoint_bots_forever(self, interval):
+        """Save the strategy state of the bots every interval seconds
+
+        Args:
+            interval (float): Seconds between checkpoints
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self.loop.run_in_executor(None, self.checkpoint_bots)
+
+    async def _run_bot(self, bot_id):
+        """Bot task waking just after every candle close of its interval
+
+        Args:
+            bot_id (str): Bot ID
+        """
+        bot_data = self.active_bots[bot_id]
+        interval = bot_data['config']['interval']
+
+        while bot_data['is_running']:
+            now = time.time()
+            wake_time = next_candle_close(now + self.time_offset, interval) - self.time_offset + self.candle_close_grace
+            await asyncio.sleep(max(0, wake_time - now))
+
+            if bot_data['is_running']:
+                await self._evaluate_bot(bot_id, bot_data)
+
+    async def _get_candles(self, symbol, interval, since=None):
+        """Get buffered candles for a market, fetching new candles once per close
+
+        Bots on the same market share one buffer; the first bot after a candle
+        close fetches while the others wait on the market lock.
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            since (int, optional): Open timestamp in milliseconds of the first candle
+
+        Returns:
+            numpy.ndarray: Candles as rows of [timestamp, open, high, low, close, volume]
+        """
+        key = (symbol, interval)
+        market = self.markets.get(key)
+
+        if market is None:
+            market = {
+                'buffer': CandleBuffer(symbol, interval, self.history_size),
+                'lock': asyncio.Lock(),
+                'fetched_at': 0,
+                'fetch_count': 0
+            }
+            self.markets[key] = market
+
+        async with market['lock']:
+            now = time.time()
+            last_close = last_candle_close(now + self.time_offset, interval) - self.time_offset
+
+            if market['fetched_at'] < last_close:
+                buffer = market['buffer']
+
+                try:
+                    if buffer.last_timestamp is None:
+                        candles = await self.exchange.fetch_ohlcv(symbol, interval, limit=self.history_size)
+                    else:
+                        candles = await self.exchange.fetch_ohlcv(symbol, interval, since=buffer.last_timestamp)
+                except RequestBudgetExceeded as e:
+                    # Keep serving the buffered candles while the request budget is exhausted
+                    if not market['fetch_count']:
+                        raise
+                    print(f"Skipping refresh of {symbol} {interval}: {str(e)}")
+                    return buffer.get_since(since)
+
+                buffer.extend(candles)
+                market['fetched_at'] = time.time()
+
+                # The in-progress candle's close is the latest traded price
+                if buffer.size:
+                    self.prices.update(symbol, last=float(buffer.to_array()[-1, 4]))
+                market['fetch_count'] += 1
+
+            return market['buffer'].get_since(since)
+
+    def get_volatility(self, symbol, interval, period=14):
+        """Get the volatility estimate of a market from its buffered candles
+
+        Serves the risk managers' volatility-based sizing; call it on the
+        engine loop, which owns the candle buffers.
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            period (int): Number of bars averaged
+
+        Returns:
+            dict: Volatility estimate (see estimate_volatility), or None if the market is not buffered
+        """
+        market = self.markets.get((symbol, interval))
+        if market is None:
+            return None
+
+        return self.volatility.get(market['buffer'], time.time() + self.time_offset, period)
+
+    async def _evaluate_bot(self, bot_id, bot_data):
+        """Evaluate a trading bot once
+
+        Args:
+            bot_id (str): Bot ID
+            bot_data (dict): Bot state
+        """
+        bot_config = bot_data['config']
+        user_id = bot_config['user_id']
+        symbol = bot_config['symbol']
+        interval = bot_config['interval']
+        strategy = bot_data['strategy']
+        risk_manager = bot_data['risk_manager']
+
+        try:
+            # Fetch candles not yet seen by the strategy (shared with other bots on this market)
+            candles = await self._get_candles(symbol, interval, since=strategy.last_timestamp)
+
+            # Update streaming indicators and get the signal of the newest closed bar
+            last_signal, signal_bar = strategy.update_closed(
+                candles,
+                interval,
+                (time.time() + self.time_offset) * 1000
+            )
+            signal_time = time.time()
+
+            # Snapshot the strategy state for the next checkpoint
+            bot_data['state'] = {'last_acted_bar': bot_data['last_acted_bar'], 'strategy': strategy.get_state()}
+
+            # Act on each bar's signal at most once
+            if signal_bar is None or signal_bar == bot_data['last_acted_bar'] or last_signal == 0:
+                return
+
+            bot_data['last_acted_bar'] = signal_bar
+            bot_data['state'] = {'last_acted_bar': signal_bar, 'strategy': bot_data['state']['strategy']}
+            side = 'buy' if last_signal > 0 else 'sell'
+
+            # Save the acted bar before trading, so a restart never acts on it again
+            if self.persist_bots:
+                try:
+                    await self.loop.run_in_executor(
+                        None, self._call_in_app_context, Bot.save_state, bot_id, bot_data['state']
+                    )
+                    bot_data['saved_state'] = bot_data['state']
+                except Exception as e:
+                    print(f"Error saving state of bot {bot_id}: {str(e)}")
+
+            # Size the trade from the user's balance and risk settings, read once for the risk checks too
+            user = await self.loop.run_in_executor(None, self._call_in_app_context, User.find_by_id, user_id)
+            if not user:
+                return
+            amount = risk_manager.get_trade_amount(user, bot_config)
+
+            # Check risk management rules, claiming the position for this trade
+            if self.risk_batch_window:
+                can_trade = await self._check_risk_batched({
+                    'bot_id': bot_id, 'user_id': user_id, 'symbol': symbol, 'amount': amount, 'is_buy': last_signal > 0
+                })
+            else:
+                can_trade = await self.loop.run_in_executor(
+                    None, self._call_in_app_context, risk_manager.can_trade, user_id, symbol, amount, last_signal > 0, True, user
+                )
+            if not can_trade:
+                return
+
+            # Execute trade
+            trade_result = await self._execute_trade(
+                user_id=user_id,
+                symbol=symbol,
+                amount=amount,
+                side=side,
+                take_profit=bot_config['take_profit'],
+                stop_loss=bot_config['stop_loss'],
+                signal_time=signal_time
+            )
+
+            # Record trade and notify user
+            if trade_result:
+                await self.loop.run_in_executor(None, self._call_in_app_context, self._record_trade, bot_config, side, trade_result)
+            else:
+                # Free the position reserved by the risk check
+                self.positions.release(user_id, symbol, side)
+
+        except Exception as e:
+            print(f"Error in bot {bot_id}: {str(e)}")
+
+    async def _check_risk_batched(self, intent):
+        """Check a trade intent together with the others of the same tick
+
+        The first intent opens a batch that is checked risk_batch_window
+        seconds later, so bots waking on the same candle close share one
+        RiskManager.can_trade_batch call.
+
+        Args:
+            intent (dict): Trade intent for RiskManager.can_trade_batch
+
+        Returns:
+            bool: True if the trade is allowed
+        """
+        future = self.loop.create_future()
+        self._risk_batch.append((intent, future))
+
+        if len(self._risk_batch) == 1:
+            self.loop.call_later(self.risk_batch_window, lambda: self.loop.create_task(self._flush_risk_batch()))
+
+        return await future
+
+    async def _flush_risk_batch(self):
+        """Check the collected trade intents, claiming the allowed positions, and wake their bots"""
+        batch, self._risk_batch = self._risk_batch, []
+
+        try:
+            results = await self.loop.run_in_executor(
+                None, self._call_in_app_context, self.risk_manager.can_trade_batch, [intent for intent, _ in batch], True
+            )
+        except Exception as e:
+            print(f"Error checking risk of {len(batch)} trades: {str(e)}")
+            results = [False] * len(batch)
+
+        for (intent, future), allowed in zip(batch, results):
+            if not future.done():
+                future.set_result(allowed)
+            elif allowed:
+                # The bot stopped while waiting; free the position claimed for it
+                self.positions.release(intent['user_id'], intent['symbol'], 'buy' if intent['is_buy'] else 'sell')
+
+    def _call_in_app_context(self, func, *args):
+        """Call a function inside the app context, if an app was given (runs in the executor)
+
+        Args:
+            func (callable): Function
+            *args: Function arguments
+
+        Returns:
+            object: Function result
+        """
+        if not self.app:
+            return func(*args)
+
+        with self.app.app_context():
+            return func(*args)
+
+    def _record_trade(self, bot_config, side, trade_result):
+        """Store an executed trade and notify the user (runs in the executor)
+
+        Args:
+            bot_config (dict): Bot configuration
+            side (str): Trade side ('buy' or 'sell')
+            trade_result (dict): Trade result from _execute_trade
+        """
+        trade = build_trade_record(bot_config, side, trade_result)
+
+        # Count the trade against the daily limits before storing it: the
+        # order is already filled even if the database write fails
+        self.risk_ledger.record(trade)
+        Trade.create(trade)
+
+        self.notification_manager.send_notification(
+            bot_config['user_id'],
+            f"Trade executed: {trade_result['side']} {trade_result['quantity']} {bot_config['symbol']} at {trade_result['price']}"
+        )
+
+    async def _execute_trade(self, user_id, symbol, amount, side, take_profit, stop_loss, signal_time=None):
+        """Execute a trade
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            amount (float): Amount to trade
+            side (str): Trade side ('buy' or 'sell')
+            take_profit (float): Take profit percentage
+            stop_loss (float): Stop loss percentage
+            signal_time (float, optional): Unix time the signal was generated
+
+        Returns:
+            dict: Trade result or None if failed
+        """
+        try:
+            started_at = time.time()
+
+            # Get current market price, fetching a ticker only if the cached price is stale
+            price = self.prices.get_price(symbol, side)
+            price_source = 'cache'
+
+            if not price:
+                ticker = await self.exchange.fetch_ticker(symbol)
+                price = ticker['last']
+                price_source = 'rest'
+                self.prices.update(symbol, last=ticker['last'], bid=ticker.get('bid'), ask=ticker.get('ask'))
+
+            price_time = time.time()
+
+            # Calculate quantity based on amount
+            quantity = amount / price
+
+            # Execute market order
+            order = await self.exchange.create_order(
+                symbol=symbol,
+                type='market',
+                side=side,
+                amount=quantity
+            )
+
+            order_time = time.time()
+
+            # Record signal-to-order latency
+            latency = build_trade_latency(price_source, started_at, price_time, order_time, signal_time)
+            self.trade_latencies.append(latency)
+
+            # Protect the position with take profit and stop loss orders
+            tp_price, sl_price = get_protective_prices(price, side, take_profit, stop_loss)
+            protection = await self._place_protective_orders(symbol, side, quantity, tp_price, sl_price)
+            latency['protection_ms'] = (time.time() - order_time) * 1000
+
+            # Book the position for the next risk checks
+            self.positions.add_fill(
+                user_id, symbol, side, quantity, price, amount,
+                (protection['take_profit']['order_id'], protection['stop_loss']['order_id'])
+            )
+
+            return build_trade_result(order, side, amount, quantity, price, protection, latency)
+
+        except Exception as e:
+            print(f"Error executing trade: {str(e)}")
+            return None
+
+    async def _place_protective_orders(self, symbol, side, quantity, tp_price, sl_price):
+        """Place the take profit and stop loss orders of a position
+
+        Both legs go out as one OCO order when the exchange supports it, so
+        either fill cancels the other. Otherwise (or if the OCO order is
+        rejected) the two legs are submitted concurrently.
+
+        Args:
+            symbol (str): Trading symbol
+            side (str): Side of the entry order ('buy' or 'sell')
+            quantity (float): Position quantity
+            tp_price (float): Take profit price
+            sl_price (float): Stop loss price
+
+        Returns:
+            dict: 'mode' ('oco' or 'parallel') and per-leg 'take_profit' and
+                'stop_loss' results with 'order_id', 'latency_ms' and 'error'
+        """
+        if self.use_oco and supports_oco(self.exchange):
+            started_at = time.time()
+
+            try:
+                await self.exchange.load_markets()
+                response = await self.exchange.private_post_order_oco(
+                    build_protective_oco_request(self.exchange, symbol, side, quantity, tp_price, sl_price)
+                )
+                return build_oco_protection(response, started_at)
+            except Exception as e:
+                print(f"Error placing OCO order, placing legs separately: {str(e)}")
+
+        # Submit both legs at once
+        tp_order, sl_order = build_protective_legs(symbol, side, quantity, tp_price, sl_price)
+        take_profit, stop_loss = await asyncio.gather(
+            self._place_order_leg(**tp_order),
+            self._place_order_leg(**sl_order)
+        )
+
+        return {
+            'mode': 'parallel',
+            'take_profit': take_profit,
+            'stop_loss': stop_loss
+        }
+
+    async def _place_order_leg(self, **order):
+        """Place one protective order and time it
+
+        Args:
+            **order: Arguments of ``create_order``
+
+        Returns:
+            dict: 'order_id', 'latency_ms' and 'error' (None on success)
+        """
+        started_at = time.time()
+
+        try:
+            return build_leg_result(started_at, await self.exchange.create_order(**order))
+        except Exception as e:
+            print(f"Error placing {order['type']} order: {str(e)}")
+            return build_leg_result(started_at, error=e)
+
+    def get_account_balance(self, user_id):
+        """Get account balance for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: Account balance
+        """
+        try:
+            # Fetch balance from exchange
+            balance = self._call(self.exchange.fetch_balance())
+
+            # Include only non-zero balances
+            return summarize_balance(balance)
+
+        except Exception as e:
+            print(f"Error fetching account balance: {str(e)}")
+            return {}
+
+    def get_available_symbols(self):
+        """Get available trading symbols
+
+        Returns:
+            list: List of available symbols
+        """
+        try:
+            markets = self._call(self.exchange.fetch_markets())
+            return [market['symbol'] for market in markets if market['active']]
+        except Exception as e:
+            print(f"Error fetching available symbols: {str(e)}")
+            return []
+
+    def calculate_performance(self, user_id, period='30d'):
+        """Calculate trading performance for a user
+
+        Args:
+            user_id (str): User ID
+            period (str): Time period ('1d', '7d', '30d', 'all')
+
+        Returns:
+            dict: Performance metrics
+        """
+        # Performance only depends on stored trades, not on the exchange client
+        return calculate_performance(user_id, period)
+
+    def restore_positions(self, lookback_days=7):
+        """Load the positions of recent trades into the position book after a restart
+
+        Trades whose protective orders are no longer open on the exchange are
+        closed again by the reconciliation that follows.
+
+        Args:
+            lookback_days (int): Days of trades searched for open positions
+
+        Returns:
+            int: Number of open positions
+        """
+        self._call_in_app_context(load_protected_positions, self.positions, lookback_days)
+
+        self.reconcile_positions()
+        return self.positions.get_stats()['positions']
+
+    def reconcile_positions(self):
+        """Close the positions whose protective orders are no longer open on the exchange
+
+        Returns:
+            int: Number of positions closed
+        """
+        return self._call(self._reconcile_positions())
+
+    async def _reconcile_positions(self):
+        """Reconcile the position book with the open orders of each symbol held"""
+        if not self.exchange:
+            return 0
+
+        closed = 0
+
+        for symbol in self.positions.get_symbols():
+            try:
+                fetched_at = time.time()
+                orders = await self.exchange.fetch_open_orders(symbol)
+            except Exception as e:
+                print(f"Error fetching open orders of {symbol}: {str(e)}")
+                continue
+
+            closed += len(self.positions.reconcile(symbol, {order['id'] for order in orders}, fetched_at))
+
+        return closed
+
+    async def _reconcile_positions_forever(self, interval):
+        """Reconcile the position book every interval seconds
+
+        Args:
+            interval (float): Seconds between reconciliations
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await self._reconcile_positions()
+
+    def sync_risk_ledger(self):
+        """Rebuild the risk ledger from today's trades
+
+        Returns:
+            int: Number of users with trades today, or None if the rebuild failed
+        """
+        return self._call_in_app_context(rebuild_risk_ledger, self.risk_ledger)
+
+    def get_latency_stats(self):
+        """Get signal-to-order latency statistics of recent trades
+
+        Returns:
+            dict: Latency summaries in milliseconds, overall and per price source
+        """
+        return get_latency_stats(self.trade_latencies, self.prices)
+
+    def get_request_budget_stats(self):
+        """Get request weight budget statistics
+
+        Returns:
+            dict: Budget usage plus the weight used per running bot in the last minute
+        """
+        return get_request_budget_stats(self.request_budget, len(self.active_bots))
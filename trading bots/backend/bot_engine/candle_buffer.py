@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+class CandleBuffer:
+    """Fixed-size ring buffer of OHLCV candles for a single market
+
+    Candles live in a preallocated NumPy array that is written twice (at slot
+    and slot + capacity), so the ordered history is always available as a
+    contiguous view without copying when the ring wraps around.
+    """
+
+    COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, symbol, interval, capacity=500):
+        """Initialize the candle buffer
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            capacity (int): Maximum number of candles kept
+        """
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = capacity
+        self.size = 0
+        self._start = 0
+        self._data = np.zeros((capacity * 2, len(self.COLUMNS)), dtype=np.float64)
+
+    @property
+    def first_timestamp(self):
+        """Get the open timestamp of the oldest buffered candle
+
+        Returns:
+            int: Timestamp in milliseconds, or None if the buffer is empty
+        """
+        if not self.size:
+            return None
+        return int(self._data[self._start, 0])
+
+    @property
+    def last_timestamp(self):
+        """Get the open timestamp of the newest candle
+
+        Returns:
+            int: Timestamp in milliseconds, or None if the buffer is empty
+        """
+        if not self.size:
+            return None
+        return int(self._data[self._start + self.size - 1, 0])
+
+    def _write(self, slot, candle):
+        """Write a candle to a ring slot and its mirror
+
+        Args:
+            slot (int): Ring slot index
+            candle (list): Candle as [timestamp, open, high, low, close, volume]
+        """
+        self._data[slot] = candle[:6]
+        self._data[slot + self.capacity] = candle[:6]
+
+    def append(self, candle):
+        """Append a candle or revise the in-progress candle
+
+        A candle with the same timestamp as the newest candle overwrites it;
+        candles older than the newest candle are ignored.
+
+        Args:
+            candle (list): Candle as [timestamp, open, high, low, close, volume]
+
+        Returns:
+            bool: True if the buffer changed, False otherwise
+        """
+        last_timestamp = self.last_timestamp
+
+        if last_timestamp is not None and candle[0] < last_timestamp:
+            return False
+
+        if last_timestamp is not None and candle[0] == last_timestamp:
+            # Revise the in-progress candle
+            slot = (self._start + self.size - 1) % self.capacity
+        elif self.size < self.capacity:
+            slot = (self._start + self.size) % self.capacity
+            self.size += 1
+        else:
+            # Overwrite the oldest candle
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self._write(slot, candle)
+        return True
+
+    def extend(self, candles):
+        """Append several candles in chronological order
+
+        Args:
+            candles (list): List of candles
+
+        Returns:
+            int: Number of candles that changed the buffer
+        """
+        changed = 0
+        for candle in candles:
+            if self.append(candle):
+                changed += 1
+        return changed
+
+    def update(self, exchange):
+        """Fetch only the candles newer than the buffer contents
+
+        The first call loads a full history; later calls request candles since
+        the newest (possibly still open) candle, which is revised in place.
+
+        Args:
+            exchange (ccxt.Exchange): Exchange to fetch candles from
+
+        Returns:
+            int: Number of candles that changed the buffer
+        """
+        since = self.last_timestamp
+
+        if since is None:
+            candles = exchange.fetch_ohlcv(self.symbol, self.interval, limit=self.capacity)
+        else:
+            candles = exchange.fetch_ohlcv(self.symbol, self.interval, since=since)
+
+        return self.extend(candles)
+
+    def to_array(self):
+        """Get the buffered candles in chronological order
+
+        Returns:
+            numpy.ndarray: Read-only view with one row per candle
+        """
+        view = self._data[self._start:self._start + self.size]
+        view.flags.writeable = False
+        return view
+
+    def get_since(self, since=None):
+        """Copy the candles whose open timestamp is at or after a timestamp
+
+        Args:
+            since (int, optional): Timestamp in milliseconds; None copies everything
+
+        Returns:
+            numpy.ndarray: Candles in chronological order
+        """
+        candles = self.to_array()
+
+        if since is not None:
+            candles = candles[np.searchsorted(candles[:, 0], since):]
+
+        return candles.copy()
+
+    def get_column(self, name):
+        """Get a single OHLCV column in chronological order
+
+        Args:
+            name (str): Column name ('open', 'high', 'low', 'close', ...)
+
+        Returns:
+            numpy.ndarray: Read-only view of the column
+        """
+        return self.to_array()[:, self.COLUMNS.index(name)]
+
+    def to_dataframe(self):
+        """Build an OHLCV DataFrame from the buffered candles
+
+        Returns:
+            pandas.DataFrame: OHLCV data
+        """
+        # Copy so the frame is not mutated by later buffer writes
+        df = pd.DataFrame(self.to_array().copy(), columns=self.COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+        return df
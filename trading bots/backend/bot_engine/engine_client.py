@@ -0,0 +1,145 @@
+import json
+import socket
+
+class EngineClient:
+    """Client of the standalone engine service used by the web workers
+
+    Mirrors the public ``TradingEngine`` methods the API routes use and
+    forwards every call to the engine service over its Unix socket, so all
+    web workers share one engine, one set of bots and one exchange client.
+    Every call opens its own connection, which keeps the client safe to use
+    from any thread and across forked web workers.
+    """
+
+    def __init__(self, socket_path, timeout=30):
+        """Initialize the engine client
+
+        Args:
+            socket_path (str): Path of the engine service's Unix socket
+            timeout (float): Seconds to wait for the engine to answer
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, method, **params):
+        """Call an engine method in the engine service
+
+        Args:
+            method (str): Engine method name
+            **params: Method arguments
+
+        Returns:
+            object: Method result
+
+        Raises:
+            Exception: If the engine service is unreachable or the call fails
+        """
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.settimeout(self.timeout)
+                connection.connect(self.socket_path)
+                connection.sendall(json.dumps({'method': method, 'params': params}, default=str).encode() + b'\n')
+
+                with connection.makefile('rb') as reader:
+                    line = reader.readline()
+        except OSError as e:
+            raise Exception(f"Trading engine service unavailable: {str(e)}")
+
+        if not line:
+            raise Exception("Trading engine service closed the connection")
+
+        response = json.loads(line)
+        if not response['ok']:
+            raise Exception(response['error'])
+        return response['result']
+
+    def get_active_bots(self, user_id):
+        """Get active bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of active bot IDs
+        """
+        return self._call('get_active_bots', user_id=user_id)
+
+    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss):
+        """Start a new trading bot
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol (e.g., 'BTCUSDT')
+            strategy (str): Strategy ID
+            interval (str): Candlestick interval (e.g., '1h', '4h', '1d')
+            amount (float): Amount to trade
+            take_profit (float): Take profit percentage
+            stop_loss (float): Stop loss percentage
+
+        Returns:
+            str: Bot ID
+        """
+        return self._call(
+            'start_bot',
+            user_id=user_id,
+            symbol=symbol,
+            strategy=strategy,
+            interval=interval,
+            amount=amount,
+            take_profit=take_profit,
+            stop_loss=stop_loss
+        )
+
+    def stop_bot(self, user_id, bot_id):
+        """Stop a trading bot
+
+        Args:
+            user_id (str): User ID
+            bot_id (str): Bot ID
+
+        Returns:
+            bool: True if bot was stopped, False otherwise
+        """
+        return self._call('stop_bot', user_id=user_id, bot_id=bot_id)
+
+    def stop_all_bots(self, user_id):
+        """Stop all trading bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of stopped bot IDs
+        """
+        return self._call('stop_all_bots', user_id=user_id)
+
+    def get_account_balance(self, user_id):
+        """Get account balance for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: Account balance
+        """
+        return self._call('get_account_balance', user_id=user_id)
+
+    def get_available_symbols(self):
+        """Get available trading symbols
+
+        Returns:
+            list: List of available symbols
+        """
+        return self._call('get_available_symbols')
+
+    def calculate_performance(self, user_id, period='30d'):
+        """Calculate trading performance for a user
+
+        Args:
+            user_id (str): User ID
+            period (str): Time period ('1d', '7d', '30d', 'all')
+
+        Returns:
+            dict: Performance metrics
+        """
+        return self._call('calculate_performance', user_id=user_id, period=period)
@@ -0,0 +1,442 @@
+import time
+from datetime import datetime, timedelta
+
+from bot_engine.metrics import summarize_latencies
+from bot_engine.orders import build_oco_request, parse_oco_response
+
+from models.bot import Bot
+from models.trade import Trade
+from models.trade_rollup import TradeRollup
+from models.user import User
+
+def get_active_bot_ids(user_id, persist_bots):
+    """Get the active bots of a user
+
+    Args:
+        user_id (str): User ID
+        persist_bots (bool): Whether the engine keeps its bots in the bots collection
+
+    Returns:
+        list: List of active bot IDs
+    """
+    if persist_bots:
+        return [bot['_id'] for bot in Bot.find_by_user(user_id)]
+
+    user = User.find_by_id(user_id)
+    if not user:
+        return []
+
+    return user.get('settings', {}).get('active_bots', [])
+
+def build_bot_config(bot):
+    """Build the configuration of a bot resumed from the bot registry
+
+    Args:
+        bot (dict): Bot document
+
+    Returns:
+        dict: Bot configuration
+    """
+    return {
+        'id': bot['_id'],
+        'user_id': bot['user_id'],
+        'symbol': bot['symbol'],
+        'strategy': bot['strategy'],
+        'interval': bot['interval'],
+        'amount': bot['amount'],
+        'take_profit': bot['take_profit'],
+        'stop_loss': bot['stop_loss'],
+        'is_running': True,
+        'created_at': bot.get('created_at')
+    }
+
+def get_unsaved_states(active_bots):
+    """Get the strategy states of the bots that evaluated since the last checkpoint
+
+    Args:
+        active_bots (dict): Running bots of the engine by bot ID
+
+    Returns:
+        dict: Strategy state by bot ID
+    """
+    states = {}
+    for bot_id, bot_data in list(active_bots.items()):
+        state = bot_data['state']
+        if state is not None and state is not bot_data['saved_state']:
+            states[bot_id] = state
+
+    return states
+
+def mark_states_saved(active_bots, states):
+    """Remember the strategy states written by a checkpoint
+
+    Args:
+        active_bots (dict): Running bots of the engine by bot ID
+        states (dict): Saved strategy state by bot ID
+    """
+    for bot_id, state in states.items():
+        bot_data = active_bots.get(bot_id)
+        if bot_data:
+            bot_data['saved_state'] = state
+
+def get_protective_prices(price, side, take_profit, stop_loss):
+    """Get the take profit and stop loss prices of a position
+
+    Args:
+        price (float): Entry price
+        side (str): Side of the entry order ('buy' or 'sell')
+        take_profit (float): Take profit percentage
+        stop_loss (float): Stop loss percentage
+
+    Returns:
+        tuple: (take profit price, stop loss price)
+    """
+    if side == 'buy':
+        return price * (1 + take_profit / 100), price * (1 - stop_loss / 100)
+
+    return price * (1 - take_profit / 100), price * (1 + stop_loss / 100)
+
+def build_protective_legs(symbol, side, quantity, tp_price, sl_price):
+    """Build the take profit and stop loss orders placed when OCO is unavailable
+
+    Args:
+        symbol (str): Trading symbol
+        side (str): Side of the entry order ('buy' or 'sell')
+        quantity (float): Position quantity
+        tp_price (float): Take profit price
+        sl_price (float): Stop loss price
+
+    Returns:
+        tuple: Arguments of ``create_order`` for the take profit and the stop loss leg
+    """
+    exit_side = 'sell' if side == 'buy' else 'buy'
+
+    take_profit = {
+        'symbol': symbol,
+        'type': 'limit',
+        'side': exit_side,
+        'amount': quantity,
+        'price': tp_price
+    }
+    stop_loss = {
+        'symbol': symbol,
+        'type': 'stop_loss',
+        'side': exit_side,
+        'amount': quantity,
+        'price': sl_price,
+        'params': {'stopPrice': sl_price}
+    }
+
+    return take_profit, stop_loss
+
+def build_protective_oco_request(exchange, symbol, side, quantity, tp_price, sl_price):
+    """Build the OCO request protecting a position (markets must be loaded)
+
+    Args:
+        exchange (ccxt.Exchange): Exchange client
+        symbol (str): Trading symbol
+        side (str): Side of the entry order ('buy' or 'sell')
+        quantity (float): Position quantity
+        tp_price (float): Take profit price
+        sl_price (float): Stop loss price
+
+    Returns:
+        dict: Request parameters for ``private_post_order_oco``
+    """
+    exit_side = 'sell' if side == 'buy' else 'buy'
+    return build_oco_request(exchange, symbol, exit_side, quantity, tp_price, sl_price)
+
+def build_oco_protection(response, started_at):
+    """Shape the protection result of a placed OCO order
+
+    Args:
+        response (dict): Raw OCO response
+        started_at (float): Unix time the request was sent
+
+    Returns:
+        dict: 'mode', 'order_list_id' and per-leg 'take_profit' and 'stop_loss' results
+    """
+    tp_order_id, sl_order_id = parse_oco_response(response)
+    latency_ms = (time.time() - started_at) * 1000
+
+    return {
+        'mode': 'oco',
+        'order_list_id': response.get('orderListId'),
+        'take_profit': {'order_id': tp_order_id, 'latency_ms': latency_ms, 'error': None},
+        'stop_loss': {'order_id': sl_order_id, 'latency_ms': latency_ms, 'error': None}
+    }
+
+def build_leg_result(started_at, order=None, error=None):
+    """Shape the result of one protective order
+
+    Args:
+        started_at (float): Unix time the order was sent
+        order (dict, optional): Placed order
+        error (Exception, optional): Error placing the order
+
+    Returns:
+        dict: 'order_id', 'latency_ms' and 'error' (None on success)
+    """
+    return {
+        'order_id': order['id'] if order else None,
+        'latency_ms': (time.time() - started_at) * 1000,
+        'error': str(error) if error is not None else None
+    }
+
+def build_trade_latency(price_source, started_at, price_time, order_time, signal_time=None):
+    """Build the latency record of a trade
+
+    Args:
+        price_source (str): 'cache' or 'rest'
+        started_at (float): Unix time the trade started
+        price_time (float): Unix time the price was known
+        order_time (float): Unix time the entry order was placed
+        signal_time (float, optional): Unix time the signal was generated
+
+    Returns:
+        dict: Price source, price lookup and signal-to-order latencies in milliseconds
+    """
+    return {
+        'price_source': price_source,
+        'price_ms': (price_time - started_at) * 1000,
+        'signal_to_order_ms': (order_time - (signal_time or started_at)) * 1000
+    }
+
+def build_trade_result(order, side, amount, quantity, price, protection, latency):
+    """Shape the result of an executed trade
+
+    Args:
+        order (dict): Entry order
+        side (str): Trade side ('buy' or 'sell')
+        amount (float): Amount traded
+        quantity (float): Quantity traded
+        price (float): Entry price
+        protection (dict): Result of placing the protective orders
+        latency (dict): Latency record of the trade
+
+    Returns:
+        dict: Trade result
+    """
+    return {
+        'order_id': order['id'],
+        'side': side,
+        'amount': amount,
+        'quantity': quantity,
+        'price': price,
+        'fee': amount * 0.001,  # Assuming 0.1% fee
+        'take_profit_order_id': protection['take_profit']['order_id'],
+        'stop_loss_order_id': protection['stop_loss']['order_id'],
+        'protection': protection,
+        'latency': latency
+    }
+
+def summarize_balance(balance):
+    """Keep the non-zero currencies of an exchange balance
+
+    Args:
+        balance (dict): Balance returned by ``fetch_balance``
+
+    Returns:
+        dict: 'total', 'free' and 'used' amounts per currency
+    """
+    result = {
+        'total': {},
+        'free': {},
+        'used': {}
+    }
+
+    for currency, data in balance['total'].items():
+        if data > 0:
+            result['total'][currency] = data
+            result['free'][currency] = balance['free'].get(currency, 0)
+            result['used'][currency] = balance['used'].get(currency, 0)
+
+    return result
+
+def build_trade_record(bot_config, side, trade_result):
+    """Build the trade document stored for an executed trade
+
+    Args:
+        bot_config (dict): Bot configuration
+        side (str): Trade side ('buy' or 'sell')
+        trade_result (dict): Trade result of the engine's _execute_trade
+
+    Returns:
+        dict: Trade document
+    """
+    return {
+        'user_id': bot_config['user_id'],
+        'bot_id': bot_config['id'],
+        'symbol': bot_config['symbol'],
+        'type': side,
+        'amount': trade_result['amount'],
+        'price': trade_result['price'],
+        'quantity': trade_result['quantity'],
+        'fee': trade_result['fee'],
+        'timestamp': datetime.utcnow(),
+        'status': 'completed',
+        'order_id': trade_result['order_id'],
+        'take_profit_order_id': trade_result.get('take_profit_order_id'),
+        'stop_loss_order_id': trade_result.get('stop_loss_order_id')
+    }
+
+def rebuild_risk_ledger(risk_ledger):
+    """Rebuild a risk ledger from today's trades (needs database access)
+
+    Args:
+        risk_ledger (RiskLedger): Ledger to rebuild
+
+    Returns:
+        int: Number of users with trades today, or None if the rebuild failed
+    """
+    try:
+        return risk_ledger.rebuild()
+    except Exception as e:
+        print(f"Error rebuilding risk ledger: {str(e)}")
+        return None
+
+def load_protected_positions(positions, lookback_days=7):
+    """Load the positions of recent trades with protective orders into a position book
+
+    Needs database access. Trades whose protective orders are no longer open
+    on the exchange stay in the book until the next reconciliation; a shared
+    book also closes the shared positions no loaded trade backs.
+
+    Args:
+        positions (PositionBook): Position book to fill
+        lookback_days (int): Days of trades searched for open positions
+
+    Returns:
+        list: Loaded trades, or None if they could not be read
+    """
+    try:
+        trades = Trade.get_protected_trades(datetime.utcnow() - timedelta(days=lookback_days))
+    except Exception as e:
+        print(f"Error loading open positions: {str(e)}")
+        return None
+
+    positions.restore(trades)
+
+    return trades
+
+def get_latency_stats(trade_latencies, prices):
+    """Summarize the signal-to-order latencies of recent trades
+
+    Args:
+        trade_latencies (iterable): Per-trade latency records of the engine
+        prices (PriceCache): Price cache of the engine
+
+    Returns:
+        dict: Latency summaries in milliseconds, overall and per price source,
+            plus the time from entry order to protective orders and the
+            price and user cache statistics
+    """
+    latencies = list(trade_latencies)
+    stats = {
+        'all': summarize_latencies(l['signal_to_order_ms'] / 1000 for l in latencies),
+        'protection': summarize_latencies(l['protection_ms'] / 1000 for l in latencies if 'protection_ms' in l),
+        'price_cache': prices.get_stats(),
+        'user_cache': User.get_cache().get_stats()
+    }
+
+    for source in ('cache', 'rest'):
+        stats[source] = summarize_latencies(
+            l['signal_to_order_ms'] / 1000 for l in latencies if l['price_source'] == source
+        )
+
+    return stats
+
+def get_request_budget_stats(request_budget, bot_count):
+    """Get request weight budget statistics
+
+    Args:
+        request_budget (RequestBudget): Budget shared by the engine's bots
+        bot_count (int): Number of running bots
+
+    Returns:
+        dict: Budget usage plus the weight used per running bot in the last minute
+    """
+    stats = request_budget.get_stats()
+    stats['bots'] = bot_count
+    stats['weight_per_bot'] = stats['weight_last_minute'] / bot_count if bot_count else 0
+
+    return stats
+
+def calculate_performance(user_id, period='30d'):
+    """Calculate trading performance for a user from the stored trades
+
+    '1d' aggregates the raw trades. Longer periods read the daily rollups
+    for whole days and the raw trades only for the part of the first day
+    inside the period.
+
+    Args:
+        user_id (str): User ID
+        period (str): Time period ('1d', '7d', '30d', 'all')
+
+    Returns:
+        dict: Performance metrics
+    """
+    # Calculate start date based on period
+    end_date = datetime.utcnow()
+
+    if period == '1d':
+        start_date = end_date - timedelta(days=1)
+    elif period == '7d':
+        start_date = end_date - timedelta(days=7)
+    elif period == '30d':
+        start_date = end_date - timedelta(days=30)
+    else:  # 'all'
+        start_date = None
+
+    # Aggregate the trades within period on the server
+    if period == '1d':
+        stats = Trade.get_performance_stats(user_id, start_date, end_date)
+    elif start_date:
+        first_full_day = TradeRollup.get_day(start_date) + timedelta(days=1)
+        stats = merge_performance_stats(
+            Trade.get_performance_stats(user_id, start_date, first_full_day - timedelta(milliseconds=1)),
+            TradeRollup.get_performance_stats(user_id, first_full_day)
+        )
+    else:
+        stats = TradeRollup.get_performance_stats(user_id)
+
+    # Calculate metrics
+    total_trades = stats['total_trades']
+    profitable_trades = stats['profitable_trades']
+    losing_trades = stats['losing_trades']
+    win_rate = profitable_trades / total_trades if total_trades > 0 else 0
+
+    total_profit_loss = stats['total_profit_loss']
+    average_profit_loss = total_profit_loss / total_trades if total_trades > 0 else 0
+    largest_profit = stats['largest_profit']
+    largest_loss = stats['largest_loss']
+
+    return {
+        'total_trades': total_trades,
+        'profitable_trades': profitable_trades,
+        'losing_trades': losing_trades,
+        'win_rate': win_rate,
+        'total_profit_loss': total_profit_loss,
+        'average_profit_loss': average_profit_loss,
+        'largest_profit': largest_profit,
+        'largest_loss': largest_loss
+    }
+
+def merge_performance_stats(first, second):
+    """Combine the performance statistics of two disjoint sets of trades
+
+    Args:
+        first (dict): Statistics from get_performance_stats
+        second (dict): Statistics from get_performance_stats
+
+    Returns:
+        dict: Statistics of both sets together
+    """
+    merged = {key: first[key] + second[key] for key in ('total_trades', 'profitable_trades', 'losing_trades', 'total_profit_loss')}
+
+    # Extremes of a set without trades are placeholders
+    sets = [stats for stats in (first, second) if stats['total_trades']]
+    merged['largest_profit'] = max((stats['largest_profit'] for stats in sets), default=0)
+    merged['largest_loss'] = min((stats['largest_loss'] for stats in sets), default=0)
+
+    return merged
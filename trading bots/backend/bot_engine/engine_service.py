@@ -0,0 +1,211 @@
+import json
+import os
+import socketserver
+from threading import Thread
+
+from bot_engine.trading_engine import TradingEngine
+from bot_engine.async_trading_engine import AsyncTradingEngine
+from bot_engine.sharded_engine import ShardedTradingEngine
+from bot_engine.lease_manager import BotLeaseManager
+
+# Engine methods callable over the command socket
+ENGINE_COMMANDS = (
+    'get_active_bots', 'start_bot', 'stop_bot', 'stop_all_bots', 'get_account_balance', 'get_available_symbols',
+    'calculate_performance'
+)
+
+def create_trading_engine(config, app=None):
+    """Create the trading engine selected by the TRADING_ENGINE setting
+
+    Args:
+        config (dict): App configuration
+        app (flask.Flask, optional): App whose context bot evaluations run in
+
+    Every engine keeps its bots in the bots collection and, with
+    RESTORE_BOTS enabled, resumes the bots that were running when it last
+    stopped. With ENGINE_LEASES enabled, the threaded engine instead joins the
+    cluster of engine nodes sharing bots through MongoDB leases: the leases
+    hold the bots across restarts, so RESTORE_BOTS must be disabled. Only the
+    threaded engine can be fenced by leases, so the async and sharded
+    engines refuse ENGINE_LEASES. Shards
+    and leased nodes keep open positions in MongoDB, so a user's position
+    limits hold across all of them.
+
+    Returns:
+        object: TradingEngine, AsyncTradingEngine, ShardedTradingEngine or BotLeaseManager
+
+    Raises:
+        ValueError: If ENGINE_LEASES is combined with RESTORE_BOTS or with an engine
+            other than the threaded one
+    """
+    engine_type = config.get('TRADING_ENGINE')
+
+    if config.get('ENGINE_LEASES') and engine_type in ('async', 'sharded'):
+        raise ValueError(f"ENGINE_LEASES requires the threaded engine: the {engine_type} engine cannot be fenced "
+                         "by bot leases, so every node would run every bot")
+
+    if config.get('ENGINE_LEASES') and config.get('RESTORE_BOTS'):
+        raise ValueError("RESTORE_BOTS cannot be combined with ENGINE_LEASES: leased bots are resumed through "
+                         "their leases, without strategy state")
+
+    if engine_type == 'async':
+        engine = AsyncTradingEngine(
+            api_key=config['BINANCE_API_KEY'],
+            api_secret=config['BINANCE_API_SECRET'],
+            app=app,
+            position_reconcile_interval=config.get('POSITION_RECONCILE_INTERVAL'),
+            risk_batch_window=config.get('RISK_BATCH_WINDOW'),
+            persist_bots=True
+        )
+        engine.sync_risk_ledger()
+        engine.restore_positions()
+
+        if config.get('RESTORE_BOTS'):
+            engine.restore_bots()
+
+        return engine
+
+    if engine_type == 'sharded':
+        engine = ShardedTradingEngine(
+            api_key=config['BINANCE_API_KEY'],
+            api_secret=config['BINANCE_API_SECRET'],
+            workers=config.get('TRADING_ENGINE_WORKERS') or None,
+            mongo_uri=config['MONGO_URI'],
+            engine_options={
+                'stream_url': config.get('BINANCE_STREAM_URL'),
+                'stream_connection_size': config.get('STREAM_CONNECTION_SIZE', 200),
+                'risk_ledger_sync_interval': config.get('RISK_LEDGER_SYNC_INTERVAL'),
+                'position_reconcile_interval': config.get('POSITION_RECONCILE_INTERVAL')
+            },
+            persist_bots=True
+        )
+
+        if config.get('RESTORE_BOTS'):
+            engine.restore_bots()
+
+        return engine
+
+    engine = TradingEngine(
+        api_key=config['BINANCE_API_KEY'],
+        api_secret=config['BINANCE_API_SECRET'],
+        stream_url=config.get('BINANCE_STREAM_URL'),
+        stream_connection_size=config.get('STREAM_CONNECTION_SIZE', 200),
+        app=app,
+        persist_bots=not config.get('ENGINE_LEASES'),
+        risk_ledger_sync_interval=config.get('RISK_LEDGER_SYNC_INTERVAL'),
+        position_reconcile_interval=config.get('POSITION_RECONCILE_INTERVAL'),
+        shared_positions=bool(config.get('ENGINE_LEASES'))
+    )
+
+    # Risk checks start from today's trades and the open positions
+    engine.sync_risk_ledger()
+    engine.restore_positions()
+
+    if config.get('ENGINE_LEASES'):
+        lease_manager = BotLeaseManager(engine, node_id=config.get('ENGINE_NODE_ID'))
+        lease_manager.start()
+        return lease_manager
+
+    if config.get('RESTORE_BOTS'):
+        engine.restore_bots()
+
+    return engine
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    """Handles newline-delimited JSON commands on one client connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+
+            response = self.server.engine_server.handle_command(line)
+            self.wfile.write(json.dumps(response, default=str).encode() + b'\n')
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # Many web workers may connect at once
+
+
+class EngineServer:
+    """Serves one trading engine to many web workers over a Unix socket
+
+    Every line sent by a client is a JSON command
+    ``{"method": ..., "params": {...}}`` and is answered with one JSON line,
+    ``{"ok": true, "result": ...}`` or ``{"ok": false, "error": ...}``.
+    Only the methods in ``ENGINE_COMMANDS`` can be called. Each connection is
+    served by its own thread, so a slow command does not block other clients.
+    """
+
+    def __init__(self, engine, socket_path, app=None):
+        """Initialize the engine server
+
+        Args:
+            engine (object): Trading engine
+            socket_path (str): Path of the Unix socket
+            app (flask.Flask, optional): App whose context commands run in
+        """
+        self.engine = engine
+        self.socket_path = socket_path
+        self.app = app
+        self.command_count = 0
+        self._server = None
+        self._thread = None
+
+    def handle_command(self, line):
+        """Execute one command line
+
+        Args:
+            line (bytes): JSON command
+
+        Returns:
+            dict: Response
+        """
+        self.command_count += 1
+
+        try:
+            command = json.loads(line)
+            method = command.get('method')
+            if method not in ENGINE_COMMANDS:
+                raise Exception(f"Unknown engine command '{method}'")
+
+            if self.app:
+                with self.app.app_context():
+                    result = getattr(self.engine, method)(**command.get('params', {}))
+            else:
+                result = getattr(self.engine, method)(**command.get('params', {}))
+
+            return {'ok': True, 'result': result}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    def start(self):
+        """Listen on the socket and serve clients in a background thread"""
+        # Remove a socket left behind by a previous run
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        # Create the socket with owner and group access only, so no other
+        # user can connect between bind() and a later chmod()
+        previous_umask = os.umask(0o117)
+        try:
+            self._server = _UnixServer(self.socket_path, _CommandHandler)
+        finally:
+            os.umask(previous_umask)
+        self._server.engine_server = self
+
+        self._thread = Thread(target=self._server.serve_forever, name='engine-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and remove the socket"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
@@ -0,0 +1,240 @@
+import math
+from collections import deque
+
+class EMA:
+    """Streaming Exponential Moving Average
+
+    Matches pandas ``Series.ewm(span=period, adjust=False).mean()``.
+    """
+
+    def __init__(self, period):
+        """Initialize the EMA
+
+        Args:
+            period (int): EMA period (span)
+        """
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value = None
+        self._previous = None  # EMA value at the close of the previous bar
+
+    def update(self, value, new_bar=True):
+        """Update the EMA with a price
+
+        Args:
+            value (float): Latest price
+            new_bar (bool): True for a new bar, False to revise the current bar
+
+        Returns:
+            float: EMA value
+        """
+        if new_bar:
+            self._previous = self.value
+
+        if self._previous is None:
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self._previous + self.alpha * value
+
+        return self.value
+
+    def get_state(self):
+        """Get the EMA state
+
+        Returns:
+            dict: Current value and value at the close of the previous bar
+        """
+        return {'value': self.value, 'previous': self._previous}
+
+    def set_state(self, state):
+        """Restore the EMA state
+
+        Args:
+            state (dict): State from get_state()
+        """
+        self.value = state['value']
+        self._previous = state['previous']
+
+
+class RSI:
+    """Streaming Relative Strength Index
+
+    With ``smoothing='sma'`` the average gain and loss are simple moving
+    averages, matching ``RSIStrategy._calculate_rsi``. With
+    ``smoothing='wilder'`` they use Wilder's recursive smoothing.
+    """
+
+    def __init__(self, period=14, smoothing='sma'):
+        """Initialize the RSI
+
+        Args:
+            period (int): RSI period
+            smoothing (str): Averaging method ('sma' or 'wilder')
+        """
+        if smoothing not in ('sma', 'wilder'):
+            raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+
+        self.period = period
+        self.smoothing = smoothing
+        self.value = float('nan')
+        self.count = 0
+        self._previous_close = None  # Close of the previous bar
+        self._last_close = None  # Close of the current bar
+        self._gains = deque(maxlen=period)
+        self._losses = deque(maxlen=period)
+        self._current_average = None  # (avg gain, avg loss) of the current bar
+        self._previous_average = None  # (avg gain, avg loss) of the previous bar
+
+    def update(self, close, new_bar=True):
+        """Update the RSI with a closing price
+
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+
+        Returns:
+            float: RSI value (NaN during warmup)
+        """
+        if new_bar or self.count == 0:
+            self._previous_close = self._last_close
+            self._previous_average = self._current_average
+            self.count += 1
+        else:
+            # Drop the current bar's contribution before re-adding it
+            self._gains.pop()
+            self._losses.pop()
+
+        self._last_close = close
+
+        # The first bar has no change and counts as a zero gain and loss
+        delta = close - self._previous_close if self._previous_close is not None else 0.0
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        self._gains.append(gain)
+        self._losses.append(loss)
+
+        if self.count < self.period:
+            self._current_average = None
+            self.value = float('nan')
+            return self.value
+
+        if self.smoothing == 'sma' or self._previous_average is None:
+            # Simple average (also seeds Wilder smoothing)
+            avg_gain = math.fsum(self._gains) / self.period
+            avg_loss = math.fsum(self._losses) / self.period
+        else:
+            previous_gain, previous_loss = self._previous_average
+            avg_gain = (previous_gain * (self.period - 1) + gain) / self.period
+            avg_loss = (previous_loss * (self.period - 1) + loss) / self.period
+
+        self._current_average = (avg_gain, avg_loss)
+        self.value = self._to_rsi(avg_gain, avg_loss)
+        return self.value
+
+    def get_state(self):
+        """Get the RSI state
+
+        Returns:
+            dict: Bar count, closes and the gains, losses and averages of the window
+        """
+        return {
+            'value': self.value,
+            'count': self.count,
+            'previous_close': self._previous_close,
+            'last_close': self._last_close,
+            'gains': list(self._gains),
+            'losses': list(self._losses),
+            'current_average': self._current_average,
+            'previous_average': self._previous_average
+        }
+
+    def set_state(self, state):
+        """Restore the RSI state
+
+        Args:
+            state (dict): State from get_state()
+        """
+        self.value = state['value']
+        self.count = state['count']
+        self._previous_close = state['previous_close']
+        self._last_close = state['last_close']
+        self._gains = deque(state['gains'], maxlen=self.period)
+        self._losses = deque(state['losses'], maxlen=self.period)
+        self._current_average = tuple(state['current_average']) if state['current_average'] else None
+        self._previous_average = tuple(state['previous_average']) if state['previous_average'] else None
+
+    @staticmethod
+    def _to_rsi(avg_gain, avg_loss):
+        """Convert average gain and loss to an RSI value
+
+        Args:
+            avg_gain (float): Average gain
+            avg_loss (float): Average loss
+
+        Returns:
+            float: RSI value
+        """
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else float('nan')
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class MACD:
+    """Streaming Moving Average Convergence Divergence
+
+    Matches ``MACDStrategy._calculate_macd``.
+    """
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        """Initialize the MACD
+
+        Args:
+            fast_period (int): Fast EMA period
+            slow_period (int): Slow EMA period
+            signal_period (int): Signal line period
+        """
+        self.fast = EMA(fast_period)
+        self.slow = EMA(slow_period)
+        self.signal = EMA(signal_period)
+        self.value = None
+
+    def update(self, close, new_bar=True):
+        """Update the MACD with a closing price
+
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+
+        Returns:
+            tuple: (MACD line, signal line, histogram)
+        """
+        macd_line = self.fast.update(close, new_bar) - self.slow.update(close, new_bar)
+        signal_line = self.signal.update(macd_line, new_bar)
+
+        self.value = (macd_line, signal_line, macd_line - signal_line)
+        return self.value
+
+    def get_state(self):
+        """Get the MACD state
+
+        Returns:
+            dict: State of the fast, slow and signal EMAs
+        """
+        return {
+            'fast': self.fast.get_state(),
+            'slow': self.slow.get_state(),
+            'signal': self.signal.get_state(),
+            'value': self.value
+        }
+
+    def set_state(self, state):
+        """Restore the MACD state
+
+        Args:
+            state (dict): State from get_state()
+        """
+        self.fast.set_state(state['fast'])
+        self.slow.set_state(state['slow'])
+        self.signal.set_state(state['signal'])
+        self.value = tuple(state['value']) if state['value'] else None
@@ -0,0 +1,324 @@
+import math
+import socket
+import time
+import uuid
+from threading import RLock
+
+# Import models
+from models.bot_lease import BotLease
+
+class BotLeaseManager:
+    """Shares bots between several engine nodes through leases in MongoDB
+
+    Every bot has a lease document (see ``BotLease``) owned by one node. Each
+    node renews its leases every ``renew_interval`` seconds and runs exactly
+    the bots it holds. Leases of a node that stops renewing expire after
+    ``lease_ttl`` seconds and are claimed by the others. On every renewal a
+    node also rebalances: it releases bots beyond its fair share of
+    ``ceil(bots / live nodes)`` and claims free ones up to it, so bots spread
+    out when nodes join and leave.
+
+    A bot never trades from two nodes: a node stops a bot as soon as a
+    renewal shows it lost the lease, stops a bot before releasing it, and
+    right before trading checks both its local lease expiry (less
+    ``clock_margin``) and that the lease in MongoDB still carries the fencing
+    token it was given. A node that was paused past its lease finds its token
+    superseded and does not trade.
+
+    The public methods mirror ``TradingEngine`` so the API routes and the
+    engine service can use a leased engine like any other.
+    """
+
+    def __init__(self, engine, node_id=None, lease_ttl=30, renew_interval=10, clock_margin=2):
+        """Initialize the lease manager
+
+        Args:
+            engine (TradingEngine): Engine running this node's bots
+            node_id (str, optional): Unique node ID (generated from host and process if omitted)
+            lease_ttl (float): Seconds a lease lasts without renewal
+            renew_interval (float): Seconds between renewals and rebalancing
+            clock_margin (float): Seconds before local lease expiry at which a node stops trading
+        """
+        self.engine = engine
+        self.node_id = node_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval
+        self.clock_margin = clock_margin
+        self.leases = {}  # Dict of leases held by this node: {bot_id: {'token', 'expires_at'}}
+        self.claimed_count = 0
+        self.released_count = 0
+        self.lost_count = 0
+        self._lock = RLock()
+
+        engine.trade_guard = self.check_lease
+
+    def _in_app_context(self, func, *args):
+        """Call a function inside the engine's app context, if it has an app
+
+        Args:
+            func (callable): Function
+            *args: Function arguments
+
+        Returns:
+            object: Function result
+        """
+        if not self.engine.app:
+            return func(*args)
+
+        with self.engine.app.app_context():
+            return func(*args)
+
+    def start(self):
+        """Join the cluster and start renewing and rebalancing leases"""
+        self._in_app_context(self.sync)
+        self.engine.scheduler.schedule(
+            'bot_leases', lambda: self._in_app_context(self.sync), self.renew_interval, delay=self.renew_interval
+        )
+
+    def close(self):
+        """Stop all local bots, release their leases, leave the cluster and close the engine"""
+        self.engine.scheduler.cancel('bot_leases')
+
+        def leave():
+            with self._lock:
+                for bot_id in list(self.leases):
+                    self._release(bot_id)
+            BotLease.remove_node(self.node_id)
+
+        self._in_app_context(leave)
+        self.engine.close()
+
+    def sync(self):
+        """Renew held leases, drop lost ones and rebalance (runs every renew_interval)"""
+        with self._lock:
+            BotLease.heartbeat(self.node_id)
+
+            # Renew and stop every bot whose lease was lost or re-issued
+            renewed_at = time.time()
+            owned = BotLease.renew(self.node_id, list(self.leases), self.lease_ttl)
+
+            for bot_id, lease in list(self.leases.items()):
+                if owned.get(bot_id) != lease['token']:
+                    print(f"Lease of bot {bot_id} lost by node {self.node_id}")
+                    self._stop_local(bot_id)
+                    self.lost_count += 1
+                else:
+                    lease['expires_at'] = renewed_at + self.lease_ttl
+
+            # Rebalance towards an equal share per live node
+            nodes = max(BotLease.count_live_nodes(self.lease_ttl), 1)
+            share = math.ceil(BotLease.count() / nodes)
+
+            for bot_id in list(self.leases)[share:]:
+                self._release(bot_id)
+
+            while len(self.leases) < share:
+                lease = BotLease.claim(self.node_id, self.lease_ttl, exclude=list(self.leases))
+                if not lease:
+                    break
+                self._start_local(lease, time.time())
+
+    def _start_local(self, lease, acquired_at):
+        """Run a bot whose lease this node acquired
+
+        Args:
+            lease (dict): Lease document
+            acquired_at (float): Unix time the lease was acquired
+        """
+        config = lease['config']
+
+        try:
+            self.engine.start_bot(
+                user_id=config['user_id'],
+                symbol=config['symbol'],
+                strategy=config['strategy'],
+                interval=config['interval'],
+                amount=config['amount'],
+                take_profit=config['take_profit'],
+                stop_loss=config['stop_loss'],
+                bot_id=lease['_id'],
+                notify=False
+            )
+        except Exception as e:
+            print(f"Error starting leased bot {lease['_id']}: {str(e)}")
+            BotLease.release(lease['_id'], self.node_id, lease['token'])
+            return
+
+        self.leases[lease['_id']] = {'token': lease['token'], 'expires_at': acquired_at + self.lease_ttl}
+        self.claimed_count += 1
+
+    def _stop_local(self, bot_id):
+        """Stop a local bot without touching its lease
+
+        Args:
+            bot_id (str): Bot ID
+        """
+        self.leases.pop(bot_id, None)
+        bot_data = self.engine.active_bots.get(bot_id)
+        if bot_data:
+            self.engine.stop_bot(bot_data['config']['user_id'], bot_id, notify=False)
+
+    def _release(self, bot_id):
+        """Stop a local bot, then release its lease to other nodes
+
+        Args:
+            bot_id (str): Bot ID
+        """
+        lease = self.leases.get(bot_id)
+        self._stop_local(bot_id)
+
+        if lease:
+            BotLease.release(bot_id, self.node_id, lease['token'])
+            self.released_count += 1
+
+    def check_lease(self, bot_id):
+        """Check that this node may trade for a bot (the engine's trade guard)
+
+        Args:
+            bot_id (str): Bot ID
+
+        Returns:
+            bool: True if the lease is held locally and fenced in MongoDB
+        """
+        lease = self.leases.get(bot_id)
+        if not lease or time.time() > lease['expires_at'] - self.clock_margin:
+            return False
+
+        if not BotLease.validate(bot_id, self.node_id, lease['token']):
+            print(f"Fencing token of bot {bot_id} superseded; not trading from node {self.node_id}")
+            return False
+
+        return True
+
+    def get_active_bots(self, user_id):
+        """Get active bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of active bot IDs
+        """
+        return self.engine.get_active_bots(user_id)
+
+    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss):
+        """Start a new trading bot owned by this node until rebalancing moves it
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol (e.g., 'BTCUSDT')
+            strategy (str): Strategy ID
+            interval (str): Candlestick interval (e.g., '1h', '4h', '1d')
+            amount (float): Amount to trade
+            take_profit (float): Take profit percentage
+            stop_loss (float): Stop loss percentage
+
+        Returns:
+            str: Bot ID
+        """
+        bot_id = str(uuid.uuid4())
+
+        with self._lock:
+            acquired_at = time.time()
+            lease = BotLease.create({
+                'id': bot_id,
+                'user_id': user_id,
+                'symbol': symbol,
+                'strategy': strategy,
+                'interval': interval,
+                'amount': amount,
+                'take_profit': take_profit,
+                'stop_loss': stop_loss
+            }, self.node_id, self.lease_ttl)
+
+            try:
+                self.engine.start_bot(user_id, symbol, strategy, interval, amount, take_profit, stop_loss, bot_id=bot_id)
+            except Exception:
+                BotLease.delete(bot_id, user_id)
+                raise
+
+            self.leases[bot_id] = {'token': lease['token'], 'expires_at': acquired_at + self.lease_ttl}
+
+        return bot_id
+
+    def stop_bot(self, user_id, bot_id):
+        """Stop a trading bot on whichever node runs it
+
+        The lease is deleted; the owning node stops the bot at its next
+        renewal, or right away if it is this node.
+
+        Args:
+            user_id (str): User ID
+            bot_id (str): Bot ID
+
+        Returns:
+            bool: True if bot was stopped, False otherwise
+        """
+        lease = BotLease.delete(bot_id, user_id)
+        if not lease:
+            return False
+
+        with self._lock:
+            self._stop_local(bot_id)
+
+        self.engine.notification_manager.send_notification(
+            user_id,
+            f"Trading bot stopped for {lease['config']['symbol']}"
+        )
+        return True
+
+    def stop_all_bots(self, user_id):
+        """Stop all trading bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of stopped bot IDs
+        """
+        return [lease['_id'] for lease in BotLease.find_by_user(user_id) if self.stop_bot(user_id, lease['_id'])]
+
+    def get_account_balance(self, user_id):
+        """Get account balance for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: Account balance
+        """
+        return self.engine.get_account_balance(user_id)
+
+    def get_available_symbols(self):
+        """Get available trading symbols
+
+        Returns:
+            list: List of available symbols
+        """
+        return self.engine.get_available_symbols()
+
+    def calculate_performance(self, user_id, period='30d'):
+        """Calculate trading performance for a user
+
+        Args:
+            user_id (str): User ID
+            period (str): Time period ('1d', '7d', '30d', 'all')
+
+        Returns:
+            dict: Performance metrics
+        """
+        return self.engine.calculate_performance(user_id, period)
+
+    def get_stats(self):
+        """Get lease statistics of this node
+
+        Returns:
+            dict: Node ID, held leases and claim, release and loss counts
+        """
+        return {
+            'node_id': self.node_id,
+            'leases': len(self.leases),
+            'claimed': self.claimed_count,
+            'released': self.released_count,
+            'lost': self.lost_count
+        }
@@ -0,0 +1,378 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from bot_engine.candle_buffer import CandleBuffer
+from bot_engine.price_cache import PriceCache
+from bot_engine.rate_limiter import RequestBudgetExceeded
+from bot_engine.timeframes import last_candle_close
+from bot_engine.volatility import VolatilityCache
+
+class MarketDataHub:
+    """Shares OHLCV market data between all bots trading the same market
+
+    Every (symbol, interval) pair has a single subscription. The first bot that
+    asks for data after the cached frame expires, or after a candle has closed
+    since the last fetch, triggers one exchange fetch; every other subscribed
+    bot receives the same candle frame.
+    """
+
+    def __init__(self, exchange=None, refresh_interval=60, history_size=500, prices=None):
+        """Initialize the market data hub
+
+        Args:
+            exchange (ccxt.Exchange, optional): Exchange used to fetch OHLCV data
+            refresh_interval (int): Seconds a fetched frame is shared before refetching
+            history_size (int): Number of candles kept per market
+            prices (PriceCache, optional): Cache fed with the latest candle closes and quotes
+        """
+        self.exchange = exchange
+        self.refresh_interval = refresh_interval
+        self.history_size = history_size
+        self.time_offset = 0.0  # Exchange clock minus local clock, in seconds
+        self.subscriptions = {}  # Dict of subscriptions: {(symbol, interval): subscription}
+        self.prices = prices or PriceCache()
+        self.volatility = VolatilityCache()
+        self._lock = Lock()
+
+    def _get_subscription(self, symbol, interval, create=False):
+        """Get the subscription for a market
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            create (bool): Create the subscription if it does not exist
+
+        Returns:
+            dict: Subscription or None if not found
+        """
+        key = (symbol, interval)
+
+        with self._lock:
+            subscription = self.subscriptions.get(key)
+
+            if subscription is None and create:
+                subscription = {
+                    'symbol': symbol,
+                    'interval': interval,
+                    'subscribers': set(),
+                    'buffer': CandleBuffer(symbol, interval, self.history_size),
+                    'data': None,
+                    'fetched_at': 0,
+                    'fetch_count': 0,
+                    'candles_fetched': 0,
+                    'candles_streamed': 0,
+                    'streamed_at': 0,
+                    'request_count': 0,
+                    'lock': Lock()
+                }
+                self.subscriptions[key] = subscription
+
+            return subscription
+
+    def subscribe(self, bot_id, symbol, interval):
+        """Subscribe a bot to a market
+
+        Args:
+            bot_id (str): Bot ID
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+        """
+        subscription = self._get_subscription(symbol, interval, create=True)
+
+        with self._lock:
+            subscription['subscribers'].add(bot_id)
+
+    def unsubscribe(self, bot_id, symbol, interval):
+        """Unsubscribe a bot from a market
+
+        The subscription is dropped once its last subscriber leaves.
+
+        Args:
+            bot_id (str): Bot ID
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+        """
+        key = (symbol, interval)
+
+        with self._lock:
+            subscription = self.subscriptions.get(key)
+            if not subscription:
+                return
+
+            subscription['subscribers'].discard(bot_id)
+
+            if not subscription['subscribers']:
+                del self.subscriptions[key]
+                self.volatility.discard(symbol, interval)
+
+    def get_ohlcv(self, symbol, interval):
+        """Get the shared OHLCV frame for a market
+
+        Only one caller fetches from the exchange when the frame has expired;
+        concurrent callers wait for that fetch and reuse its result.
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+
+        Returns:
+            pandas.DataFrame: OHLCV data
+        """
+        subscription = self._get_subscription(symbol, interval, create=True)
+
+        with subscription['lock']:
+            self._refresh_if_expired(subscription)
+
+            if subscription['data'] is None:
+                subscription['data'] = subscription['buffer'].to_dataframe()
+
+            return subscription['data']
+
+    def get_buffer(self, symbol, interval):
+        """Get the candle buffer for a market, refreshing it if expired
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+
+        Returns:
+            CandleBuffer: Candle buffer
+        """
+        subscription = self._get_subscription(symbol, interval, create=True)
+
+        with subscription['lock']:
+            self._refresh_if_expired(subscription)
+
+            return subscription['buffer']
+
+    def get_candles(self, symbol, interval, since=None):
+        """Get a copy of the buffered candles from a timestamp onwards
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            since (int, optional): Open timestamp in milliseconds of the first candle
+
+        Returns:
+            numpy.ndarray: Candles as rows of [timestamp, open, high, low, close, volume]
+        """
+        subscription = self._get_subscription(symbol, interval, create=True)
+
+        with subscription['lock']:
+            self._refresh_if_expired(subscription)
+            return subscription['buffer'].get_since(since)
+
+    def get_volatility(self, symbol, interval, period=14):
+        """Get the volatility estimate of a market from its buffered candles
+
+        Never refreshes the market: the estimate covers the closed candles
+        already buffered and is recomputed once per bar for all bots.
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            period (int): Number of bars averaged
+
+        Returns:
+            dict: Volatility estimate (see estimate_volatility), or None if the market is not buffered
+        """
+        subscription = self._get_subscription(symbol, interval)
+        if subscription is None:
+            return None
+
+        return self.volatility.get(subscription['buffer'], time.time() + self.time_offset, period, subscription['lock'])
+
+    def refresh(self, symbol, interval):
+        """Force a refetch of a market's OHLCV frame
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+
+        Returns:
+            pandas.DataFrame: OHLCV data
+        """
+        subscription = self._get_subscription(symbol, interval, create=True)
+
+        with subscription['lock']:
+            self._fetch(subscription)
+            subscription['data'] = subscription['buffer'].to_dataframe()
+            return subscription['data']
+
+    def prewarm(self, markets, max_workers=8):
+        """Load the candle history of many markets at once
+
+        Used when many bots start together (e.g. when an engine restores its
+        bots after a restart): every market is fetched exactly once, several
+        markets in parallel, before any bot evaluates, instead of each market
+        being fetched by whichever bot happens to evaluate first.
+
+        Args:
+            markets (iterable): Markets as (symbol, interval)
+            max_workers (int): Markets fetched in parallel
+
+        Returns:
+            int: Number of markets loaded
+        """
+        subscriptions = [self._get_subscription(symbol, interval, create=True) for symbol, interval in set(markets)]
+
+        def load(subscription):
+            with subscription['lock']:
+                try:
+                    self._fetch(subscription)
+                    return True
+                except Exception as e:
+                    print(f"Error prewarming {subscription['symbol']} {subscription['interval']}: {str(e)}")
+                    return False
+
+        if not subscriptions:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(subscriptions))) as pool:
+            return sum(pool.map(load, subscriptions))
+
+    def _refresh_if_expired(self, subscription):
+        """Count a request and refetch the subscription's data if it expired
+
+        Data expires after refresh_interval seconds, or as soon as a candle of
+        the subscription's interval has closed since the last fetch.
+
+        Must be called with the subscription lock held.
+
+        Args:
+            subscription (dict): Subscription to refresh
+        """
+        subscription['request_count'] += 1
+
+        now = time.time()
+        fetched_at = subscription['fetched_at']
+        last_close = last_candle_close(now + self.time_offset, subscription['interval']) - self.time_offset
+
+        # A live stream that has already delivered the current candle needs no REST call
+        last_timestamp = subscription['buffer'].last_timestamp
+        if now - subscription['streamed_at'] < self.refresh_interval and last_timestamp is not None \
+                and last_timestamp >= (last_close + self.time_offset) * 1000:
+            return
+
+        if not subscription['fetch_count'] or now - fetched_at >= self.refresh_interval or fetched_at < last_close:
+            try:
+                self._fetch(subscription)
+            except RequestBudgetExceeded as e:
+                # Keep serving the buffered candles while the request budget is exhausted
+                if not subscription['fetch_count']:
+                    raise
+                print(f"Skipping refresh of {subscription['symbol']} {subscription['interval']}: {str(e)}")
+
+    def _fetch(self, subscription):
+        """Fetch new OHLCV data from the exchange for a subscription
+
+        Only candles since the newest buffered candle are requested. The shared
+        frame is invalidated when the buffer changed and rebuilt lazily by the
+        next get_ohlcv() call.
+
+        Args:
+            subscription (dict): Subscription to fetch data for
+        """
+        if not self.exchange:
+            raise Exception("Exchange not initialized")
+
+        buffer = subscription['buffer']
+        changed = buffer.update(self.exchange)
+
+        if changed:
+            subscription['data'] = None
+
+        # The in-progress candle's close is the latest traded price
+        if buffer.size:
+            self.prices.update(subscription['symbol'], last=float(buffer.to_array()[-1, 4]))
+
+        subscription['fetched_at'] = time.time()
+        subscription['fetch_count'] += 1
+        subscription['candles_fetched'] += changed
+
+    def apply_candle(self, symbol, interval, candle):
+        """Apply a streamed candle to a subscribed market's buffer
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+            candle (list): Candle as [timestamp, open, high, low, close, volume]
+
+        Returns:
+            bool: True if the buffer changed, False otherwise
+        """
+        subscription = self._get_subscription(symbol, interval)
+        if not subscription:
+            return False
+
+        with subscription['lock']:
+            # Without history the stream cannot fill the buffer; wait for REST
+            if subscription['buffer'].last_timestamp is None:
+                return False
+
+            changed = subscription['buffer'].append(candle)
+            if changed:
+                subscription['data'] = None
+                subscription['candles_streamed'] += 1
+                self.prices.update(symbol, last=candle[4])
+            subscription['streamed_at'] = time.time()
+
+        return changed
+
+    def update_ticker(self, symbol, bid=None, ask=None):
+        """Store the latest best bid/ask for a symbol in the price cache
+
+        Args:
+            symbol (str): Trading symbol
+            bid (float, optional): Best bid price
+            ask (float, optional): Best ask price
+        """
+        self.prices.update(symbol, bid=bid, ask=ask)
+
+    def get_markets(self):
+        """Get the markets with at least one subscriber
+
+        Returns:
+            list: List of (symbol, interval)
+        """
+        with self._lock:
+            return [key for key, subscription in self.subscriptions.items() if subscription['subscribers']]
+
+    def get_stats(self):
+        """Get subscriber and fetch statistics for every market
+
+        Returns:
+            dict: Statistics keyed by 'SYMBOL@interval', plus totals
+        """
+        with self._lock:
+            subscriptions = list(self.subscriptions.values())
+
+        markets = {}
+        total_fetches = 0
+        total_requests = 0
+
+        for subscription in subscriptions:
+            fetch_count = subscription['fetch_count']
+            request_count = subscription['request_count']
+            total_fetches += fetch_count
+            total_requests += request_count
+
+            markets[f"{subscription['symbol']}@{subscription['interval']}"] = {
+                'subscribers': len(subscription['subscribers']),
+                'fetch_count': fetch_count,
+                'request_count': request_count,
+                'candles_fetched': subscription['candles_fetched'],
+                'candles_streamed': subscription['candles_streamed'],
+                'buffered_candles': subscription['buffer'].size,
+                'fan_out_ratio': request_count / fetch_count if fetch_count else 0
+            }
+
+        return {
+            'markets': markets,
+            'total_subscriptions': len(subscriptions),
+            'total_fetches': total_fetches,
+            'total_requests': total_requests,
+            'fan_out_ratio': total_requests / total_fetches if total_fetches else 0,
+            'volatility': self.volatility.get_stats()
+        }
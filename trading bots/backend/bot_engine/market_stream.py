@@ -0,0 +1,363 @@
+import json
+import time
+import itertools
+from threading import Thread, Lock, Event
+
+import websocket
+
+class MarketStream:
+    """Streams klines and best bid/ask from Binance WebSockets into the market-data hub
+
+    A ``<symbol>@kline_<interval>`` stream is opened for every market that
+    active bots use and a ``<symbol>@bookTicker`` stream for every symbol.
+    Streams are spread over combined-stream connections of at most
+    ``max_streams_per_connection`` streams each (Binance accepts 1024 per
+    connection and rejects overlong URLs); a connection is added when all are
+    full and dropped once its last stream is removed. Markets added or removed
+    while connected are (un)subscribed in place. After a disconnect a
+    connection reconnects with backoff, resubscribes its streams and
+    backfills the candles missed while offline through REST.
+
+    ``base_url`` can point at a local stand-in server that replays recorded
+    frames, and ``handle_message`` can be fed raw frames directly.
+    """
+
+    def __init__(self, market_data, base_url='wss://stream.binance.com:9443', reconnect_delay=1, max_reconnect_delay=60,
+                 max_streams_per_connection=200):
+        """Initialize the market stream
+
+        Args:
+            market_data (MarketDataHub): Hub receiving candles and prices
+            base_url (str): WebSocket base URL
+            reconnect_delay (float): Initial seconds to wait before reconnecting
+            max_reconnect_delay (float): Maximum seconds between reconnect attempts
+            max_streams_per_connection (int): Streams carried by one connection (at most 1024)
+        """
+        self.market_data = market_data
+        self.base_url = base_url.rstrip('/')
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_streams_per_connection = min(max_streams_per_connection, 1024)
+        self.markets = set()  # Set of streamed markets: {(symbol, interval)}
+        self.stream_symbols = {}  # Dict of stream symbol to ccxt symbol: {'btcusdt': 'BTC/USDT'}
+        self.connections = []  # Open combined-stream connections, each with its own set of streams
+        self.message_count = 0
+        self.reconnect_count = 0
+        self._running = False
+        self._stop_event = Event()
+        self._lock = Lock()
+        self._request_ids = itertools.count(1)
+        self._connection_ids = itertools.count(1)
+
+    @property
+    def connected(self):
+        """bool: True if every connection is up"""
+        connections = list(self.connections)
+        return bool(connections) and all(connection['connected'] for connection in connections)
+
+    @staticmethod
+    def get_stream_symbol(symbol):
+        """Convert a ccxt symbol to a Binance stream symbol
+
+        Args:
+            symbol (str): Trading symbol (e.g., 'BTC/USDT')
+
+        Returns:
+            str: Stream symbol (e.g., 'btcusdt')
+        """
+        return symbol.replace('/', '').lower()
+
+    def _get_streams(self, markets):
+        """Get stream names for a set of markets
+
+        Args:
+            markets (set): Set of (symbol, interval)
+
+        Returns:
+            set: Stream names
+        """
+        streams = set()
+        for symbol, interval in markets:
+            stream_symbol = self.get_stream_symbol(symbol)
+            streams.add(f"{stream_symbol}@kline_{interval}")
+            streams.add(f"{stream_symbol}@bookTicker")
+        return streams
+
+    def start(self):
+        """Start streaming, one background thread per connection"""
+        with self._lock:
+            if self._running:
+                return
+
+            self._running = True
+            self._stop_event.clear()
+            connections = list(self.connections)
+
+        for connection in connections:
+            self._start_connection(connection)
+
+    def stop(self):
+        """Stop streaming and close every connection"""
+        with self._lock:
+            self._running = False
+            self._stop_event.set()
+            connections = list(self.connections)
+
+        for connection in connections:
+            self._stop_connection(connection)
+
+    def _start_connection(self, connection):
+        """Start a connection's thread
+
+        Args:
+            connection (dict): Connection
+        """
+        connection['stop_event'].clear()
+        connection['thread'] = Thread(
+            target=self._run, args=(connection,), name=f"market-stream-{connection['id']}", daemon=True
+        )
+        connection['thread'].start()
+
+    def _stop_connection(self, connection):
+        """Close a connection and wait for its thread
+
+        Args:
+            connection (dict): Connection
+        """
+        connection['stop_event'].set()
+
+        if connection['ws']:
+            connection['ws'].close()
+        if connection['thread']:
+            connection['thread'].join()
+
+    def set_markets(self, markets):
+        """Set the markets to stream, subscribing and unsubscribing as needed
+
+        New streams go to the first connection with room, or to a new
+        connection when all are full.
+
+        Args:
+            markets (iterable): (symbol, interval) pairs used by active bots
+        """
+        markets = set(markets)
+        subscribe = {}  # Dict of streams to subscribe per connection: {connection id: set}
+        unsubscribe = {}  # Dict of streams to unsubscribe per connection: {connection id: set}
+
+        with self._lock:
+            added = self._get_streams(markets) - self._get_streams(self.markets)
+            removed = self._get_streams(self.markets) - self._get_streams(markets)
+            self.markets = markets
+            self.stream_symbols = {self.get_stream_symbol(symbol): symbol for symbol, _ in markets}
+
+            for connection in self.connections:
+                dropped = connection['streams'] & removed
+                if dropped:
+                    connection['streams'] -= dropped
+                    unsubscribe[connection['id']] = dropped
+
+            opened = []
+            for stream in sorted(added):
+                connection = next(
+                    (c for c in self.connections if len(c['streams']) < self.max_streams_per_connection), None
+                )
+                if connection is None:
+                    connection = self._new_connection()
+                    self.connections.append(connection)
+                    opened.append(connection)
+
+                connection['streams'].add(stream)
+                subscribe.setdefault(connection['id'], set()).add(stream)
+
+            closed = [connection for connection in self.connections if not connection['streams']]
+            self.connections = [connection for connection in self.connections if connection['streams']]
+            running = self._running
+            connections = list(self.connections)
+
+        for connection in closed:
+            self._stop_connection(connection)
+
+        opened = {connection['id'] for connection in opened}
+        for connection in connections:
+            if connection['id'] in opened:
+                # A new connection subscribes to its streams when it connects
+                if running:
+                    self._start_connection(connection)
+                continue
+
+            if not connection['connected']:
+                # The next connection attempt subscribes to every current stream
+                continue
+
+            if connection['id'] in subscribe:
+                self._send(connection, {
+                    'method': 'SUBSCRIBE', 'params': sorted(subscribe[connection['id']]), 'id': next(self._request_ids)
+                })
+            if connection['id'] in unsubscribe:
+                self._send(connection, {
+                    'method': 'UNSUBSCRIBE', 'params': sorted(unsubscribe[connection['id']]), 'id': next(self._request_ids)
+                })
+
+    def _new_connection(self):
+        """Create a connection without streams (call with the lock held)
+
+        Returns:
+            dict: Connection
+        """
+        return {
+            'id': next(self._connection_ids),
+            'streams': set(),
+            'url_streams': set(),  # Streams in the URL of the latest connection attempt
+            'ws': None,
+            'thread': None,
+            'connected': False,
+            'stop_event': Event()
+        }
+
+    def _send(self, connection, message):
+        """Send a JSON control message on an open connection
+
+        Args:
+            connection (dict): Connection
+            message (dict): Message
+        """
+        try:
+            connection['ws'].send(json.dumps(message))
+        except Exception as e:
+            print(f"Error sending stream message: {str(e)}")
+
+    def _run(self, connection):
+        """Connection loop reconnecting with exponential backoff
+
+        Args:
+            connection (dict): Connection
+        """
+        delay = self.reconnect_delay
+        stop_event = connection['stop_event']
+
+        while not stop_event.is_set() and not self._stop_event.is_set():
+            with self._lock:
+                streams = sorted(connection['streams'])
+                connection['url_streams'] = set(streams)
+
+            connection['ws'] = websocket.WebSocketApp(
+                f"{self.base_url}/stream?streams={'/'.join(streams)}",
+                on_open=lambda ws: self._on_open(connection),
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=lambda ws, close_status_code, close_msg: self._on_close(connection)
+            )
+            connected_at = time.time()
+            connection['ws'].run_forever(ping_interval=180, ping_timeout=10)
+            connection['connected'] = False
+
+            if stop_event.is_set() or self._stop_event.is_set():
+                break
+
+            # Reset the backoff after a connection that stayed up for a while
+            if time.time() - connected_at > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+
+            self.reconnect_count += 1
+            stop_event.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_open(self, connection):
+        """Backfill the candles of a connection's markets missed while disconnected
+
+        Args:
+            connection (dict): Connection that came up
+        """
+        connection['connected'] = True
+
+        with self._lock:
+            # Streams added or removed while the connection was being opened
+            added = connection['streams'] - connection['url_streams']
+            removed = connection['url_streams'] - connection['streams']
+            markets = [
+                (symbol, interval) for symbol, interval in self.markets
+                if f"{self.get_stream_symbol(symbol)}@kline_{interval}" in connection['streams']
+            ]
+
+        if added:
+            self._send(connection, {'method': 'SUBSCRIBE', 'params': sorted(added), 'id': next(self._request_ids)})
+        if removed:
+            self._send(connection, {'method': 'UNSUBSCRIBE', 'params': sorted(removed), 'id': next(self._request_ids)})
+
+        for symbol, interval in markets:
+            try:
+                self.market_data.refresh(symbol, interval)
+            except Exception as e:
+                print(f"Error backfilling {symbol} {interval}: {str(e)}")
+
+    def _on_message(self, ws, message):
+        self.handle_message(message)
+
+    def _on_error(self, ws, error):
+        print(f"Market stream error: {str(error)}")
+
+    def _on_close(self, connection):
+        connection['connected'] = False
+
+    def handle_message(self, message):
+        """Route a raw combined-stream frame to the market-data hub
+
+        Args:
+            message (str): Raw JSON frame
+
+        Returns:
+            bool: True if the frame carried market data, False otherwise
+        """
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return False
+
+        stream = payload.get('stream')
+        data = payload.get('data')
+        if not stream or not data:
+            # Subscription acknowledgements and other control frames
+            return False
+
+        self.message_count += 1
+        stream_symbol, _, stream_type = stream.partition('@')
+        symbol = self.stream_symbols.get(stream_symbol)
+        if not symbol:
+            return False
+
+        if stream_type.startswith('kline_'):
+            kline = data['k']
+            candle = [
+                kline['t'],
+                float(kline['o']),
+                float(kline['h']),
+                float(kline['l']),
+                float(kline['c']),
+                float(kline['v'])
+            ]
+            self.market_data.apply_candle(symbol, kline['i'], candle)
+            return True
+
+        if stream_type == 'bookTicker':
+            self.market_data.update_ticker(symbol, bid=float(data['b']), ask=float(data['a']))
+            return True
+
+        return False
+
+    def get_stats(self):
+        """Get stream statistics
+
+        Returns:
+            dict: Connection state, connection and stream counts, message and reconnect counts
+        """
+        with self._lock:
+            stream_count = len(self._get_streams(self.markets))
+            connections = len(self.connections)
+
+        return {
+            'connected': self.connected,
+            'connections': connections,
+            'streams': stream_count,
+            'messages': self.message_count,
+            'reconnects': self.reconnect_count
+        }
@@ -0,0 +1,22 @@
+def summarize_latencies(samples, scale=1000):
+    """Summarize latency samples as mean and percentiles
+
+    Args:
+        samples (iterable): Latency samples in seconds
+        scale (float): Multiplier applied to every value (1000 reports milliseconds)
+
+    Returns:
+        dict: 'count', 'mean', 'p50', 'p99' and 'max'
+    """
+    samples = sorted(samples)
+
+    if not samples:
+        return {'count': 0, 'mean': 0, 'p50': 0, 'p99': 0, 'max': 0}
+
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) * scale,
+        'p50': samples[len(samples) // 2] * scale,
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * scale,
+        'max': samples[-1] * scale
+    }
@@ -0,0 +1,56 @@
+def supports_oco(exchange):
+    """Check whether an exchange client can place native OCO orders
+
+    Args:
+        exchange (ccxt.Exchange): Exchange client
+
+    Returns:
+        bool: True if the Binance spot OCO endpoint is available
+    """
+    return hasattr(exchange, 'private_post_order_oco')
+
+def build_oco_request(exchange, symbol, side, quantity, take_profit_price, stop_loss_price):
+    """Build a Binance OCO request pairing a take-profit limit with a stop-loss
+
+    The limit leg is the take profit and the stop leg triggers a market
+    stop-loss, like the separate orders the engines otherwise place. Markets
+    must already be loaded on the exchange client.
+
+    Args:
+        exchange (ccxt.Exchange): Exchange client
+        symbol (str): Trading symbol
+        side (str): Side of both exit legs ('buy' or 'sell')
+        quantity (float): Quantity of both legs
+        take_profit_price (float): Take profit limit price
+        stop_loss_price (float): Stop loss trigger price
+
+    Returns:
+        dict: Request parameters for ``private_post_order_oco``
+    """
+    return {
+        'symbol': exchange.market_id(symbol),
+        'side': side.upper(),
+        'quantity': exchange.amount_to_precision(symbol, quantity),
+        'price': exchange.price_to_precision(symbol, take_profit_price),
+        'stopPrice': exchange.price_to_precision(symbol, stop_loss_price)
+    }
+
+def parse_oco_response(response):
+    """Get the leg order IDs from a Binance OCO response
+
+    Args:
+        response (dict): Raw OCO response
+
+    Returns:
+        tuple: (take profit order ID, stop loss order ID)
+    """
+    take_profit_id = None
+    stop_loss_id = None
+
+    for report in response.get('orderReports', []):
+        if report.get('type') in ('LIMIT_MAKER', 'LIMIT'):
+            take_profit_id = str(report['orderId'])
+        elif report.get('type') in ('STOP_LOSS', 'STOP_LOSS_LIMIT'):
+            stop_loss_id = str(report['orderId'])
+
+    return take_profit_id, stop_loss_id
@@ -0,0 +1,449 @@
+import calendar
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+
+from models.open_position import OpenPosition
+
+class PositionBook:
+    """Open positions per user, symbol and side for risk checks and sizing
+
+    A position opens with an entry fill and stays open while one of its
+    protective (take profit or stop loss) orders is still open on the
+    exchange; reconcile() closes positions whose protective orders are all
+    gone, or were never placed. Users are spread over lock stripes, so bots of different users
+    update the book concurrently while lookups for one user stay O(1):
+    whether a position exists, how many a user holds and their total
+    exposure (entry amount of the open positions). reserve() claims a
+    position before its order is placed, checking the user's limits under
+    the same lock, so concurrent bots of one user cannot exceed them.
+    """
+
+    def __init__(self, stripes=64):
+        """Initialize an empty position book
+
+        Args:
+            stripes (int): Number of locks users are spread over
+        """
+        self.stripes = stripes
+        self._locks = [Lock() for _ in range(stripes)]
+        self._positions = [{} for _ in range(stripes)]  # Per stripe: {user_id: {(symbol, side): position}}
+        self._exposure = [{} for _ in range(stripes)]  # Per stripe: {user_id: entry amount of open positions}
+        self._opened = [0] * stripes  # Per stripe: positions opened so far
+        self._closed = [0] * stripes  # Per stripe: positions closed so far
+
+    def _stripe(self, user_id):
+        """Get the stripe index of a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Stripe index
+        """
+        return hash(user_id) % self.stripes
+
+    def add_fill(self, user_id, symbol, side, quantity, price, amount, protective_order_ids=(), timestamp=None):
+        """Open a position with an entry fill, or add the fill to the open position
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            quantity (float): Filled quantity
+            price (float): Fill price
+            amount (float): Filled amount in quote currency
+            protective_order_ids (iterable): IDs of the take profit and stop loss orders
+            timestamp (float, optional): Unix time of the fill (defaults to now)
+        """
+        stripe = self._stripe(user_id)
+
+        with self._locks[stripe]:
+            positions = self._positions[stripe].setdefault(user_id, {})
+            position = positions.get((symbol, side))
+
+            # A reserved position takes the filled amount instead of the reserved one
+            if position is not None and position['filled_at'] is None:
+                self._exposure[stripe][user_id] -= position['amount']
+                position['amount'] = 0.0
+
+            if position is None:
+                position = {
+                    'user_id': user_id,
+                    'symbol': symbol,
+                    'side': side,
+                    'is_buy': side == 'buy',
+                    'quantity': 0.0,
+                    'amount': 0.0,
+                    'price': price,
+                    'order_ids': set(),
+                    'opened_at': timestamp or time.time(),
+                    'filled_at': None
+                }
+                positions[(symbol, side)] = position
+                self._opened[stripe] += 1
+
+            position['quantity'] += quantity
+            position['amount'] += amount
+            position['price'] = position['amount'] / position['quantity'] if position['quantity'] else price
+            position['order_ids'].update(order_id for order_id in protective_order_ids if order_id)
+            position['filled_at'] = timestamp or time.time()
+
+            self._exposure[stripe][user_id] = self._exposure[stripe].get(user_id, 0.0) + amount
+
+    def reserve(self, user_id, symbol, side, amount, max_positions=None, max_exposure=None):
+        """Claim a position before placing its entry order
+
+        The reserved position counts towards the user's positions and
+        exposure until add_fill books the fill or release() frees it.
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            amount (float): Entry amount in quote currency
+            max_positions (int, optional): Maximum number of open positions of the user
+            max_exposure (float, optional): Maximum entry amount of the user's open positions
+
+        Returns:
+            bool: True if reserved, False if the position is open or a limit would be exceeded
+        """
+        stripe = self._stripe(user_id)
+
+        with self._locks[stripe]:
+            positions = self._positions[stripe].setdefault(user_id, {})
+            exposure = self._exposure[stripe].get(user_id, 0.0)
+
+            if ((symbol, side) in positions
+                    or (max_positions is not None and len(positions) >= max_positions)
+                    or (max_exposure is not None and exposure + amount > max_exposure)):
+                if not positions:
+                    del self._positions[stripe][user_id]
+                return False
+
+            positions[(symbol, side)] = {
+                'user_id': user_id,
+                'symbol': symbol,
+                'side': side,
+                'is_buy': side == 'buy',
+                'quantity': 0.0,
+                'amount': amount,
+                'price': None,
+                'order_ids': set(),
+                'opened_at': time.time(),
+                'filled_at': None
+            }
+            self._exposure[stripe][user_id] = exposure + amount
+            self._opened[stripe] += 1
+
+        return True
+
+    def release(self, user_id, symbol, side):
+        """Free a reserved position whose entry order was not filled
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+
+        Returns:
+            dict: Released position, or None if no unfilled reservation was held
+        """
+        stripe = self._stripe(user_id)
+
+        with self._locks[stripe]:
+            positions = self._positions[stripe].get(user_id)
+            position = positions.get((symbol, side)) if positions else None
+
+            if position is None or position['filled_at'] is not None:
+                return None
+
+            return self._remove(stripe, user_id, (symbol, side))
+
+    def remove(self, user_id, symbol, side):
+        """Close a position
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+
+        Returns:
+            dict: Closed position, or None if there was none
+        """
+        stripe = self._stripe(user_id)
+
+        with self._locks[stripe]:
+            return self._remove(stripe, user_id, (symbol, side))
+
+    def _remove(self, stripe, user_id, key):
+        """Close a position (call with the stripe's lock held)
+
+        Args:
+            stripe (int): Stripe index of the user
+            user_id (str): User ID
+            key (tuple): (symbol, side)
+
+        Returns:
+            dict: Closed position, or None if there was none
+        """
+        positions = self._positions[stripe].get(user_id)
+        position = positions.pop(key, None) if positions else None
+
+        if position is None:
+            return None
+
+        if positions:
+            self._exposure[stripe][user_id] -= position['amount']
+        else:
+            del self._positions[stripe][user_id]
+            del self._exposure[stripe][user_id]
+
+        self._closed[stripe] += 1
+        return position
+
+    def restore(self, trades):
+        """Book the positions of stored trades after a restart
+
+        Args:
+            trades (list): Trades with protective orders, oldest first (see Trade.get_protected_trades)
+        """
+        for trade in trades:
+            self.add_fill(
+                trade['user_id'],
+                trade['symbol'],
+                trade['type'],
+                trade['quantity'],
+                trade['price'],
+                trade['amount'],
+                (trade.get('take_profit_order_id'), trade.get('stop_loss_order_id')),
+                timestamp=calendar.timegm(trade['timestamp'].utctimetuple())
+            )
+
+    def _get(self, user_id, symbol, side):
+        """Get a position itself rather than a copy
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+
+        Returns:
+            dict: Position, or None if it is not open
+        """
+        positions = self._positions[self._stripe(user_id)].get(user_id)
+        return positions.get((symbol, side)) if positions else None
+
+    def has(self, user_id, symbol, side):
+        """Check whether a user holds a position on a symbol and side
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+
+        Returns:
+            bool: True if the position is open
+        """
+        positions = self._positions[self._stripe(user_id)].get(user_id)
+        return bool(positions) and (symbol, side) in positions
+
+    def count(self, user_id):
+        """Get the number of open positions of a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Open positions
+        """
+        return len(self._positions[self._stripe(user_id)].get(user_id, ()))
+
+    def get_exposure(self, user_id):
+        """Get the entry amount of a user's open positions
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            float: Exposure in quote currency
+        """
+        return self._exposure[self._stripe(user_id)].get(user_id, 0.0)
+
+    def get_positions(self, user_id):
+        """Get a user's open positions
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: Copies of the positions
+        """
+        stripe = self._stripe(user_id)
+
+        with self._locks[stripe]:
+            positions = self._positions[stripe].get(user_id, {})
+            return [dict(position, order_ids=set(position['order_ids'])) for position in positions.values()]
+
+    def get_symbols(self):
+        """Get the symbols with open positions
+
+        Returns:
+            set: Trading symbols
+        """
+        symbols = set()
+
+        for stripe in range(self.stripes):
+            with self._locks[stripe]:
+                for positions in self._positions[stripe].values():
+                    symbols.update(symbol for symbol, _ in positions)
+
+        return symbols
+
+    def reconcile(self, symbol, open_order_ids, as_of):
+        """Close the positions on a symbol whose protective orders are no longer open
+
+        Positions whose protective orders all failed to be placed cannot be
+        tracked on the exchange and close too, so they do not hold the
+        user's limits forever. Reservations and positions filled after the
+        open orders were fetched stay open.
+
+        Args:
+            symbol (str): Trading symbol
+            open_order_ids (set): IDs of the orders open on the exchange for the symbol
+            as_of (float): Unix time the open orders were fetched
+
+        Returns:
+            list: Closed positions
+        """
+        closed = []
+
+        for stripe in range(self.stripes):
+            with self._locks[stripe]:
+                for user_id, positions in list(self._positions[stripe].items()):
+                    for key, position in list(positions.items()):
+                        if (key[0] == symbol and position['filled_at'] is not None and position['filled_at'] < as_of
+                                and not position['order_ids'] & open_order_ids):
+                            closed.append(self._remove(stripe, user_id, key))
+
+        return closed
+
+    def get_stats(self):
+        """Get position book statistics
+
+        Returns:
+            dict: Users with positions, open positions and positions opened and closed so far
+        """
+        users = 0
+        positions = 0
+        opened = 0
+        closed = 0
+
+        for stripe in range(self.stripes):
+            with self._locks[stripe]:
+                users += len(self._positions[stripe])
+                positions += sum(len(user_positions) for user_positions in self._positions[stripe].values())
+                opened += self._opened[stripe]
+                closed += self._closed[stripe]
+
+        return {
+            'users': users,
+            'positions': positions,
+            'opened': opened,
+            'closed': closed
+        }
+
+
+class SharedPositionBook(PositionBook):
+    """Position book whose per-user limits hold across shards and engine nodes
+
+    Positions are still kept locally for reconciliation, and every open
+    position is mirrored in the open positions collection shared by all
+    engines (see ``OpenPosition``). Lookups of a user's positions, count and
+    exposure read the shared document, and reserve() claims the position
+    there atomically, so a user whose bots run on several shards or nodes
+    gets one set of limits. Each local position keeps the token of its
+    shared claim and only closes that claim. Every method touching the
+    shared positions needs database access.
+    """
+
+    def __init__(self, stripes=64, stale_claim_age=300):
+        """Initialize an empty position book
+
+        Args:
+            stripes (int): Number of locks users are spread over
+            stale_claim_age (float): Seconds after which restore() closes a shared
+                position no restored trade backs
+        """
+        super().__init__(stripes)
+        self.stale_claim_age = stale_claim_age
+
+    def reserve(self, user_id, symbol, side, amount, max_positions=None, max_exposure=None):
+        claim = OpenPosition.claim(user_id, symbol, side, amount, max_positions, max_exposure)
+        if claim is None:
+            return False
+
+        # The shared claim decides; drop a local position another engine already closed
+        if not super().reserve(user_id, symbol, side, amount):
+            super().remove(user_id, symbol, side)
+            super().reserve(user_id, symbol, side, amount)
+
+        self._get(user_id, symbol, side)['claim'] = claim
+        return True
+
+    def add_fill(self, user_id, symbol, side, quantity, price, amount, protective_order_ids=(), timestamp=None):
+        super().add_fill(user_id, symbol, side, quantity, price, amount, protective_order_ids, timestamp)
+
+        # Fills without a reservation (restored trades) open the shared position, or take
+        # over the claim left open for it by a previous run
+        position = self._get(user_id, symbol, side)
+        if position is not None and position.get('claim') is None:
+            position['claim'] = OpenPosition.claim(user_id, symbol, side, amount) or OpenPosition.get_claim(user_id, symbol, side)
+
+    def restore(self, trades):
+        started_at = datetime.utcnow()
+        super().restore(trades)
+
+        # Close the shared positions of engines that crashed or restarted since they were
+        # claimed, which no restored trade backs any more
+        keep = {(trade['user_id'], trade['symbol'], trade['type']) for trade in trades}
+        OpenPosition.close_stale(keep, started_at - timedelta(seconds=self.stale_claim_age))
+
+    def release(self, user_id, symbol, side):
+        position = super().release(user_id, symbol, side)
+        self._close_claim(position)
+        return position
+
+    def remove(self, user_id, symbol, side):
+        position = super().remove(user_id, symbol, side)
+        self._close_claim(position)
+        return position
+
+    def reconcile(self, symbol, open_order_ids, as_of):
+        closed = super().reconcile(symbol, open_order_ids, as_of)
+
+        for position in closed:
+            self._close_claim(position)
+
+        return closed
+
+    def _close_claim(self, position):
+        """Close the shared claim of a local position that closed
+
+        Args:
+            position (dict): Closed position, or None
+        """
+        if position is not None and position.get('claim') is not None:
+            OpenPosition.close(position['user_id'], position['symbol'], position['side'], position['claim'])
+
+    def has(self, user_id, symbol, side):
+        document = OpenPosition.find_by_user(user_id)
+        return bool(document) and OpenPosition.get_key(symbol, side) in document.get('positions', {})
+
+    def count(self, user_id):
+        document = OpenPosition.find_by_user(user_id)
+        return document.get('count', 0) if document else 0
+
+    def get_exposure(self, user_id):
+        document = OpenPosition.find_by_user(user_id)
+        return document.get('exposure', 0.0) if document else 0.0
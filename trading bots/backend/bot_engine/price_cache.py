@@ -0,0 +1,130 @@
+import time
+from threading import Lock
+
+class PriceCache:
+    """Shared cache of the latest traded price and best bid/ask per symbol
+
+    Fed by whatever market data the engine already receives (latest candle
+    close, streamed book tickers, REST tickers), so order execution can skip a
+    ticker round trip while the cached price is fresh enough.
+    """
+
+    def __init__(self, max_age=10):
+        """Initialize the price cache
+
+        Args:
+            max_age (float): Default seconds a cached price is considered fresh
+        """
+        self.max_age = max_age
+        self.prices = {}  # Dict of prices: {symbol: {'last', 'last_at', 'bid', 'ask', 'quote_at'}}
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def update(self, symbol, last=None, bid=None, ask=None, timestamp=None):
+        """Update the cached prices for a symbol
+
+        Only the given fields are replaced. The last price and the bid/ask
+        quote keep separate timestamps so a fresh candle close never makes a
+        stale quote look fresh.
+
+        Args:
+            symbol (str): Trading symbol
+            last (float, optional): Last traded price
+            bid (float, optional): Best bid price
+            ask (float, optional): Best ask price
+            timestamp (float, optional): Unix time of the prices (defaults to now)
+        """
+        timestamp = timestamp or time.time()
+
+        with self._lock:
+            entry = self.prices.get(symbol)
+            if entry is None:
+                entry = {'last': None, 'last_at': 0, 'bid': None, 'ask': None, 'quote_at': 0}
+                self.prices[symbol] = entry
+
+            if last is not None and timestamp >= entry['last_at']:
+                entry['last'] = last
+                entry['last_at'] = timestamp
+
+            if (bid is not None or ask is not None) and timestamp >= entry['quote_at']:
+                entry['bid'] = bid if bid is not None else entry['bid']
+                entry['ask'] = ask if ask is not None else entry['ask']
+                entry['quote_at'] = timestamp
+
+    def get(self, symbol, max_age=None):
+        """Get the fresh cached prices for a symbol
+
+        Args:
+            symbol (str): Trading symbol
+            max_age (float, optional): Freshness bound in seconds (defaults to max_age)
+
+        Returns:
+            dict: 'last', 'bid' and 'ask', with stale values set to None, or
+                None if nothing fresh is cached
+        """
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+
+        with self._lock:
+            entry = self.prices.get(symbol)
+            if not entry:
+                return None
+
+            last_fresh = now - entry['last_at'] <= max_age
+            quote_fresh = now - entry['quote_at'] <= max_age
+
+            if not last_fresh and not quote_fresh:
+                return None
+
+            return {
+                'last': entry['last'] if last_fresh else None,
+                'bid': entry['bid'] if quote_fresh else None,
+                'ask': entry['ask'] if quote_fresh else None
+            }
+
+    def get_price(self, symbol, side=None, max_age=None):
+        """Get the expected execution price for a market order
+
+        Buys use the best ask and sells the best bid when known; otherwise the
+        last traded price is used.
+
+        Args:
+            symbol (str): Trading symbol
+            side (str, optional): Order side ('buy' or 'sell')
+            max_age (float, optional): Freshness bound in seconds
+
+        Returns:
+            float: Price, or None if no fresh price is cached
+        """
+        entry = self.get(symbol, max_age)
+        price = None
+
+        if entry:
+            if side == 'buy':
+                price = entry['ask']
+            elif side == 'sell':
+                price = entry['bid']
+            price = price or entry['last']
+
+        if price:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        return price
+
+    def get_stats(self):
+        """Get cache statistics
+
+        Returns:
+            dict: Cached symbol count, hits, misses and hit ratio
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'symbols': len(self.prices),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0
+        }
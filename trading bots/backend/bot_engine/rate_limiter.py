@@ -0,0 +1,302 @@
+import asyncio
+import inspect
+import time
+from collections import deque
+from threading import Condition
+
+import ccxt.async_support as ccxt_async
+
+# Request priorities, highest first
+PRIORITY_ORDER = 0
+PRIORITY_MARKET_DATA = 1
+PRIORITY_ACCOUNT = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_ORDER: 'order',
+    PRIORITY_MARKET_DATA: 'market_data',
+    PRIORITY_ACCOUNT: 'account'
+}
+
+# Binance spot request weights and priorities of the ccxt methods the engines call
+METHOD_BUDGETS = {
+    'create_order': (1, PRIORITY_ORDER),
+    'cancel_order': (1, PRIORITY_ORDER),
+    'private_post_order_oco': (1, PRIORITY_ORDER),
+    'fetch_ohlcv': (2, PRIORITY_MARKET_DATA),
+    'fetch_ticker': (2, PRIORITY_MARKET_DATA),
+    'fetch_time': (1, PRIORITY_MARKET_DATA),
+    'fetch_open_orders': (6, PRIORITY_ACCOUNT),
+    'fetch_balance': (20, PRIORITY_ACCOUNT),
+    'fetch_markets': (20, PRIORITY_ACCOUNT),
+    'load_markets': (20, PRIORITY_ACCOUNT)
+}
+
+USED_WEIGHT_HEADERS = ('x-mbx-used-weight-1m', 'x-mbx-used-weight')
+
+class RequestBudgetExceeded(Exception):
+    """Raised when a request is shed because the weight budget is exhausted"""
+
+
+class RequestBudget:
+    """Token bucket of exchange request weight shared by every bot on an API key
+
+    The bucket holds up to ``limit`` weight and refills at ``limit`` per
+    minute. Whenever the exchange reports the weight it has counted
+    (``X-MBX-USED-WEIGHT-1M``), the bucket is lowered to match, so calls made
+    outside the engine and clock skew are accounted for.
+
+    Lower priorities keep a reserve of the budget free for higher ones and
+    yield to waiting higher-priority calls: order placement may use the whole
+    budget, market-data refreshes leave ``reserves[PRIORITY_MARKET_DATA]`` of
+    it and balance/symbol lookups leave ``reserves[PRIORITY_ACCOUNT]``. A call
+    that cannot be served within its priority's maximum wait is shed with
+    ``RequestBudgetExceeded``.
+    """
+
+    def __init__(self, limit=6000, reserves=None, max_waits=None):
+        """Initialize the request budget
+
+        Args:
+            limit (int): Request weight allowed per minute
+            reserves (dict, optional): Fraction of the limit each priority leaves unused
+            max_waits (dict, optional): Seconds each priority may queue before being shed
+        """
+        self.limit = limit
+        self.rate = limit / 60  # Weight refilled per second
+        self.reserves = reserves or {PRIORITY_ORDER: 0, PRIORITY_MARKET_DATA: 0.1, PRIORITY_ACCOUNT: 0.25}
+        self.max_waits = max_waits or {PRIORITY_ORDER: 10, PRIORITY_MARKET_DATA: 5, PRIORITY_ACCOUNT: 1}
+        self.tokens = float(limit)
+        self.server_used_weight = None  # Weight last reported by the exchange
+        self.granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.shed = {priority: 0 for priority in PRIORITY_NAMES}
+        self.waiting = {priority: 0 for priority in PRIORITY_NAMES}
+        self._history = deque()  # Granted weight of the last minute: (timestamp, weight)
+        self._updated_at = time.time()
+        self._condition = Condition()
+
+    def _refill(self, now):
+        """Add the weight refilled since the last update
+
+        Must be called with the condition lock held.
+
+        Args:
+            now (float): Current Unix time
+        """
+        self.tokens = min(self.limit, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        while self._history and now - self._history[0][0] >= 60:
+            self._history.popleft()
+
+    def _try_acquire(self, weight, priority):
+        """Take weight from the bucket if the priority may spend it now
+
+        Must be called with the condition lock held.
+
+        Args:
+            weight (int): Request weight
+            priority (int): Request priority
+
+        Returns:
+            float: 0 if the weight was taken, otherwise seconds until it may be
+                available
+        """
+        now = time.time()
+        self._refill(now)
+
+        missing = weight + self.reserves[priority] * self.limit - self.tokens
+        blocked = any(self.waiting[p] for p in PRIORITY_NAMES if p < priority)
+
+        if missing <= 0 and not blocked:
+            self.tokens -= weight
+            self.granted[priority] += 1
+            self._history.append((now, weight))
+            return 0
+
+        # Blocked calls poll until the higher-priority callers are served
+        return max(missing / self.rate, 0.01)
+
+    def _shed(self, priority, weight):
+        """Count a shed request and raise
+
+        Args:
+            priority (int): Request priority
+            weight (int): Request weight
+
+        Raises:
+            RequestBudgetExceeded: Always
+        """
+        self.shed[priority] += 1
+        raise RequestBudgetExceeded(
+            f"Request weight budget exhausted for {PRIORITY_NAMES[priority]} request (weight {weight})"
+        )
+
+    def acquire(self, weight=1, priority=PRIORITY_MARKET_DATA, timeout=None):
+        """Wait until a request's weight can be spent and take it from the budget
+
+        Args:
+            weight (int): Request weight
+            priority (int): Request priority
+            timeout (float, optional): Seconds to wait (defaults to the priority's maximum wait)
+
+        Raises:
+            RequestBudgetExceeded: If the weight is not available in time
+        """
+        deadline = time.time() + (self.max_waits[priority] if timeout is None else timeout)
+
+        with self._condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    wait = self._try_acquire(weight, priority)
+                    if not wait:
+                        return
+
+                    remaining = deadline - time.time()
+                    if wait > remaining:
+                        self._shed(priority, weight)
+
+                    self._condition.wait(wait)
+            finally:
+                self.waiting[priority] -= 1
+                self._condition.notify_all()
+
+    async def acquire_async(self, weight=1, priority=PRIORITY_MARKET_DATA, timeout=None):
+        """Async variant of acquire that waits without blocking the event loop
+
+        Args:
+            weight (int): Request weight
+            priority (int): Request priority
+            timeout (float, optional): Seconds to wait (defaults to the priority's maximum wait)
+
+        Raises:
+            RequestBudgetExceeded: If the weight is not available in time
+        """
+        deadline = time.time() + (self.max_waits[priority] if timeout is None else timeout)
+
+        with self._condition:
+            self.waiting[priority] += 1
+
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(weight, priority)
+                    if not wait:
+                        return
+
+                    if wait > deadline - time.time():
+                        self._shed(priority, weight)
+
+                await asyncio.sleep(wait)
+        finally:
+            with self._condition:
+                self.waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def update_used_weight(self, used_weight):
+        """Align the bucket with the weight the exchange reports as used
+
+        Args:
+            used_weight (int): Used weight of the current window (X-MBX-USED-WEIGHT-1M)
+        """
+        with self._condition:
+            self._refill(time.time())
+            self.server_used_weight = used_weight
+            self.tokens = min(self.tokens, self.limit - used_weight)
+
+    def record_response(self, exchange):
+        """Read the used weight from an exchange client's last response headers
+
+        Args:
+            exchange (ccxt.Exchange): Exchange client
+        """
+        headers = getattr(exchange, 'last_response_headers', None)
+        if not headers:
+            return
+
+        for name, value in headers.items():
+            if name.lower() in USED_WEIGHT_HEADERS:
+                try:
+                    self.update_used_weight(int(value))
+                except ValueError:
+                    pass
+                return
+
+    def get_stats(self):
+        """Get budget statistics
+
+        Returns:
+            dict: Limit, available and used weight, weight granted in the last
+                minute, the exchange-reported weight and per-priority counts
+        """
+        with self._condition:
+            self._refill(time.time())
+
+            return {
+                'limit': self.limit,
+                'available': self.tokens,
+                'usage': 1 - self.tokens / self.limit,
+                'weight_last_minute': sum(weight for _, weight in self._history),
+                'server_used_weight': self.server_used_weight,
+                'granted': {PRIORITY_NAMES[p]: count for p, count in self.granted.items()},
+                'shed': {PRIORITY_NAMES[p]: count for p, count in self.shed.items()},
+                'waiting': {PRIORITY_NAMES[p]: count for p, count in self.waiting.items()}
+            }
+
+
+class BudgetedExchange:
+    """Exchange client proxy charging every known call against a RequestBudget
+
+    Methods listed in ``METHOD_BUDGETS`` acquire their weight at their
+    priority before the call and report the exchange's used-weight header
+    afterwards. Everything else is passed through to the wrapped client.
+    Works with both ccxt and ccxt.async_support clients; every budgeted call
+    of an async client waits for the budget without blocking the event loop,
+    including implicit endpoints, which are plain functions returning a
+    coroutine.
+    """
+
+    def __init__(self, exchange, budget):
+        """Initialize the proxy
+
+        Args:
+            exchange (ccxt.Exchange): Exchange client
+            budget (RequestBudget): Shared request budget
+        """
+        self.exchange = exchange
+        self.budget = budget
+        self.is_async = isinstance(exchange, ccxt_async.Exchange)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+
+        if name not in METHOD_BUDGETS or not callable(attribute):
+            return attribute
+
+        weight, priority = METHOD_BUDGETS[name]
+        exchange = self.exchange
+        budget = self.budget
+
+        if self.is_async or inspect.iscoroutinefunction(attribute):
+            async def call_async(*args, **kwargs):
+                # Loaded markets are served from the client's cache
+                if name != 'load_markets' or exchange.markets is None:
+                    await budget.acquire_async(weight, priority)
+                result = attribute(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+                # Record the headers only once the request has run
+                budget.record_response(exchange)
+                return result
+
+            return call_async
+
+        def call(*args, **kwargs):
+            # Loaded markets are served from the client's cache
+            if name != 'load_markets' or exchange.markets is None:
+                budget.acquire(weight, priority)
+            result = attribute(*args, **kwargs)
+            budget.record_response(exchange)
+            return result
+
+        return call
@@ -0,0 +1,179 @@
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock
+
+from models.trade import Trade
+
+class RiskLedger:
+    """In-memory per-user totals of the current UTC day for pre-trade risk checks
+
+    Holds each user's trade count, realized profit/loss and exposure (traded
+    amount) of the day. The engine records every trade it executes in O(1),
+    and a rebuild replaces all totals with one aggregation over the day's
+    trades, on startup and periodically to pick up trades made elsewhere
+    (other shards or engine nodes). Totals reset when the UTC day changes.
+    """
+
+    def __init__(self, replay_window=300):
+        """Initialize an empty ledger; it is not ready until the first rebuild
+
+        Args:
+            replay_window (float): Seconds the trades recorded here are kept to
+                be replayed into a rebuild that did not see them yet
+        """
+        self.day = self.get_day()
+        self.users = {}  # Dict of today's totals: {user_id: {'trade_count', 'profit_loss', 'exposure'}}
+        self.replay_window = timedelta(seconds=replay_window)
+        self.recent = deque()  # Trades recorded within the replay window: (recorded_at, trade)
+        self.replayed = 0
+        self.ready = False
+        self.rebuilt_at = None
+        self.recorded = 0
+        self.rebuilds = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def get_day(now=None):
+        """Get the start of the UTC day
+
+        Args:
+            now (datetime, optional): UTC time (defaults to now)
+
+        Returns:
+            datetime: Midnight of the day
+        """
+        now = now or datetime.utcnow()
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _roll_day(self, now=None):
+        """Drop yesterday's totals once the UTC day changed (call with the lock held)
+
+        Args:
+            now (datetime, optional): UTC time (defaults to now)
+        """
+        day = self.get_day(now)
+        if day != self.day:
+            self.day = day
+            self.users = {}
+
+    @staticmethod
+    def _add(users, trade):
+        """Add a trade to a dict of totals (call with the lock held)
+
+        Args:
+            users (dict): Totals per user
+            trade (dict): Trade document
+        """
+        totals = users.get(trade['user_id'])
+        if totals is None:
+            totals = {'trade_count': 0, 'profit_loss': 0.0, 'exposure': 0.0}
+            users[trade['user_id']] = totals
+
+        totals['trade_count'] += 1
+        totals['profit_loss'] += trade.get('profit_loss') or 0
+        totals['exposure'] += trade.get('amount') or 0
+
+    def _prune(self, now):
+        """Forget recorded trades older than the replay window (call with the lock held)
+
+        Args:
+            now (datetime): UTC time
+        """
+        while self.recent and self.recent[0][0] < now - self.replay_window:
+            self.recent.popleft()
+
+    def record(self, trade):
+        """Add an executed trade to its user's totals
+
+        Args:
+            trade (dict): Trade document with user_id, order_id, amount, timestamp and optional profit_loss
+        """
+        now = datetime.utcnow()
+        timestamp = trade.get('timestamp') or now
+
+        with self._lock:
+            self._roll_day()
+
+            # A trade of an earlier day no longer counts
+            if timestamp < self.day:
+                return
+
+            self._add(self.users, trade)
+            self._prune(now)
+            self.recent.append((now, trade))
+            self.recorded += 1
+
+    def get(self, user_id):
+        """Get a user's totals of the current UTC day
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: 'trade_count', 'profit_loss' and 'exposure' (0 for a user
+                without trades today), or None until the ledger was rebuilt
+        """
+        if not self.ready:
+            return None
+
+        with self._lock:
+            self._roll_day()
+            totals = self.users.get(user_id)
+
+            if totals is None:
+                return {'trade_count': 0, 'profit_loss': 0.0, 'exposure': 0.0}
+
+            return dict(totals)
+
+    def rebuild(self):
+        """Replace every user's totals with an aggregation of today's trades
+
+        The aggregation also lists the order IDs of the trades made since
+        twice the replay window before the rebuild started. Before the swap,
+        every trade recorded here within the replay window that the
+        aggregation did not see (recorded while it ran, or not stored yet) is
+        added to the new totals, so no trade of this engine is lost or counted
+        twice. Trades other engines store after the aggregation read the
+        collection show up at the next rebuild.
+
+        Returns:
+            int: Number of users with trades today
+        """
+        started_at = datetime.utcnow()
+        day = self.get_day(started_at)
+        users = Trade.get_user_totals(day, recent_since=started_at - 2 * self.replay_window)
+
+        seen = set()
+        for totals in users.values():
+            seen.update(totals.pop('recent_order_ids'))
+
+        with self._lock:
+            self._prune(datetime.utcnow())
+            for _, trade in self.recent:
+                if trade.get('order_id') not in seen and (trade.get('timestamp') or started_at) >= day:
+                    self._add(users, trade)
+                    self.replayed += 1
+
+            self.day = day
+            self.users = users
+            self.ready = True
+            self.rebuilt_at = datetime.utcnow()
+            self.rebuilds += 1
+
+        return len(users)
+
+    def get_stats(self):
+        """Get ledger statistics
+
+        Returns:
+            dict: Users with trades today, trades recorded and replayed into rebuilds,
+                rebuild count and last rebuild time
+        """
+        return {
+            'ready': self.ready,
+            'users': len(self.users),
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'rebuilds': self.rebuilds,
+            'rebuilt_at': self.rebuilt_at
+        }
@@ -1,3 +1,4 @@
+import numpy as np
 from datetime import datetime, timedelta
 from models.trade import Trade
 from models.user import User
@@ -5,101 +6,311 @@ from models.user import User
 class RiskManager:
     """Risk management system for trading operations"""
     
-    def __init__(self, user_id=None):
+    def __init__(self, user_id=None, ledger=None, positions=None, market_data=None):
         """Initialize the risk manager
         
         Args:
             user_id (str, optional): User ID
+            ledger (RiskLedger, optional): Shared ledger of today's totals per user
+            positions (PositionBook, optional): Shared book of open positions
+            market_data (MarketDataHub, optional): Shared market data used for volatility-based sizing
+                (any object with get_volatility(symbol, interval, period))
         """
         self.user_id = user_id
+        self.ledger = ledger
+        self.positions = positions
+        self.market_data = market_data
     
-    def can_trade(self, user_id, symbol, amount, is_buy):
+    def can_trade(self, user_id, symbol, amount, is_buy, reserve=False, user=None):
         """Check if a trade is allowed based on risk management rules
         
+        With a ready risk ledger the checks run in memory; otherwise today's
+        totals are aggregated from the trades collection.
+        
         Args:
             user_id (str): User ID
             symbol (str): Trading symbol
             amount (float): Trade amount
             is_buy (bool): True if buy, False if sell
+            reserve (bool): Claim the position in the position book together with the
+                open position and exposure checks; the caller books the fill with
+                add_fill or frees the position with release if the order fails
+            user (dict, optional): User document already loaded by the caller
             
         Returns:
             bool: True if trade is allowed, False otherwise
         """
         # Get user settings
-        user = User.find_by_id(user_id)
+        if user is None:
+            user = User.find_by_id(user_id)
         if not user:
             return False
         
         risk_settings = user.get('settings', {}).get('risk_management', {})
+        account_balance = user.get('account_balance', 0)
+        today = self._get_daily_totals(user_id)
         
         # Check max daily loss
-        if not self._check_max_daily_loss(user_id, risk_settings.get('max_daily_loss', 5.0)):
+        if not self._check_max_daily_loss(today['profit_loss'], account_balance, risk_settings.get('max_daily_loss', 5.0)):
             return False
         
         # Check max trade size
-        if not self._check_max_trade_size(user_id, amount, risk_settings.get('max_trade_size', 10.0)):
+        if not self._check_max_trade_size(amount, account_balance, risk_settings.get('max_trade_size', 10.0)):
             return False
         
-        # Check max open positions
-        if not self._check_max_open_positions(user_id, symbol, is_buy, risk_settings.get('max_open_positions', 5)):
+        # Check max daily exposure (only when the user set a limit)
+        max_daily_exposure = risk_settings.get('max_daily_exposure')
+        if max_daily_exposure is not None and not self._check_max_daily_exposure(
+                today['exposure'], amount, account_balance, max_daily_exposure):
             return False
         
         # Check max trades per day
-        if not self._check_max_trades_per_day(user_id, risk_settings.get('max_trades_per_day', 10)):
+        if not self._check_max_trades_per_day(today['trade_count'], risk_settings.get('max_trades_per_day', 10)):
+            return False
+        
+        max_open_exposure = risk_settings.get('max_open_exposure')
+        
+        # Claim the position only if every other check passed, checking the open positions and
+        # exposure in the same atomic step
+        if reserve and self.positions is not None:
+            return self.positions.reserve(
+                user_id,
+                symbol,
+                'buy' if is_buy else 'sell',
+                amount,
+                risk_settings.get('max_open_positions', 5),
+                account_balance * (max_open_exposure / 100) if max_open_exposure is not None else None
+            )
+        
+        # Check max open exposure (only when the user set a limit)
+        if max_open_exposure is not None and self.positions is not None and not self._check_max_open_exposure(
+                self.positions.get_exposure(user_id), amount, account_balance, max_open_exposure):
+            return False
+        
+        # Check max open positions
+        if not self._check_max_open_positions(user_id, symbol, is_buy, risk_settings.get('max_open_positions', 5)):
             return False
         
         return True
     
-    def _check_max_daily_loss(self, user_id, max_daily_loss_pct):
-        """Check if daily loss limit has been reached
+    def can_trade_batch(self, intents, reserve=False):
+        """Check many trade intents of one tick at once
+        
+        Applies the rules of can_trade to every intent, reading each user
+        once and evaluating the limits as array arithmetic. Intents are taken
+        in a fixed order (by user, then bot) and each user's intents are
+        granted as long as the running totals stay within the user's limits,
+        so when bots compete for the last open position slot, trade of the
+        day or exposure, the first ones in that order win. Only the first
+        intent per user, symbol and side may open a position.
+        
+        Args:
+            intents (list): Dicts with 'user_id', 'symbol', 'amount', 'is_buy'
+                and optionally 'bot_id'
+            reserve (bool): Claim the positions of the allowed intents in the position
+                book, in the same order; an intent whose claim fails is rejected.
+                The caller books each fill with add_fill or frees the position with
+                release if the order fails
+            
+        Returns:
+            list: True for every allowed intent, in the order given
+        """
+        count = len(intents)
+        if not count:
+            return []
+        
+        order = sorted(range(count), key=lambda i: (str(intents[i]['user_id']), str(intents[i].get('bot_id', '')), i))
+        
+        # Index users and (user, symbol, side) keys in that order
+        user_ids = []
+        user_index = {}
+        key_index = {}
+        users = np.empty(count, dtype=np.int64)
+        keys = np.empty(count, dtype=np.int64)
+        amounts = np.empty(count, dtype=np.float64)
+        has_position = np.zeros(count, dtype=bool)
+        
+        for position, i in enumerate(order):
+            intent = intents[i]
+            user_id = intent['user_id']
+            side = 'buy' if intent['is_buy'] else 'sell'
+            
+            if user_id not in user_index:
+                user_index[user_id] = len(user_ids)
+                user_ids.append(user_id)
+            
+            users[position] = user_index[user_id]
+            keys[position] = key_index.setdefault((user_id, intent['symbol'], side), len(key_index))
+            amounts[position] = intent['amount']
+            
+            if self.positions is not None:
+                has_position[position] = self.positions.has(user_id, intent['symbol'], side)
+            else:
+                has_position[position] = any(
+                    p['symbol'] == intent['symbol'] and p['is_buy'] == intent['is_buy'] for p in self._get_open_positions(user_id)
+                )
+        
+        # Read every user's settings and current totals once
+        user_count = len(user_ids)
+        found = np.zeros(user_count, dtype=bool)
+        max_loss = np.zeros(user_count)
+        max_trade = np.zeros(user_count)
+        max_daily_exposure = np.full(user_count, np.inf)
+        max_open_exposure = np.full(user_count, np.inf)
+        slots = np.zeros(user_count)
+        limits = {}  # Limits the position book checks claims against: {user_id: (max_positions, max_exposure)}
+        today_pl = np.zeros(user_count)
+        today_exposure = np.zeros(user_count)
+        open_exposure = np.zeros(user_count)
+        
+        for k, user_id in enumerate(user_ids):
+            user = User.find_by_id(user_id)
+            if not user:
+                continue
+            
+            risk_settings = user.get('settings', {}).get('risk_management', {})
+            account_balance = user.get('account_balance', 0)
+            today = self._get_daily_totals(user_id)
+            open_positions = self.positions.count(user_id) if self.positions is not None else len(self._get_open_positions(user_id))
+            
+            found[k] = True
+            max_loss[k] = account_balance * (risk_settings.get('max_daily_loss', 5.0) / 100)
+            max_trade[k] = account_balance * (risk_settings.get('max_trade_size', 10.0) / 100)
+            if risk_settings.get('max_daily_exposure') is not None:
+                max_daily_exposure[k] = account_balance * (risk_settings['max_daily_exposure'] / 100)
+            if risk_settings.get('max_open_exposure') is not None and self.positions is not None:
+                max_open_exposure[k] = account_balance * (risk_settings['max_open_exposure'] / 100)
+                open_exposure[k] = self.positions.get_exposure(user_id)
+            limits[user_id] = (risk_settings.get('max_open_positions', 5),
+                               max_open_exposure[k] if np.isfinite(max_open_exposure[k]) else None)
+            slots[k] = min(risk_settings.get('max_open_positions', 5) - open_positions,
+                           risk_settings.get('max_trades_per_day', 10) - today['trade_count'])
+            today_pl[k] = today['profit_loss']
+            today_exposure[k] = today['exposure']
+        
+        # Rules that do not depend on the other intents
+        candidates = found[users] & (today_pl[users] > -max_loss[users]) & (amounts <= max_trade[users]) & ~has_position
+        
+        # Only the first candidate per user, symbol and side opens the position
+        first = np.zeros(count, dtype=bool)
+        candidate_positions = np.flatnonzero(candidates)
+        _, first_of_key = np.unique(keys[candidate_positions], return_index=True)
+        first[candidate_positions[first_of_key]] = True
+        candidates &= first
+        
+        # Running count and amount of each user's candidates, in order
+        group_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        running_count = np.cumsum(candidates)
+        running_amount = np.cumsum(np.where(candidates, amounts, 0.0))
+        running_count -= np.r_[0, running_count][group_starts][users]
+        running_amount -= np.r_[0.0, running_amount][group_starts][users]
+        
+        allowed = (
+            candidates
+            & (running_count <= slots[users])
+            & (today_exposure[users] + running_amount <= max_daily_exposure[users])
+            & (open_exposure[users] + running_amount <= max_open_exposure[users])
+        )
+        
+        # Claim the allowed positions in the order the winners were picked, so a position
+        # opened since the totals were read (or by another engine) rejects the intent
+        if reserve and self.positions is not None:
+            for position in np.flatnonzero(allowed):
+                intent = intents[order[position]]
+                allowed[position] = self.positions.reserve(
+                    intent['user_id'],
+                    intent['symbol'],
+                    'buy' if intent['is_buy'] else 'sell',
+                    intent['amount'],
+                    *limits[intent['user_id']]
+                )
+        
+        results = [False] * count
+        for position, i in enumerate(order):
+            results[i] = bool(allowed[position])
+        
+        return results
+    
+    def _get_daily_totals(self, user_id):
+        """Get a user's trade count, profit/loss and exposure of the current UTC day
         
         Args:
             user_id (str): User ID
-            max_daily_loss_pct (float): Maximum daily loss percentage
             
         Returns:
-            bool: True if within limit, False if limit reached
+            dict: 'trade_count', 'profit_loss' and 'exposure'
         """
+        totals = self.ledger.get(user_id) if self.ledger else None
+        if totals is not None:
+            return totals
+        
         # Calculate start of day
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Get today's trades
-        today_trades = Trade.get_trades_by_date_range(user_id, today, datetime.utcnow())
-        
-        # Calculate today's profit/loss
-        today_pl = sum(trade.get('profit_loss', 0) for trade in today_trades)
-        
-        # Get account balance
-        user = User.find_by_id(user_id)
-        account_balance = user.get('account_balance', 0)
+        return Trade.get_user_totals(today, user_id).get(user_id, {'trade_count': 0, 'profit_loss': 0.0, 'exposure': 0.0})
+    
+    def _check_max_daily_loss(self, today_pl, account_balance, max_daily_loss_pct):
+        """Check if daily loss limit has been reached
         
+        Args:
+            today_pl (float): Realized profit/loss of the day
+            account_balance (float): Account balance
+            max_daily_loss_pct (float): Maximum daily loss percentage
+            
+        Returns:
+            bool: True if within limit, False if limit reached
+        """
         # Calculate max allowed loss
         max_loss_amount = account_balance * (max_daily_loss_pct / 100)
         
         # Check if daily loss limit reached
         return today_pl > -max_loss_amount
     
-    def _check_max_trade_size(self, user_id, amount, max_trade_size_pct):
+    def _check_max_trade_size(self, amount, account_balance, max_trade_size_pct):
         """Check if trade size is within limit
         
         Args:
-            user_id (str): User ID
             amount (float): Trade amount
+            account_balance (float): Account balance
             max_trade_size_pct (float): Maximum trade size percentage
             
         Returns:
             bool: True if within limit, False if limit exceeded
         """
-        # Get account balance
-        user = User.find_by_id(user_id)
-        account_balance = user.get('account_balance', 0)
-        
         # Calculate max allowed trade size
         max_trade_amount = account_balance * (max_trade_size_pct / 100)
         
         # Check if trade size is within limit
         return amount <= max_trade_amount
     
+    def _check_max_daily_exposure(self, today_exposure, amount, account_balance, max_daily_exposure_pct):
+        """Check if the amount traded today stays within limit after this trade
+        
+        Args:
+            today_exposure (float): Amount traded today
+            amount (float): Trade amount
+            account_balance (float): Account balance
+            max_daily_exposure_pct (float): Maximum daily traded amount as a percentage of the balance
+            
+        Returns:
+            bool: True if within limit, False if limit exceeded
+        """
+        return today_exposure + amount <= account_balance * (max_daily_exposure_pct / 100)
+    
+    def _check_max_open_exposure(self, open_exposure, amount, account_balance, max_open_exposure_pct):
+        """Check if the entry amount of the open positions stays within limit after this trade
+        
+        Args:
+            open_exposure (float): Entry amount of the open positions
+            amount (float): Trade amount
+            account_balance (float): Account balance
+            max_open_exposure_pct (float): Maximum open exposure as a percentage of the balance
+            
+        Returns:
+            bool: True if within limit, False if limit exceeded
+        """
+        return open_exposure + amount <= account_balance * (max_open_exposure_pct / 100)
+    
     def _check_max_open_positions(self, user_id, symbol, is_buy, max_open_positions):
         """Check if maximum number of open positions has been reached
         
@@ -112,6 +323,13 @@ class RiskManager:
         Returns:
             bool: True if within limit, False if limit reached
         """
+        # Look the position up in the position book
+        if self.positions is not None:
+            if self.positions.has(user_id, symbol, 'buy' if is_buy else 'sell'):
+                return False
+            
+            return self.positions.count(user_id) < max_open_positions
+        
         # Get open positions
         open_positions = self._get_open_positions(user_id)
         
@@ -124,24 +342,17 @@ class RiskManager:
         # Check if max open positions reached
         return len(open_positions) < max_open_positions
     
-    def _check_max_trades_per_day(self, user_id, max_trades_per_day):
+    def _check_max_trades_per_day(self, trade_count, max_trades_per_day):
         """Check if maximum number of trades per day has been reached
         
         Args:
-            user_id (str): User ID
+            trade_count (int): Number of trades today
             max_trades_per_day (int): Maximum number of trades per day
             
         Returns:
             bool: True if within limit, False if limit reached
         """
-        # Calculate start of day
-        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Get today's trades
-        today_trades = Trade.get_trades_by_date_range(user_id, today, datetime.utcnow())
-        
-        # Check if max trades per day reached
-        return len(today_trades) < max_trades_per_day
+        return trade_count < max_trades_per_day
     
     def _get_open_positions(self, user_id):
         """Get open positions for a user
@@ -152,31 +363,119 @@ class RiskManager:
         Returns:
             list: List of open positions
         """
-        # In a real implementation, this would query the exchange for open positions
-        # For now, we'll return a placeholder
+        if self.positions is not None:
+            return self.positions.get_positions(user_id)
+        
         return []
     
-    def calculate_position_size(self, user_id, symbol, risk_per_trade_pct=1.0):
+    def get_trade_amount(self, user, bot_config):
+        """Get the amount a bot trades on its next signal
+        
+        Bots trade their configured amount unless the user set a risk per
+        trade (the 'risk_per_trade' risk setting, in percent of the balance);
+        then the amount is sized by size_position from the bot's stop loss
+        and the market's volatility. Nothing is read from the database or the
+        exchange.
+        
+        Args:
+            user (dict): User document loaded for the trade's risk checks
+            bot_config (dict): Bot configuration
+            
+        Returns:
+            float: Trade amount in quote currency
+        """
+        risk_settings = user.get('settings', {}).get('risk_management', {})
+        risk_per_trade_pct = risk_settings.get('risk_per_trade')
+        
+        if risk_per_trade_pct is None:
+            return bot_config['amount']
+        
+        return self.size_position(
+            user.get('account_balance', 0),
+            risk_settings,
+            bot_config['symbol'],
+            risk_per_trade_pct,
+            interval=bot_config['interval'],
+            stop_loss=bot_config.get('stop_loss')
+        )
+    
+    def calculate_position_size(self, user_id, symbol, risk_per_trade_pct=1.0, interval=None, stop_loss=None):
         """Calculate position size based on risk per trade
         
+        Reads the user's balance and risk settings and sizes the position
+        with size_position.
+        
         Args:
             user_id (str): User ID
             symbol (str): Trading symbol
             risk_per_trade_pct (float): Risk per trade percentage
+            interval (str, optional): Candlestick interval the volatility is estimated on
+            stop_loss (float, optional): Stop loss percentage of the bot
             
         Returns:
-            float: Position size
+            float: Position size in quote currency
         """
         # Get account balance
         user = User.find_by_id(user_id)
-        account_balance = user.get('account_balance', 0)
+        if not user:
+            return 0
         
+        return self.size_position(
+            user.get('account_balance', 0),
+            user.get('settings', {}).get('risk_management', {}),
+            symbol,
+            risk_per_trade_pct,
+            interval=interval,
+            stop_loss=stop_loss
+        )
+    
+    def size_position(self, account_balance, risk_settings, symbol, risk_per_trade_pct=1.0, interval=None,
+                      stop_loss=None, stop_multiple=2.0, method='atr', period=14):
+        """Size a position from the balance and risk settings already loaded
+        
+        The position is sized so that hitting its stop loses
+        risk_per_trade_pct of the balance, capped at the user's max trade
+        size. The stop sits at the bot's stop loss or stop_multiple times the
+        market's volatility, whichever is wider, so the size shrinks as the
+        market gets more volatile. The volatility is estimated from the
+        shared market data of (symbol, interval) without fetching; with
+        neither a stop loss nor an estimate, the risk amount itself is
+        returned. Sizing does no I/O.
+        
+        Args:
+            account_balance (float): Account balance
+            risk_settings (dict): User's risk management settings
+            symbol (str): Trading symbol
+            risk_per_trade_pct (float): Risk per trade percentage
+            interval (str, optional): Candlestick interval the volatility is estimated on
+            stop_loss (float, optional): Stop loss percentage of the bot
+            stop_multiple (float): Stop distance in multiples of the volatility
+            method (str): 'atr' (average true range) or 'realized' (standard deviation of log returns)
+            period (int): Number of bars the volatility is estimated over
+            
+        Returns:
+            float: Position size in quote currency
+        """
         # Calculate risk amount
         risk_amount = account_balance * (risk_per_trade_pct / 100)
+        max_trade_amount = account_balance * (risk_settings.get('max_trade_size', 10.0) / 100)
+        
+        # Stop distance as a fraction of the price
+        stop_fraction = stop_loss / 100 if stop_loss else 0.0
+        
+        volatility = None
+        if self.market_data is not None and interval:
+            volatility = self.market_data.get_volatility(symbol, interval, period)
+        
+        if volatility:
+            volatility_fraction = volatility['realized_volatility'] if method == 'realized' else volatility['atr_pct']
+            if volatility_fraction:
+                stop_fraction = max(stop_fraction, stop_multiple * volatility_fraction)
+        
+        if not stop_fraction:
+            return min(risk_amount, max_trade_amount)
         
-        # In a real implementation, this would calculate position size based on stop loss distance
-        # For now, we'll return a placeholder
-        return risk_amount
+        return min(risk_amount / stop_fraction, max_trade_amount)
     
     def update_risk_settings(self, user_id, risk_settings):
         """Update risk management settings for a user
@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Thread
+
+from bot_engine.metrics import summarize_latencies
+
+class BotScheduler:
+    """Runs periodic jobs for many bots from one timer thread and a worker pool
+
+    Jobs are kept in a heap keyed by their next due time. A single timer thread
+    sleeps until the earliest job is due and hands it to a fixed-size thread
+    pool, so the number of OS threads does not grow with the number of bots.
+    Cancelled jobs are dropped lazily when they reach the top of the heap.
+    """
+
+    def __init__(self, max_workers=8, jitter_samples=10000):
+        """Initialize the scheduler
+
+        Args:
+            max_workers (int): Number of worker threads running jobs
+            jitter_samples (int): Number of recent jitter samples kept for statistics
+        """
+        self.max_workers = max_workers
+        self.jobs = {}  # Dict of scheduled jobs: {job_id: job}
+        self._heap = []  # Heap of (due_time, sequence, job_id)
+        self._sequence = itertools.count()
+        self._condition = Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+        self._jitter = deque(maxlen=jitter_samples)
+        self.run_count = 0
+
+    def start(self):
+        """Start the timer thread and worker pool"""
+        with self._condition:
+            if self._running:
+                return
+
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bot-worker')
+            self._thread = Thread(target=self._run, name='bot-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """Stop the scheduler
+
+        Args:
+            wait (bool): Wait for running jobs to finish
+        """
+        with self._condition:
+            if not self._running:
+                return
+
+            self._running = False
+            self._condition.notify_all()
+
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def schedule(self, job_id, callback, interval=None, delay=0, next_due=None, first_due=None):
+        """Schedule a periodic job
+
+        Jobs either run at a fixed rate (``interval``) or at times computed by
+        ``next_due``, which receives the current Unix time and returns the Unix
+        time of the next run (e.g. just after the next candle close).
+        Scheduling an existing job ID replaces the previous job.
+
+        Args:
+            job_id (str): Job ID (e.g. bot ID)
+            callback (callable): Function called with no arguments on every run
+            interval (float, optional): Seconds between runs
+            delay (float): Seconds until the first fixed-rate run
+            next_due (callable, optional): Function returning the next run time
+            first_due (float, optional): Unix time of the first run (overrides delay and next_due once)
+
+        Raises:
+            ValueError: If neither interval nor next_due is given
+        """
+        if interval is None and next_due is None:
+            raise ValueError("Either interval or next_due is required")
+
+        with self._condition:
+            job = {
+                'id': job_id,
+                'callback': callback,
+                'interval': interval,
+                'next_due': next_due,
+                'sequence': next(self._sequence),
+                'running': False
+            }
+            self.jobs[job_id] = job
+
+            now = time.time()
+            if first_due is None:
+                first_due = next_due(now) if next_due else now + delay
+            self._push(job, first_due)
+
+    def cancel(self, job_id):
+        """Cancel a job
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            bool: True if the job was scheduled, False otherwise
+        """
+        with self._condition:
+            return self.jobs.pop(job_id, None) is not None
+
+    def _push(self, job, due_time):
+        """Push a job onto the heap and wake the timer thread if it is now first
+
+        Must be called with the condition lock held.
+
+        Args:
+            job (dict): Job
+            due_time (float): Unix time the job is due
+        """
+        job['due_time'] = due_time
+        heapq.heappush(self._heap, (due_time, job['sequence'], job['id']))
+
+        if self._heap[0][2] == job['id']:
+            self._condition.notify()
+
+    def _run(self):
+        """Timer loop dispatching due jobs to the worker pool"""
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due_time, sequence, job_id = self._heap[0]
+                delay = due_time - time.time()
+
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                heapq.heappop(self._heap)
+
+                # Skip cancelled and replaced jobs
+                job = self.jobs.get(job_id)
+                if job is None or job['sequence'] != sequence or job['due_time'] != due_time:
+                    continue
+
+                job['running'] = True
+                self._executor.submit(self._execute, job)
+
+    def _execute(self, job):
+        """Run a job and schedule its next run
+
+        Args:
+            job (dict): Job
+        """
+        started_at = time.time()
+        self._jitter.append(started_at - job['due_time'])
+
+        try:
+            job['callback']()
+        except Exception as e:
+            print(f"Error in scheduled job {job['id']}: {str(e)}")
+
+        with self._condition:
+            job['running'] = False
+            self.run_count += 1
+
+            if self.jobs.get(job['id']) is job:
+                now = time.time()
+
+                if job['next_due']:
+                    self._push(job, max(job['next_due'](now), now))
+                else:
+                    # Keep a fixed rate, but never schedule a run in the past
+                    self._push(job, max(job['due_time'] + job['interval'], now))
+
+    def get_stats(self):
+        """Get scheduler statistics
+
+        Returns:
+            dict: Job count, run count and scheduling jitter in milliseconds
+        """
+        jitter = summarize_latencies(self._jitter)
+
+        return {
+            'jobs': len(self.jobs),
+            'heap_size': len(self._heap),
+            'run_count': self.run_count,
+            'workers': self.max_workers,
+            'jitter': jitter
+        }
@@ -0,0 +1,613 @@
+import itertools
+import multiprocessing
+import os
+import uuid
+import zlib
+from threading import Thread, Event, Lock
+
+from flask import Flask, current_app, has_app_context
+
+from bot_engine.trading_engine import TradingEngine
+from bot_engine.engine_common import get_active_bot_ids, build_trade_record, calculate_performance
+
+# Import models
+from models.bot import Bot
+from models.trade import Trade
+
+# Import utils
+from utils.notification import NotificationManager
+
+class ShardNotifier:
+    """Notification manager stand-in forwarding a shard's notifications to the router"""
+
+    def __init__(self, results):
+        """Initialize the notifier
+
+        Args:
+            results (multiprocessing.Queue): Result channel of the shard
+        """
+        self.results = results
+
+    def send_notification(self, user_id, message, notification_type='trade'):
+        self.results.put(('notification', user_id, message, notification_type))
+        return True
+
+
+class ShardEngine(TradingEngine):
+    """Trading engine running the bots of one shard inside a worker process
+
+    Trades and notifications are sent to the router over the result channel
+    instead of being stored here. Bot evaluations run in an app context of a
+    minimal Flask app so risk checks can read users and trades.
+    """
+
+    def __init__(self, results, mongo_uri=None, **kwargs):
+        """Initialize the shard engine
+
+        Args:
+            results (multiprocessing.Queue): Result channel of the shard
+            mongo_uri (str, optional): MongoDB URI used by risk checks
+            **kwargs: TradingEngine arguments
+        """
+        # Position limits span the shards through the shared open positions
+        if mongo_uri:
+            kwargs['app'] = Flask('trading-shard')
+            kwargs['app'].config['MONGO_URI'] = mongo_uri
+            kwargs.setdefault('shared_positions', True)
+
+        super().__init__(**kwargs)
+        self.results = results
+        self.notification_manager = ShardNotifier(results)
+
+        # Risk checks of this shard start from today's trades and the open positions
+        if mongo_uri:
+            self.sync_risk_ledger()
+            self.restore_positions()
+
+    def _record_trade(self, bot_config, side, trade_result):
+        trade = build_trade_record(bot_config, side, trade_result)
+        self.risk_ledger.record(trade)
+        self.results.put(('trade', trade))
+        self.notification_manager.send_notification(
+            bot_config['user_id'],
+            f"Trade executed: {trade_result['side']} {trade_result['quantity']} {bot_config['symbol']} at {trade_result['price']}"
+        )
+
+    def evaluate_all(self, reset=False):
+        """Evaluate every bot of the shard now
+
+        Args:
+            reset (bool): Reset strategies first so they replay the buffered history
+
+        Returns:
+            int: Number of bots evaluated
+        """
+        for bot_id, bot_data in list(self.active_bots.items()):
+            if reset:
+                bot_data['strategy'].reset()
+                bot_data['last_acted_bar'] = None
+            self._run_bot(bot_id)
+
+        return len(self.active_bots)
+
+    def get_stats(self):
+        """Get shard statistics
+
+        Returns:
+            dict: Bot count, market data, scheduler, request budget, risk ledger and position book statistics
+        """
+        return {
+            'bots': len(self.active_bots),
+            'market_data': self.get_market_data_stats(),
+            'scheduler': self.get_scheduler_stats(),
+            'request_budget': self.get_request_budget_stats(),
+            'risk_ledger': self.risk_ledger.get_stats(),
+            'positions': self.positions.get_stats()
+        }
+
+
+def create_shard_engine(shard_id, results, options):
+    """Default factory building the engine of a shard (runs in the worker process)
+
+    Args:
+        shard_id (int): Shard number
+        results (multiprocessing.Queue): Result channel of the shard
+        options (dict): ShardEngine arguments
+
+    Returns:
+        ShardEngine: Shard engine
+    """
+    return ShardEngine(results, **options)
+
+# Commands a shard accepts from the router
+SHARD_COMMANDS = (
+    'start_bot', 'stop_bot', 'stop_all_bots', 'restore_bots', 'evaluate_all', 'get_stats', 'get_account_balance',
+    'get_available_symbols'
+)
+
+def run_shard(shard_id, engine_factory, options, commands, results):
+    """Worker process main loop executing router commands on a shard engine
+
+    Commands are (request_id, name, kwargs) tuples and every command is
+    answered with ('reply', request_id, ok, value). A None command stops
+    the shard.
+
+    Args:
+        shard_id (int): Shard number
+        engine_factory (callable): Picklable factory building the shard engine
+        options (dict): Engine options passed to the factory
+        commands (multiprocessing.Queue): Command channel of the shard
+        results (multiprocessing.Queue): Result channel shared by all shards
+    """
+    engine = engine_factory(shard_id, results, options)
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+
+        request_id, name, kwargs = command
+
+        try:
+            if name not in SHARD_COMMANDS:
+                raise Exception(f"Unknown shard command '{name}'")
+
+            # Commands touching the bot registry need an app context
+            if engine.app:
+                with engine.app.app_context():
+                    value = getattr(engine, name)(**kwargs)
+            else:
+                value = getattr(engine, name)(**kwargs)
+            results.put(('reply', request_id, True, value))
+        except Exception as e:
+            results.put(('reply', request_id, False, str(e)))
+
+    engine.scheduler.stop(wait=False)
+
+
+class ShardedTradingEngine:
+    """Router distributing bots across worker processes
+
+    Each bot is assigned to one of ``workers`` shards by a stable hash of its
+    (symbol, interval), so bots sharing a market share one shard and its
+    market data. Every shard runs a full trading engine in its own process
+    and interpreter, so signal generation uses all CPU cores.
+
+    The router keeps no market data. It sends start/stop commands over each
+    shard's command channel and stores the trades and delivers the
+    notifications that shards send over the result channel. The public
+    methods mirror ``TradingEngine`` so the API routes can use either engine.
+    """
+
+    def __init__(self, api_key=None, api_secret=None, workers=None, mongo_uri=None, engine_options=None,
+                 engine_factory=create_shard_engine, request_timeout=30, request_weight_limit=6000, persist_bots=False):
+        """Initialize the sharded trading engine and start its worker processes
+
+        Args:
+            api_key (str, optional): Binance API key
+            api_secret (str, optional): Binance API secret
+            workers (int, optional): Number of worker processes (defaults to the CPU count)
+            mongo_uri (str, optional): MongoDB URI (defaults to the current app's MONGO_URI)
+            engine_options (dict, optional): Extra ShardEngine arguments (e.g. stream_url)
+            engine_factory (callable): Picklable factory building each shard engine
+            request_timeout (float): Seconds to wait for a shard to answer a command
+            request_weight_limit (int): Exchange request weight per minute, split evenly across shards
+            persist_bots (bool): Keep bot configs and strategy state in the bots collection (needs MongoDB)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.persist_bots = persist_bots
+        self.request_timeout = request_timeout
+        self.app = current_app._get_current_object() if has_app_context() else None
+        self.active_bots = {}  # Dict of routed bots: {bot_id: {'config', 'shard'}}
+        self.notification_manager = NotificationManager()
+        self.trade_count = 0
+        self._pending = {}  # Dict of commands awaiting a reply: {request_id: {'event', 'reply'}}
+        self._request_ids = itertools.count(1)
+        self._lock = Lock()
+
+        if mongo_uri is None and self.app:
+            mongo_uri = self.app.config['MONGO_URI']
+
+        options = {
+            'api_key': api_key,
+            'api_secret': api_secret,
+            'mongo_uri': mongo_uri,
+            'request_weight_limit': request_weight_limit // self.workers,
+            'persist_bots': persist_bots
+        }
+        options.update(engine_options or {})
+
+        # Spawn fresh interpreters; forking a process with running threads and
+        # MongoDB clients is unsafe
+        context = multiprocessing.get_context('spawn')
+        self.results = context.Queue()
+        self.commands = [context.Queue() for _ in range(self.workers)]
+        self.processes = [
+            context.Process(
+                target=run_shard,
+                args=(shard_id, engine_factory, options, self.commands[shard_id], self.results),
+                name=f'trading-shard-{shard_id}',
+                daemon=True
+            )
+            for shard_id in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        self._listener = Thread(target=self._listen, name='shard-results', daemon=True)
+        self._listener.start()
+
+    def get_shard(self, symbol, interval):
+        """Get the shard serving a market
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+
+        Returns:
+            int: Shard number
+        """
+        return zlib.crc32(f"{symbol}|{interval}".encode()) % self.workers
+
+    def _request(self, shard, name, **kwargs):
+        """Send a command to a shard and wait for its reply
+
+        Args:
+            shard (int): Shard number
+            name (str): Command name
+            **kwargs: Command arguments
+
+        Returns:
+            object: Command result
+
+        Raises:
+            Exception: If the shard fails the command or does not answer in time
+        """
+        request_id = next(self._request_ids)
+        pending = {'event': Event(), 'reply': None}
+
+        with self._lock:
+            self._pending[request_id] = pending
+
+        self.commands[shard].put((request_id, name, kwargs))
+
+        try:
+            if not pending['event'].wait(self.request_timeout):
+                raise Exception(f"Shard {shard} did not answer '{name}' in time")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+        ok, value = pending['reply']
+        if not ok:
+            raise Exception(value)
+        return value
+
+    def _gather(self, name, **kwargs):
+        """Send a command to every shard and wait for all replies, failed or not
+
+        Args:
+            name (str): Command name
+            **kwargs: Command arguments
+
+        Returns:
+            tuple: (results, errors) lists indexed by shard; a shard has either
+                its result or its exception, the other entry is None
+        """
+        results = [None] * self.workers
+        errors = [None] * self.workers
+        threads = []
+
+        def request(shard):
+            try:
+                results[shard] = self._request(shard, name, **kwargs)
+            except Exception as e:
+                errors[shard] = e
+
+        for shard in range(self.workers):
+            thread = Thread(target=request, args=(shard,))
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        return results, errors
+
+    @staticmethod
+    def _raise_errors(name, errors):
+        """Raise one exception naming every shard that failed a command
+
+        Args:
+            name (str): Command name
+            errors (list): Exception or None per shard
+
+        Raises:
+            Exception: If any shard failed
+        """
+        failed = [f"shard {shard}: {str(error)}" for shard, error in enumerate(errors) if error is not None]
+        if failed:
+            raise Exception(f"'{name}' failed on {len(failed)} shard(s): {'; '.join(failed)}")
+
+    def _broadcast(self, name, **kwargs):
+        """Send a command to every shard and wait for all replies
+
+        Args:
+            name (str): Command name
+            **kwargs: Command arguments
+
+        Returns:
+            list: Command result of every shard
+
+        Raises:
+            Exception: If any shard fails the command or does not answer in time
+        """
+        results, errors = self._gather(name, **kwargs)
+        self._raise_errors(name, errors)
+        return results
+
+    def _listen(self):
+        """Result loop handling replies, trades and notifications from all shards"""
+        while True:
+            try:
+                message = self.results.get()
+            except (EOFError, OSError):
+                return
+
+            if message is None:
+                return
+
+            try:
+                if message[0] == 'reply':
+                    _, request_id, ok, value = message
+                    with self._lock:
+                        pending = self._pending.get(request_id)
+                    if pending:
+                        pending['reply'] = (ok, value)
+                        pending['event'].set()
+                elif message[0] == 'trade':
+                    self._store_trade(message[1])
+                elif message[0] == 'notification':
+                    self._notify(*message[1:])
+            except Exception as e:
+                print(f"Error handling shard message {message[0]}: {str(e)}")
+
+    def _store_trade(self, trade):
+        """Store a trade executed by a shard
+
+        Args:
+            trade (dict): Trade document
+        """
+        self.trade_count += 1
+
+        if self.app:
+            with self.app.app_context():
+                Trade.create(trade)
+        else:
+            Trade.create(trade)
+
+    def _notify(self, user_id, message, notification_type='trade'):
+        """Deliver a notification sent by a shard
+
+        Args:
+            user_id (str): User ID
+            message (str): Notification message
+            notification_type (str): Type of notification
+        """
+        if self.app:
+            with self.app.app_context():
+                self.notification_manager.send_notification(user_id, message, notification_type)
+        else:
+            self.notification_manager.send_notification(user_id, message, notification_type)
+
+    def close(self):
+        """Stop all shards and the result listener"""
+        for commands in self.commands:
+            commands.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+
+        self.results.put(None)
+        self._listener.join()
+
+    def get_active_bots(self, user_id):
+        """Get active bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of active bot IDs
+        """
+        return get_active_bot_ids(user_id, self.persist_bots)
+
+    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss):
+        """Start a new trading bot on the shard serving its market
+
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol (e.g., 'BTCUSDT')
+            strategy (str): Strategy ID
+            interval (str): Candlestick interval (e.g., '1h', '4h', '1d')
+            amount (float): Amount to trade
+            take_profit (float): Take profit percentage
+            stop_loss (float): Stop loss percentage
+
+        Returns:
+            str: Bot ID
+        """
+        shard = self.get_shard(symbol, interval)
+        bot_id = self._request(
+            shard,
+            'start_bot',
+            user_id=user_id,
+            symbol=symbol,
+            strategy=strategy,
+            interval=interval,
+            amount=amount,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            bot_id=str(uuid.uuid4())
+        )
+
+        with self._lock:
+            self.active_bots[bot_id] = {
+                'config': {'id': bot_id, 'user_id': user_id, 'symbol': symbol, 'interval': interval},
+                'shard': shard
+            }
+
+        return bot_id
+
+    def restore_bots(self):
+        """Resume the running bots of the bot registry on the shards serving their markets
+
+        Every shard restores its bots (with their saved strategy state) in
+        parallel; a shard that fails leaves its bots registered as running for
+        the next restart.
+
+        Returns:
+            list: List of restored bot IDs
+        """
+        try:
+            if self.app:
+                with self.app.app_context():
+                    bots = Bot.find_running()
+            else:
+                bots = Bot.find_running()
+        except Exception as e:
+            print(f"Error loading bot registry: {str(e)}")
+            return []
+
+        shard_bots = [[] for _ in range(self.workers)]
+        for bot in bots:
+            shard_bots[self.get_shard(bot['symbol'], bot['interval'])].append(bot)
+
+        results = [[] for _ in range(self.workers)]
+        threads = []
+
+        def restore(shard):
+            try:
+                results[shard] = self._request(shard, 'restore_bots', bots=shard_bots[shard])
+            except Exception as e:
+                print(f"Error restoring bots on shard {shard}: {str(e)}")
+
+        for shard in range(self.workers):
+            if shard_bots[shard]:
+                thread = Thread(target=restore, args=(shard,))
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        restored = []
+        with self._lock:
+            for shard in range(self.workers):
+                restored_ids = set(results[shard])
+                for bot in shard_bots[shard]:
+                    if bot['_id'] in restored_ids:
+                        self.active_bots[bot['_id']] = {
+                            'config': {'id': bot['_id'], 'user_id': bot['user_id'], 'symbol': bot['symbol'],
+                                       'interval': bot['interval']},
+                            'shard': shard
+                        }
+                        restored.append(bot['_id'])
+
+        return restored
+
+    def stop_bot(self, user_id, bot_id):
+        """Stop a trading bot
+
+        Args:
+            user_id (str): User ID
+            bot_id (str): Bot ID
+
+        Returns:
+            bool: True if bot was stopped, False otherwise
+        """
+        bot_data = self.active_bots.get(bot_id)
+        if not bot_data or bot_data['config']['user_id'] != user_id:
+            return False
+
+        stopped = self._request(bot_data['shard'], 'stop_bot', user_id=user_id, bot_id=bot_id)
+        if stopped:
+            with self._lock:
+                self.active_bots.pop(bot_id, None)
+
+        return stopped
+
+    def stop_all_bots(self, user_id):
+        """Stop all trading bots for a user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            list: List of stopped bot IDs
+
+        Raises:
+            Exception: If a shard failed; the bots of the other shards are stopped regardless
+        """
+        results, errors = self._gather('stop_all_bots', user_id=user_id)
+        stopped_bots = [bot_id for shard_bots in results if shard_bots for bot_id in shard_bots]
+
+        with self._lock:
+            for bot_id in stopped_bots:
+                self.active_bots.pop(bot_id, None)
+
+        self._raise_errors('stop_all_bots', errors)
+        return stopped_bots
+
+    def evaluate_all(self, reset=False):
+        """Evaluate every bot on every shard now
+
+        Args:
+            reset (bool): Reset strategies first so they replay the buffered history
+
+        Returns:
+            int: Number of bots evaluated
+        """
+        return sum(self._broadcast('evaluate_all', reset=reset))
+
+    def get_account_balance(self, user_id):
+        """Get account balance for a user (looked up by the first shard)
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: Account balance
+        """
+        return self._request(0, 'get_account_balance', user_id=user_id)
+
+    def get_available_symbols(self):
+        """Get available trading symbols (looked up by the first shard)
+
+        Returns:
+            list: List of available symbols
+        """
+        return self._request(0, 'get_available_symbols')
+
+    def calculate_performance(self, user_id, period='30d'):
+        """Calculate trading performance for a user
+
+        Args:
+            user_id (str): User ID
+            period (str): Time period ('1d', '7d', '30d', 'all')
+
+        Returns:
+            dict: Performance metrics
+        """
+        # Performance only depends on stored trades, not on the exchange client
+        return calculate_performance(user_id, period)
+
+    def get_stats(self):
+        """Get router and per-shard statistics
+
+        Returns:
+            dict: Worker count, routed bots, stored trades and shard statistics
+        """
+        return {
+            'workers': self.workers,
+            'bots': len(self.active_bots),
+            'trades': self.trade_count,
+            'shards': self._broadcast('get_stats')
+        }
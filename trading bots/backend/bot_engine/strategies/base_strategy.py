@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from bot_engine.timeframes import candle_open
 
 class BaseStrategy:
     """Base class for all trading strategies"""
@@ -8,6 +9,9 @@ class BaseStrategy:
         """Initialize the base strategy"""
         self.name = 'Base Strategy'
         self.description = 'Base strategy class that all strategies inherit from'
+        self.last_timestamp = None  # Open timestamp of the last bar seen by update()
+        self._previous_values = None  # Indicator values at the close of the previous bar
+        self._current_values = None  # Indicator values of the current bar
     
     def generate_signals(self, df):
         """Generate trading signals
@@ -21,6 +25,169 @@ class BaseStrategy:
         # This method should be implemented by subclasses
         raise NotImplementedError("Subclasses must implement generate_signals()")
     
+    def update(self, bar):
+        """Update streaming indicators with a candle and get the latest signal
+        
+        A bar with a newer timestamp starts a new bar; a bar with the same
+        timestamp revises the current (in-progress) bar. Each call runs in
+        constant time regardless of how much history has been seen.
+        
+        Args:
+            bar (list): Candle as [timestamp, open, high, low, close, volume]
+            
+        Returns:
+            int: Signal for the bar (1 = buy, -1 = sell, 0 = none)
+        """
+        timestamp = bar[0]
+        
+        if self.last_timestamp is None:
+            self._create_indicators()
+            new_bar = True
+        elif timestamp > self.last_timestamp:
+            new_bar = True
+        elif timestamp == self.last_timestamp:
+            new_bar = False
+        else:
+            # Ignore bars older than the current bar
+            return 0
+        
+        if new_bar:
+            self._previous_values = self._current_values
+        
+        self._current_values = self._update_indicators(bar[4], new_bar)
+        self.last_timestamp = timestamp
+        
+        if self._previous_values is None:
+            return 0
+        
+        return self._get_signal(self._previous_values, self._current_values)
+    
+    def update_many(self, candles):
+        """Feed several candles through the streaming indicators
+        
+        Args:
+            candles (iterable): Candles as [timestamp, open, high, low, close, volume]
+            
+        Returns:
+            int: Signal for the last candle
+        """
+        signal = 0
+        for candle in candles:
+            signal = self.update(candle)
+        return signal
+    
+    def update_closed(self, candles, interval, now_ms):
+        """Feed candles through the streaming indicators and get the closed-bar signal
+        
+        Every candle (including the one still in progress) updates the
+        indicators, but only the signal of the newest closed candle is returned.
+        
+        Args:
+            candles (iterable): Candles as [timestamp, open, high, low, close, volume]
+            interval (str): Candlestick interval
+            now_ms (float): Current exchange time in milliseconds
+            
+        Returns:
+            tuple: (signal, open timestamp of the newest closed candle or None)
+        """
+        signal = 0
+        signal_bar = None
+        
+        # Candles opened before the candle in progress are closed (month candles vary in length)
+        current_open_ms = candle_open(now_ms / 1000, interval) * 1000
+        
+        for candle in candles:
+            bar_signal = self.update(candle)
+            if candle[0] < current_open_ms:
+                signal = bar_signal
+                signal_bar = int(candle[0])
+        
+        return signal, signal_bar
+    
+    def reset(self):
+        """Reset the streaming indicator state"""
+        self.last_timestamp = None
+        self._previous_values = None
+        self._current_values = None
+    
+    def get_state(self):
+        """Get the streaming indicator state, to resume the strategy after a restart
+        
+        Returns:
+            dict: Last bar timestamp, indicator values and indicator state, or
+                None if no bar has been seen yet
+        """
+        if self.last_timestamp is None:
+            return None
+        
+        return {
+            'last_timestamp': int(self.last_timestamp),
+            'previous_values': [float(value) for value in self._previous_values] if self._previous_values else None,
+            'current_values': [float(value) for value in self._current_values] if self._current_values else None,
+            'indicators': self._get_indicator_state()
+        }
+    
+    def set_state(self, state):
+        """Restore the streaming indicator state from get_state()
+        
+        Args:
+            state (dict): Strategy state
+        """
+        self._create_indicators()
+        self._set_indicator_state(state['indicators'])
+        self.last_timestamp = state['last_timestamp']
+        self._previous_values = tuple(state['previous_values']) if state['previous_values'] else None
+        self._current_values = tuple(state['current_values']) if state['current_values'] else None
+    
+    def _get_indicator_state(self):
+        """Get the state of the streaming indicators
+        
+        Returns:
+            dict: Indicator state
+        """
+        # This method should be implemented by subclasses
+        raise NotImplementedError("Subclasses must implement _get_indicator_state()")
+    
+    def _set_indicator_state(self, state):
+        """Restore the state of the streaming indicators
+        
+        Args:
+            state (dict): Indicator state from _get_indicator_state()
+        """
+        # This method should be implemented by subclasses
+        raise NotImplementedError("Subclasses must implement _set_indicator_state()")
+    
+    def _create_indicators(self):
+        """Create the streaming indicators used by update()"""
+        # This method should be implemented by subclasses
+        raise NotImplementedError("Subclasses must implement _create_indicators()")
+    
+    def _update_indicators(self, close, new_bar):
+        """Update the streaming indicators with a closing price
+        
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+            
+        Returns:
+            tuple: Indicator values for the current bar
+        """
+        # This method should be implemented by subclasses
+        raise NotImplementedError("Subclasses must implement _update_indicators()")
+    
+    def _get_signal(self, previous, current):
+        """Get the signal from the previous and current indicator values
+        
+        Args:
+            previous (tuple): Indicator values at the close of the previous bar
+            current (tuple): Indicator values of the current bar
+            
+        Returns:
+            int: Signal (1 = buy, -1 = sell, 0 = none)
+        """
+        # This method should be implemented by subclasses
+        raise NotImplementedError("Subclasses must implement _get_signal()")
+    
     def get_parameters(self):
         """Get strategy parameters
         
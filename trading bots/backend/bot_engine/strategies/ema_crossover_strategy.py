@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from bot_engine.strategies.base_strategy import BaseStrategy
+from bot_engine.indicators import EMA
 
 class EMACrossoverStrategy(BaseStrategy):
     """Exponential Moving Average (EMA) Crossover trading strategy"""
@@ -45,6 +46,59 @@ class EMACrossoverStrategy(BaseStrategy):
         
         return df
     
+    def _create_indicators(self):
+        """Create the streaming fast and slow EMAs"""
+        self._ema_fast = EMA(self.fast_period)
+        self._ema_slow = EMA(self.slow_period)
+    
+    def _get_indicator_state(self):
+        """Get the state of the streaming fast and slow EMAs
+        
+        Returns:
+            dict: Indicator state
+        """
+        return {'ema_fast': self._ema_fast.get_state(), 'ema_slow': self._ema_slow.get_state()}
+    
+    def _set_indicator_state(self, state):
+        """Restore the state of the streaming fast and slow EMAs
+        
+        Args:
+            state (dict): Indicator state from _get_indicator_state()
+        """
+        self._ema_fast.set_state(state['ema_fast'])
+        self._ema_slow.set_state(state['ema_slow'])
+    
+    def _update_indicators(self, close, new_bar):
+        """Update the streaming EMAs with a closing price
+        
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+            
+        Returns:
+            tuple: (fast EMA, slow EMA)
+        """
+        return (self._ema_fast.update(close, new_bar), self._ema_slow.update(close, new_bar))
+    
+    def _get_signal(self, previous, current):
+        """Get the EMA crossover signal
+        
+        Args:
+            previous (tuple): (fast EMA, slow EMA) at the close of the previous bar
+            current (tuple): (fast EMA, slow EMA) of the current bar
+            
+        Returns:
+            int: Signal (1 = buy, -1 = sell, 0 = none)
+        """
+        ema_fast, ema_slow = current
+        previous_fast, previous_slow = previous
+        
+        if ema_fast > ema_slow and previous_fast <= previous_slow:
+            return 1
+        if ema_fast < ema_slow and previous_fast >= previous_slow:
+            return -1
+        return 0
+    
     def get_parameters(self):
         """Get strategy parameters
         
@@ -65,4 +119,6 @@ class EMACrossoverStrategy(BaseStrategy):
         if 'fast_period' in parameters:
             self.fast_period = parameters['fast_period']
         if 'slow_period' in parameters:
-            self.slow_period = parameters['slow_period']
\ No newline at end of file
+            self.slow_period = parameters['slow_period']
+        
+        self.reset()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from bot_engine.strategies.base_strategy import BaseStrategy
+from bot_engine.indicators import MACD
 
 class MACDStrategy(BaseStrategy):
     """Moving Average Convergence Divergence (MACD) trading strategy"""
@@ -78,6 +79,57 @@ class MACDStrategy(BaseStrategy):
         
         return macd_line, signal_line, histogram
     
+    def _create_indicators(self):
+        """Create the streaming MACD indicator"""
+        self._macd = MACD(self.fast_period, self.slow_period, self.signal_period)
+    
+    def _get_indicator_state(self):
+        """Get the state of the streaming MACD
+        
+        Returns:
+            dict: Indicator state
+        """
+        return {'macd': self._macd.get_state()}
+    
+    def _set_indicator_state(self, state):
+        """Restore the state of the streaming MACD
+        
+        Args:
+            state (dict): Indicator state from _get_indicator_state()
+        """
+        self._macd.set_state(state['macd'])
+    
+    def _update_indicators(self, close, new_bar):
+        """Update the streaming MACD with a closing price
+        
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+            
+        Returns:
+            tuple: (MACD line, signal line, histogram)
+        """
+        return self._macd.update(close, new_bar)
+    
+    def _get_signal(self, previous, current):
+        """Get the MACD / signal line crossover signal
+        
+        Args:
+            previous (tuple): MACD values at the close of the previous bar
+            current (tuple): MACD values of the current bar
+            
+        Returns:
+            int: Signal (1 = buy, -1 = sell, 0 = none)
+        """
+        macd, macd_signal = current[0], current[1]
+        previous_macd, previous_signal = previous[0], previous[1]
+        
+        if macd > macd_signal and previous_macd <= previous_signal:
+            return 1
+        if macd < macd_signal and previous_macd >= previous_signal:
+            return -1
+        return 0
+    
     def get_parameters(self):
         """Get strategy parameters
         
@@ -101,4 +153,6 @@ class MACDStrategy(BaseStrategy):
         if 'slow_period' in parameters:
             self.slow_period = parameters['slow_period']
         if 'signal_period' in parameters:
-            self.signal_period = parameters['signal_period']
\ No newline at end of file
+            self.signal_period = parameters['signal_period']
+        
+        self.reset()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from bot_engine.strategies.base_strategy import BaseStrategy
+from bot_engine.indicators import RSI
 
 class RSIStrategy(BaseStrategy):
     """Relative Strength Index (RSI) trading strategy"""
@@ -75,6 +76,56 @@ class RSIStrategy(BaseStrategy):
         
         return rsi
     
+    def _create_indicators(self):
+        """Create the streaming RSI indicator"""
+        self._rsi = RSI(self.rsi_period)
+    
+    def _get_indicator_state(self):
+        """Get the state of the streaming RSI
+        
+        Returns:
+            dict: Indicator state
+        """
+        return {'rsi': self._rsi.get_state()}
+    
+    def _set_indicator_state(self, state):
+        """Restore the state of the streaming RSI
+        
+        Args:
+            state (dict): Indicator state from _get_indicator_state()
+        """
+        self._rsi.set_state(state['rsi'])
+    
+    def _update_indicators(self, close, new_bar):
+        """Update the streaming RSI with a closing price
+        
+        Args:
+            close (float): Latest close
+            new_bar (bool): True for a new bar, False to revise the current bar
+            
+        Returns:
+            tuple: (RSI,)
+        """
+        return (self._rsi.update(close, new_bar),)
+    
+    def _get_signal(self, previous, current):
+        """Get the RSI threshold crossing signal
+        
+        Args:
+            previous (tuple): (RSI,) at the close of the previous bar
+            current (tuple): (RSI,) of the current bar
+            
+        Returns:
+            int: Signal (1 = buy, -1 = sell, 0 = none)
+        """
+        rsi, previous_rsi = current[0], previous[0]
+        
+        if rsi < self.oversold and previous_rsi >= self.oversold:
+            return 1
+        if rsi > self.overbought and previous_rsi <= self.overbought:
+            return -1
+        return 0
+    
     def get_parameters(self):
         """Get strategy parameters
         
@@ -98,4 +149,6 @@ class RSIStrategy(BaseStrategy):
         if 'overbought' in parameters:
             self.overbought = parameters['overbought']
         if 'oversold' in parameters:
-            self.oversold = parameters['oversold']
\ No newline at end of file
+            self.oversold = parameters['oversold']
+        
+        self.reset()
\ No newline at end of file
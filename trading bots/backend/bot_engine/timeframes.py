@@ -0,0 +1,111 @@
+import calendar
+from datetime import datetime, timezone
+
+TIMEFRAME_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 604800,
+    'M': 2592000  # Nominal length; month candles follow the calendar
+}
+
+WEEK_ANCHOR = 345600  # 1970-01-05 00:00 UTC, the first Monday after the epoch (weekly candles open on Monday)
+
+def interval_to_seconds(interval):
+    """Convert a candlestick interval to seconds
+
+    Month intervals are converted with a nominal 30-day month; use
+    candle_open() and candle_close() for the actual candle boundaries.
+
+    Args:
+        interval (str): Candlestick interval (e.g., '1m', '4h', '1d')
+
+    Returns:
+        int: Interval length in seconds
+
+    Raises:
+        ValueError: If the interval is not recognized
+    """
+    try:
+        return int(interval[:-1]) * TIMEFRAME_UNITS[interval[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Unknown interval: {interval}")
+
+def _month_boundary(timestamp, interval, months_ahead):
+    """Get the start of a calendar month candle
+
+    Args:
+        timestamp (float): Unix time in seconds
+        interval (str): Month interval (e.g., '1M')
+        months_ahead (int): Candles after the one containing the timestamp
+
+    Returns:
+        int: Unix time in seconds
+    """
+    count = int(interval[:-1])
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    months = moment.year * 12 + moment.month - 1
+    months = months - months % count + months_ahead * count
+    return calendar.timegm((months // 12, months % 12 + 1, 1, 0, 0, 0))
+
+def candle_open(timestamp, interval):
+    """Get the open time of the candle containing a timestamp
+
+    Weekly candles open on Monday 00:00 UTC and monthly candles on the
+    first day of the calendar month, as on Binance.
+
+    Args:
+        timestamp (float): Unix time in seconds (exchange clock)
+        interval (str): Candlestick interval
+
+    Returns:
+        float: Unix time in seconds of the candle open
+    """
+    seconds = interval_to_seconds(interval)
+
+    if interval[-1] == 'M':
+        return _month_boundary(timestamp, interval, 0)
+
+    anchor = WEEK_ANCHOR if interval[-1] == 'w' else 0
+    return timestamp - (timestamp - anchor) % seconds
+
+def candle_close(timestamp, interval):
+    """Get the close time of the candle containing a timestamp
+
+    Args:
+        timestamp (float): Unix time in seconds (exchange clock)
+        interval (str): Candlestick interval
+
+    Returns:
+        float: Unix time in seconds of the candle close
+    """
+    if interval[-1] == 'M':
+        interval_to_seconds(interval)  # Raises ValueError for unknown intervals
+        return _month_boundary(timestamp, interval, 1)
+
+    return candle_open(timestamp, interval) + interval_to_seconds(interval)
+
+def last_candle_close(timestamp, interval):
+    """Get the close time of the most recently closed candle
+
+    Args:
+        timestamp (float): Unix time in seconds (exchange clock)
+        interval (str): Candlestick interval
+
+    Returns:
+        float: Unix time in seconds of the last candle close
+    """
+    return candle_open(timestamp, interval)
+
+def next_candle_close(timestamp, interval):
+    """Get the close time of the candle currently in progress
+
+    Args:
+        timestamp (float): Unix time in seconds (exchange clock)
+        interval (str): Candlestick interval
+
+    Returns:
+        float: Unix time in seconds of the next candle close
+    """
+    return candle_close(timestamp, interval)
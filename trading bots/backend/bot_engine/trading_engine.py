@@ -3,9 +3,10 @@ import pandas as pd
 import numpy as np
 import time
 import uuid
-from datetime import datetime, timedelta
-from threading import Thread
-from flask import current_app
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app, has_app_context
 
 # Import strategies
 from bot_engine.strategies.rsi_strategy import RSIStrategy
@@ -14,10 +15,28 @@ from bot_engine.strategies.ema_crossover_strategy import EMACrossoverStrategy
 
 # Import risk manager
 from bot_engine.risk_manager import RiskManager
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.position_book import PositionBook, SharedPositionBook
+
+# Import market data hub and scheduler
+from bot_engine.market_data import MarketDataHub
+from bot_engine.market_stream import MarketStream
+from bot_engine.scheduler import BotScheduler
+from bot_engine.timeframes import interval_to_seconds, next_candle_close
+from bot_engine.price_cache import PriceCache
+from bot_engine.orders import supports_oco
+from bot_engine.rate_limiter import RequestBudget, BudgetedExchange
+from bot_engine.engine_common import (
+    get_active_bot_ids, build_bot_config, get_unsaved_states, mark_states_saved, get_protective_prices,
+    build_protective_legs, build_protective_oco_request, build_oco_protection, build_leg_result,
+    build_trade_latency, build_trade_result, summarize_balance, build_trade_record, rebuild_risk_ledger,
+    load_protected_positions, get_latency_stats, get_request_budget_stats, calculate_performance
+)
 
 # Import models
 from models.trade import Trade
 from models.user import User
+from models.bot import Bot
 
 # Import utils
 from utils.notification import NotificationManager
@@ -25,23 +44,77 @@ from utils.notification import NotificationManager
 class TradingEngine:
     """Main trading engine that manages all trading operations"""
     
-    def __init__(self, api_key=None, api_secret=None):
+    def __init__(self, api_key=None, api_secret=None, max_workers=8, candle_close_grace=2, time_sync_interval=3600,
+                 stream_url=None, price_max_age=10, use_oco=True, request_weight_limit=6000, app=None,
+                 persist_bots=False, checkpoint_interval=60, risk_ledger_sync_interval=None,
+                 position_reconcile_interval=None, stream_connection_size=200, shared_positions=False):
         """Initialize the trading engine
         
         Args:
             api_key (str, optional): Binance API key
             api_secret (str, optional): Binance API secret
+            max_workers (int): Number of worker threads evaluating bots
+            candle_close_grace (float): Seconds after a candle close before bots evaluate it
+            time_sync_interval (int): Seconds between exchange server time syncs
+            stream_url (str, optional): WebSocket base URL; enables streamed market data
+            price_max_age (float): Seconds a cached price may be used instead of fetching a ticker
+            use_oco (bool): Place take profit and stop loss as one OCO order when supported
+            request_weight_limit (int): Exchange request weight per minute shared by all bots
+            app (flask.Flask, optional): App whose context bot evaluations run in
+            persist_bots (bool): Keep bot configs and strategy state in the bots collection
+            checkpoint_interval (float): Seconds between bulk saves of strategy state
+            risk_ledger_sync_interval (float, optional): Seconds between rebuilds of the risk
+                ledger from the trades collection (never rebuilt periodically if omitted)
+            position_reconcile_interval (float, optional): Seconds between reconciliations of
+                the position book with the exchange's open orders (never if omitted)
+            stream_connection_size (int): Streams carried by one WebSocket connection
+            shared_positions (bool): Keep open positions in MongoDB too, so position limits
+                hold for users whose bots run on several shards or engine nodes
         """
         self.api_key = api_key
         self.api_secret = api_secret
+        self.app = app
         self.exchange = None
-        self.active_bots = {}  # Dict of active bots: {bot_id: bot_thread}
+        self.candle_close_grace = candle_close_grace
+        self.time_sync_interval = time_sync_interval
+        self.time_offset = 0.0  # Exchange clock minus local clock, in seconds
+        self.active_bots = {}  # Dict of active bots: {bot_id: bot_data}
         self.strategies = {
             'rsi': RSIStrategy,
             'macd': MACDStrategy,
             'ema_crossover': EMACrossoverStrategy
         }
         self.notification_manager = NotificationManager()
+        self.request_budget = RequestBudget(limit=request_weight_limit)
+        self.prices = PriceCache(max_age=price_max_age)
+        self.market_data = MarketDataHub(prices=self.prices)
+        self.trade_latencies = deque(maxlen=10000)  # Recent per-trade latency records
+        self.use_oco = use_oco
+        self.trade_guard = None  # Optional callable(bot_id) that must return True before a bot trades
+        self.risk_ledger = RiskLedger()  # Today's trade count, profit/loss and exposure per user
+        self.positions = SharedPositionBook() if shared_positions else PositionBook()  # Open positions per user, symbol and side
+        self._order_executor = ThreadPoolExecutor(max_workers=max_workers * 2, thread_name_prefix='order-leg')
+        self.market_stream = MarketStream(
+            self.market_data, stream_url, max_streams_per_connection=stream_connection_size
+        ) if stream_url else None
+        self.max_workers = max_workers
+        self.persist_bots = persist_bots
+        self.scheduler = BotScheduler(max_workers=max_workers)
+        self.scheduler.start()
+        
+        # Periodically save the strategy state of bots that evaluated since the last save
+        if persist_bots:
+            self.scheduler.schedule('bot_checkpoint', self.checkpoint_bots, checkpoint_interval, delay=checkpoint_interval)
+        
+        # Periodically pick up trades recorded by other shards or engine nodes
+        if risk_ledger_sync_interval:
+            self.scheduler.schedule('risk_ledger_sync', self.sync_risk_ledger, risk_ledger_sync_interval,
+                                    delay=risk_ledger_sync_interval)
+        
+        # Periodically close positions whose protective orders filled or were cancelled
+        if position_reconcile_interval:
+            self.scheduler.schedule('position_reconcile', self.reconcile_positions, position_reconcile_interval,
+                                    delay=position_reconcile_interval)
         
         # Initialize exchange if API credentials are provided
         if api_key and api_secret:
@@ -50,17 +123,134 @@ class TradingEngine:
     def initialize_exchange(self):
         """Initialize the exchange connection"""
         try:
-            self.exchange = ccxt.binance({
+            # Every call is charged against the request weight budget shared by all bots
+            self.exchange = BudgetedExchange(ccxt.binance({
                 'apiKey': self.api_key,
                 'secret': self.api_secret,
                 'enableRateLimit': True
-            })
+            }), self.request_budget)
             self.exchange.load_markets()
+            self.market_data.exchange = self.exchange
+            
+            # Keep bot wake-ups aligned with the exchange clock
+            self.sync_time()
+            self.scheduler.schedule('time_sync', self.sync_time, self.time_sync_interval, delay=self.time_sync_interval)
+            
+            # Stream klines and best bid/ask instead of polling REST
+            if self.market_stream:
+                self.market_stream.start()
+            
             print("Exchange initialized successfully")
         except Exception as e:
             print(f"Error initializing exchange: {str(e)}")
             self.exchange = None
     
+    def sync_time(self):
+        """Synchronize the clock offset with the exchange server time"""
+        try:
+            request_time = time.time()
+            server_time = self.exchange.fetch_time() / 1000
+            response_time = time.time()
+            
+            # Assume the server read its clock halfway through the round trip
+            self.time_offset = server_time - (request_time + response_time) / 2
+            self.market_data.time_offset = self.time_offset
+        except Exception as e:
+            print(f"Error synchronizing exchange time: {str(e)}")
+    
+    def close(self):
+        """Stop bot evaluations, market data streaming and order placement"""
+        if self.market_stream:
+            self.market_stream.stop()
+        
+        self.scheduler.stop()
+        self._order_executor.shutdown()
+        
+        # Keep the latest strategy state so the bots resume where they stopped
+        if self.persist_bots:
+            self.checkpoint_bots()
+    
+    def sync_risk_ledger(self):
+        """Rebuild the risk ledger from today's trades
+        
+        Returns:
+            int: Number of users with trades today, or None if the rebuild failed
+        """
+        # Database access needs an app context
+        if self.app and not has_app_context():
+            with self.app.app_context():
+                return self.sync_risk_ledger()
+        
+        return rebuild_risk_ledger(self.risk_ledger)
+    
+    def restore_positions(self, lookback_days=7):
+        """Load the positions of recent trades into the position book after a restart
+        
+        Trades whose protective orders are no longer open on the exchange are
+        closed again by the reconciliation that follows.
+        
+        Args:
+            lookback_days (int): Days of trades searched for open positions
+            
+        Returns:
+            int: Number of open positions
+        """
+        # Database access needs an app context
+        if self.app and not has_app_context():
+            with self.app.app_context():
+                return self.restore_positions(lookback_days)
+        
+        load_protected_positions(self.positions, lookback_days)
+        
+        self.reconcile_positions()
+        return self.positions.get_stats()['positions']
+    
+    def reconcile_positions(self):
+        """Close the positions whose protective orders are no longer open on the exchange
+        
+        Returns:
+            int: Number of positions closed
+        """
+        if not self.exchange:
+            return 0
+        
+        # A shared position book needs an app context for database access
+        if self.app and not has_app_context():
+            with self.app.app_context():
+                return self.reconcile_positions()
+        
+        closed = 0
+        
+        for symbol in self.positions.get_symbols():
+            try:
+                fetched_at = time.time()
+                orders = self.exchange.fetch_open_orders(symbol)
+            except Exception as e:
+                print(f"Error fetching open orders of {symbol}: {str(e)}")
+                continue
+            
+            closed += len(self.positions.reconcile(symbol, {order['id'] for order in orders}, fetched_at))
+        
+        return closed
+    
+    def _get_next_evaluation(self, interval):
+        """Build a function returning when a bot should next evaluate
+        
+        Bots wake once per candle, candle_close_grace seconds after the close
+        of their interval on the exchange clock.
+        
+        Args:
+            interval (str): Candlestick interval
+            
+        Returns:
+            callable: Function mapping the current Unix time to the next run time
+        """
+        def next_evaluation(now):
+            server_now = now + self.time_offset
+            return next_candle_close(server_now, interval) - self.time_offset + self.candle_close_grace
+        
+        return next_evaluation
+    
     def get_active_bots(self, user_id):
         """Get active bots for a user
         
@@ -70,13 +260,9 @@ class TradingEngine:
         Returns:
             list: List of active bot IDs
         """
-        user = User.find_by_id(user_id)
-        if not user:
-            return []
-        
-        return user.get('settings', {}).get('active_bots', [])
+        return get_active_bot_ids(user_id, self.persist_bots)
     
-    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss):
+    def start_bot(self, user_id, symbol, strategy, interval, amount, take_profit, stop_loss, bot_id=None, notify=True):
         """Start a new trading bot
         
         Args:
@@ -87,6 +273,8 @@ class TradingEngine:
             amount (float): Amount to trade
             take_profit (float): Take profit percentage
             stop_loss (float): Stop loss percentage
+            bot_id (str, optional): Bot ID assigned by the caller (generated if omitted)
+            notify (bool): Notify the user that the bot started
             
         Returns:
             str: Bot ID
@@ -98,8 +286,10 @@ class TradingEngine:
         if strategy not in self.strategies:
             raise Exception(f"Strategy '{strategy}' not found")
         
+        interval_to_seconds(interval)  # Raises ValueError for unknown intervals
+        
         # Generate bot ID
-        bot_id = str(uuid.uuid4())
+        bot_id = bot_id or str(uuid.uuid4())
         
         # Create bot configuration
         bot_config = {
@@ -115,37 +305,137 @@ class TradingEngine:
             'created_at': datetime.utcnow()
         }
         
-        # Create bot thread
-        bot_thread = Thread(
-            target=self._run_bot,
-            args=(bot_config,),
-            daemon=True
-        )
+        # Register the bot so it survives engine restarts
+        if self.persist_bots:
+            Bot.create(bot_config)
+        
+        self._add_bot(bot_config)
+        
+        print(f"Bot {bot_id} started for {symbol} using {strategy} strategy")
+        
+        # Notify user
+        if notify:
+            self.notification_manager.send_notification(
+                user_id,
+                f"Trading bot started for {symbol} using {strategy} strategy"
+            )
+        
+        return bot_id
+    
+    def _add_bot(self, bot_config, state=None, run_now=False):
+        """Run a bot: create its strategy, subscribe it to market data and schedule it
         
-        # Store bot thread
+        Args:
+            bot_config (dict): Bot configuration
+            state (dict, optional): Saved 'last_acted_bar' and 'strategy' state to resume from
+            run_now (bool): Evaluate the bot right away instead of at the next candle close
+        """
+        bot_id = bot_config['id']
+        symbol = bot_config['symbol']
+        interval = bot_config['interval']
+        state = state or {}
+        
+        strategy = self.strategies[bot_config['strategy']]()
+        
+        # Resume the indicators only if the buffered candles continue where they stopped
+        strategy_state = state.get('strategy')
+        if strategy_state:
+            first_timestamp = self.market_data.get_buffer(symbol, interval).first_timestamp
+            if first_timestamp is not None and first_timestamp <= strategy_state['last_timestamp']:
+                strategy.set_state(strategy_state)
+        
+        # Store bot state
         self.active_bots[bot_id] = {
-            'thread': bot_thread,
             'config': bot_config,
-            'is_running': True
+            'is_running': True,
+            'strategy': strategy,
+            'risk_manager': RiskManager(bot_config['user_id'], ledger=self.risk_ledger, positions=self.positions,
+                                        market_data=self.market_data),
+            'last_acted_bar': state.get('last_acted_bar'),  # Open timestamp of the last bar a signal was executed for
+            'state': None,  # Strategy state after the latest evaluation
+            'saved_state': None  # Strategy state last written to the bots collection
         }
         
-        # Start bot thread
-        bot_thread.start()
-        
-        # Notify user
-        self.notification_manager.send_notification(
-            user_id,
-            f"Trading bot started for {symbol} using {strategy} strategy"
+        # Subscribe bot to shared market data
+        self.market_data.subscribe(bot_id, symbol, interval)
+        if self.market_stream:
+            self.market_stream.set_markets(self.market_data.get_markets())
+        
+        # Schedule bot evaluations just after each candle close
+        self.scheduler.schedule(
+            bot_id,
+            lambda: self._run_bot(bot_id),
+            next_due=self._get_next_evaluation(interval),
+            first_due=time.time() if run_now else None
         )
+    
+    def restore_bots(self, bots=None, prewarm=True):
+        """Resume the running bots of the bot registry after a restart
         
-        return bot_id
+        The candle history of every market is loaded up front, one fetch per
+        market with several markets in parallel, and each bot resumes its saved
+        strategy state, so its first evaluation only feeds the candles since
+        its last one through its indicators. Restored bots evaluate right away;
+        their saved last acted bar keeps them from acting on a bar twice.
+        
+        Args:
+            bots (list, optional): Bot documents (every running bot in the registry if omitted)
+            prewarm (bool): Load all markets before scheduling the bots
+            
+        Returns:
+            list: List of restored bot IDs
+        """
+        if bots is None:
+            try:
+                bots = Bot.find_running()
+            except Exception as e:
+                print(f"Error loading bot registry: {str(e)}")
+                return []
+        
+        if prewarm:
+            self.market_data.prewarm({(bot['symbol'], bot['interval']) for bot in bots}, self.max_workers)
+        
+        restored = []
+        
+        for bot in bots:
+            try:
+                self._add_bot(build_bot_config(bot), bot.get('state'), run_now=True)
+                restored.append(bot['_id'])
+            except Exception as e:
+                print(f"Error restoring bot {bot['_id']}: {str(e)}")
+        
+        print(f"Restored {len(restored)} of {len(bots)} bots")
+        return restored
+    
+    def checkpoint_bots(self):
+        """Save the strategy state of every bot that evaluated since the last checkpoint
+        
+        Returns:
+            int: Number of bots saved
+        """
+        # Database access needs an app context
+        if self.app and not has_app_context():
+            with self.app.app_context():
+                return self.checkpoint_bots()
+        
+        states = get_unsaved_states(self.active_bots)
+        
+        try:
+            Bot.save_states(states)
+        except Exception as e:
+            print(f"Error saving bot states: {str(e)}")
+            return 0
+        
+        mark_states_saved(self.active_bots, states)
+        return len(states)
     
-    def stop_bot(self, user_id, bot_id):
+    def stop_bot(self, user_id, bot_id, notify=True):
         """Stop a trading bot
         
         Args:
             user_id (str): User ID
             bot_id (str): Bot ID
+            notify (bool): Notify the user that the bot stopped
             
         Returns:
             bool: True if bot was stopped, False otherwise
@@ -158,15 +448,30 @@ class TradingEngine:
         if bot_config['user_id'] != user_id:
             return False
         
-        # Set bot to stop
-        self.active_bots[bot_id]['is_running'] = False
-        self.active_bots[bot_id]['config']['is_running'] = False
+        # Set bot to stop and remove it from the registry
+        bot_data = self.active_bots.pop(bot_id)
+        bot_data['is_running'] = False
+        bot_config['is_running'] = False
+        
+        # Stop scheduled evaluations
+        self.scheduler.cancel(bot_id)
+        
+        if self.persist_bots:
+            Bot.set_status(bot_id, 'stopped')
+        
+        # Release shared market data subscription
+        self.market_data.unsubscribe(bot_id, bot_config['symbol'], bot_config['interval'])
+        if self.market_stream:
+            self.market_stream.set_markets(self.market_data.get_markets())
+        
+        print(f"Bot {bot_id} stopped")
         
         # Notify user
-        self.notification_manager.send_notification(
-            user_id,
-            f"Trading bot stopped for {bot_config['symbol']}"
-        )
+        if notify:
+            self.notification_manager.send_notification(
+                user_id,
+                f"Trading bot stopped for {bot_config['symbol']}"
+            )
         
         return True
     
@@ -188,87 +493,115 @@ class TradingEngine:
         
         return stopped_bots
     
-    def _run_bot(self, bot_config):
-        """Run a trading bot (executed in a separate thread)
+    def _run_bot(self, bot_id):
+        """Evaluate a trading bot once (executed by a scheduler worker)
         
         Args:
-            bot_config (dict): Bot configuration
+            bot_id (str): Bot ID
         """
-        bot_id = bot_config['id']
+        bot_data = self.active_bots.get(bot_id)
+        if not bot_data or not bot_data['is_running']:
+            return
+        
+        # Risk checks and trade records need an app context for database access
+        if self.app and not has_app_context():
+            with self.app.app_context():
+                return self._run_bot(bot_id)
+        
+        bot_config = bot_data['config']
         user_id = bot_config['user_id']
         symbol = bot_config['symbol']
-        strategy_id = bot_config['strategy']
         interval = bot_config['interval']
+        strategy = bot_data['strategy']
+        risk_manager = bot_data['risk_manager']
         
-        # Initialize strategy
-        strategy_class = self.strategies[strategy_id]
-        strategy = strategy_class()
-        
-        # Initialize risk manager
-        risk_manager = RiskManager(user_id)
-        
-        print(f"Bot {bot_id} started for {symbol} using {strategy_id} strategy")
-        
-        # Trading loop
-        while self.active_bots.get(bot_id, {}).get('is_running', False):
-            try:
-                # Fetch market data
-                ohlcv = self.exchange.fetch_ohlcv(symbol, interval)
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        try:
+            # Fetch candles not yet seen by the strategy (shared with other bots on this market)
+            candles = self.market_data.get_candles(symbol, interval, since=strategy.last_timestamp)
+            
+            # Update streaming indicators and get the signal of the newest closed bar
+            last_signal, signal_bar = strategy.update_closed(
+                candles,
+                interval,
+                (time.time() + self.time_offset) * 1000
+            )
+            signal_time = time.time()
+            
+            # Snapshot the strategy state for the next checkpoint
+            bot_data['state'] = {'last_acted_bar': bot_data['last_acted_bar'], 'strategy': strategy.get_state()}
+            
+            # Act on each bar's signal at most once
+            if signal_bar is None or signal_bar == bot_data['last_acted_bar']:
+                return
+            
+            # Check if we should execute a trade
+            if last_signal != 0:
+                bot_data['last_acted_bar'] = signal_bar
+                bot_data['state'] = {'last_acted_bar': signal_bar, 'strategy': bot_data['state']['strategy']}
                 
-                # Generate signals
-                signals = strategy.generate_signals(df)
+                # Save the acted bar before trading, so a restart never acts on it again
+                if self.persist_bots:
+                    try:
+                        Bot.save_state(bot_id, bot_data['state'])
+                        bot_data['saved_state'] = bot_data['state']
+                    except Exception as e:
+                        print(f"Error saving state of bot {bot_id}: {str(e)}")
                 
-                # Get last signal
-                last_signal = signals.iloc[-1]['signal'] if not signals.empty else 0
+                # Make sure this engine may still trade for the bot
+                if self.trade_guard and not self.trade_guard(bot_id):
+                    return
                 
-                # Check if we should execute a trade
-                if last_signal != 0:
-                    # Check risk management rules
-                    if risk_manager.can_trade(user_id, symbol, bot_config['amount'], last_signal > 0):
-                        # Execute trade
-                        trade_result = self._execute_trade(
-                            user_id=user_id,
-                            symbol=symbol,
-                            amount=bot_config['amount'],
-                            side='buy' if last_signal > 0 else 'sell',
-                            take_profit=bot_config['take_profit'],
-                            stop_loss=bot_config['stop_loss']
-                        )
-                        
-                        # Record trade
-                        if trade_result:
-                            trade_id = Trade.create({
-                                'user_id': user_id,
-                                'bot_id': bot_id,
-                                'symbol': symbol,
-                                'type': 'buy' if last_signal > 0 else 'sell',
-                                'amount': bot_config['amount'],
-                                'price': trade_result['price'],
-                                'quantity': trade_result['quantity'],
-                                'fee': trade_result['fee'],
-                                'timestamp': datetime.utcnow(),
-                                'status': 'completed',
-                                'order_id': trade_result['order_id']
-                            })
-                            
-                            # Notify user
-                            self.notification_manager.send_notification(
-                                user_id,
-                                f"Trade executed: {trade_result['side']} {trade_result['quantity']} {symbol} at {trade_result['price']}"
-                            )
+                side = 'buy' if last_signal > 0 else 'sell'
                 
-                # Sleep before next iteration
-                time.sleep(60)  # Check every minute
+                # Size the trade from the user's balance and risk settings, read once for the risk checks too
+                user = User.find_by_id(user_id)
+                if not user:
+                    return
+                amount = risk_manager.get_trade_amount(user, bot_config)
                 
-            except Exception as e:
-                print(f"Error in bot {bot_id}: {str(e)}")
-                time.sleep(60)  # Wait before retrying
+                # Check risk management rules, claiming the position for this trade
+                if risk_manager.can_trade(user_id, symbol, amount, last_signal > 0, reserve=True, user=user):
+                    # Execute trade
+                    trade_result = self._execute_trade(
+                        user_id=user_id,
+                        symbol=symbol,
+                        amount=amount,
+                        side=side,
+                        take_profit=bot_config['take_profit'],
+                        stop_loss=bot_config['stop_loss'],
+                        signal_time=signal_time
+                    )
+                    
+                    # Record trade and notify user
+                    if trade_result:
+                        self._record_trade(bot_config, side, trade_result)
+                    else:
+                        self.positions.release(user_id, symbol, side)
+            
+        except Exception as e:
+            print(f"Error in bot {bot_id}: {str(e)}")
+    
+    def _record_trade(self, bot_config, side, trade_result):
+        """Store an executed trade and notify the user
         
-        print(f"Bot {bot_id} stopped")
+        Args:
+            bot_config (dict): Bot configuration
+            side (str): Trade side ('buy' or 'sell')
+            trade_result (dict): Trade result from _execute_trade
+        """
+        trade = build_trade_record(bot_config, side, trade_result)
+
+        # Count the trade against the daily limits before storing it: the
+        # order is already filled even if the database write fails
+        self.risk_ledger.record(trade)
+        Trade.create(trade)
+        
+        self.notification_manager.send_notification(
+            bot_config['user_id'],
+            f"Trade executed: {trade_result['side']} {trade_result['quantity']} {bot_config['symbol']} at {trade_result['price']}"
+        )
     
-    def _execute_trade(self, user_id, symbol, amount, side, take_profit, stop_loss):
+    def _execute_trade(self, user_id, symbol, amount, side, take_profit, stop_loss, signal_time=None):
         """Execute a trade
         
         Args:
@@ -278,14 +611,25 @@ class TradingEngine:
             side (str): Trade side ('buy' or 'sell')
             take_profit (float): Take profit percentage
             stop_loss (float): Stop loss percentage
+            signal_time (float, optional): Unix time the signal was generated
             
         Returns:
             dict: Trade result or None if failed
         """
         try:
-            # Get current market price
-            ticker = self.exchange.fetch_ticker(symbol)
-            price = ticker['last']
+            started_at = time.time()
+            
+            # Get current market price, fetching a ticker only if the cached price is stale
+            price = self.prices.get_price(symbol, side)
+            price_source = 'cache'
+            
+            if not price:
+                ticker = self.exchange.fetch_ticker(symbol)
+                price = ticker['last']
+                price_source = 'rest'
+                self.prices.update(symbol, last=ticker['last'], bid=ticker.get('bid'), ask=ticker.get('ask'))
+            
+            price_time = time.time()
             
             # Calculate quantity based on amount
             quantity = amount / price
@@ -298,46 +642,87 @@ class TradingEngine:
                 amount=quantity
             )
             
-            # Calculate fee
-            fee = amount * 0.001  # Assuming 0.1% fee
+            order_time = time.time()
             
-            # Set take profit and stop loss orders
-            tp_price = price * (1 + take_profit / 100) if side == 'buy' else price * (1 - take_profit / 100)
-            sl_price = price * (1 - stop_loss / 100) if side == 'buy' else price * (1 + stop_loss / 100)
+            # Record signal-to-order latency
+            latency = build_trade_latency(price_source, started_at, price_time, order_time, signal_time)
+            self.trade_latencies.append(latency)
             
-            # Create take profit order
-            tp_order = self.exchange.create_order(
-                symbol=symbol,
-                type='limit',
-                side='sell' if side == 'buy' else 'buy',
-                amount=quantity,
-                price=tp_price
-            )
+            # Protect the position with take profit and stop loss orders
+            tp_price, sl_price = get_protective_prices(price, side, take_profit, stop_loss)
+            protection = self._place_protective_orders(symbol, side, quantity, tp_price, sl_price)
+            latency['protection_ms'] = (time.time() - order_time) * 1000
             
-            # Create stop loss order
-            sl_order = self.exchange.create_order(
-                symbol=symbol,
-                type='stop_loss',
-                side='sell' if side == 'buy' else 'buy',
-                amount=quantity,
-                price=sl_price,
-                params={'stopPrice': sl_price}
+            # Book the position for the next risk checks
+            self.positions.add_fill(
+                user_id, symbol, side, quantity, price, amount,
+                (protection['take_profit']['order_id'], protection['stop_loss']['order_id'])
             )
             
-            return {
-                'order_id': order['id'],
-                'side': side,
-                'quantity': quantity,
-                'price': price,
-                'fee': fee,
-                'take_profit_order_id': tp_order['id'],
-                'stop_loss_order_id': sl_order['id']
-            }
+            return build_trade_result(order, side, amount, quantity, price, protection, latency)
             
         except Exception as e:
             print(f"Error executing trade: {str(e)}")
             return None
     
+    def _place_protective_orders(self, symbol, side, quantity, tp_price, sl_price):
+        """Place the take profit and stop loss orders of a position
+        
+        Both legs go out as one OCO order when the exchange supports it, so
+        either fill cancels the other. Otherwise (or if the OCO order is
+        rejected) the two legs are submitted in parallel.
+        
+        Args:
+            symbol (str): Trading symbol
+            side (str): Side of the entry order ('buy' or 'sell')
+            quantity (float): Position quantity
+            tp_price (float): Take profit price
+            sl_price (float): Stop loss price
+            
+        Returns:
+            dict: 'mode' ('oco' or 'parallel') and per-leg 'take_profit' and
+                'stop_loss' results with 'order_id', 'latency_ms' and 'error'
+        """
+        if self.use_oco and supports_oco(self.exchange):
+            started_at = time.time()
+            
+            try:
+                self.exchange.load_markets()
+                response = self.exchange.private_post_order_oco(
+                    build_protective_oco_request(self.exchange, symbol, side, quantity, tp_price, sl_price)
+                )
+                return build_oco_protection(response, started_at)
+            except Exception as e:
+                print(f"Error placing OCO order, placing legs separately: {str(e)}")
+        
+        # Submit both legs at once
+        tp_order, sl_order = build_protective_legs(symbol, side, quantity, tp_price, sl_price)
+        tp_future = self._order_executor.submit(self._place_order_leg, **tp_order)
+        sl_future = self._order_executor.submit(self._place_order_leg, **sl_order)
+        
+        return {
+            'mode': 'parallel',
+            'take_profit': tp_future.result(),
+            'stop_loss': sl_future.result()
+        }
+    
+    def _place_order_leg(self, **order):
+        """Place one protective order and time it
+        
+        Args:
+            **order: Arguments of ``create_order``
+            
+        Returns:
+            dict: 'order_id', 'latency_ms' and 'error' (None on success)
+        """
+        started_at = time.time()
+        
+        try:
+            return build_leg_result(started_at, self.exchange.create_order(**order))
+        except Exception as e:
+            print(f"Error placing {order['type']} order: {str(e)}")
+            return build_leg_result(started_at, error=e)
+    
     def get_account_balance(self, user_id):
         """Get account balance for a user
         
@@ -351,21 +736,8 @@ class TradingEngine:
             # Fetch balance from exchange
             balance = self.exchange.fetch_balance()
             
-            # Extract relevant information
-            result = {
-                'total': {},
-                'free': {},
-                'used': {}
-            }
-            
             # Include only non-zero balances
-            for currency, data in balance['total'].items():
-                if data > 0:
-                    result['total'][currency] = data
-                    result['free'][currency] = balance['free'].get(currency, 0)
-                    result['used'][currency] = balance['used'].get(currency, 0)
-            
-            return result
+            return summarize_balance(balance)
             
         except Exception as e:
             print(f"Error fetching account balance: {str(e)}")
@@ -385,9 +757,52 @@ class TradingEngine:
             print(f"Error fetching available symbols: {str(e)}")
             return []
     
+    def get_market_data_stats(self):
+        """Get shared market data statistics
+        
+        Returns:
+            dict: Subscriber and fetch counts per market
+        """
+        stats = self.market_data.get_stats()
+        
+        if self.market_stream:
+            stats['stream'] = self.market_stream.get_stats()
+        
+        return stats
+    
+    def get_latency_stats(self):
+        """Get signal-to-order latency statistics of recent trades
+        
+        Returns:
+            dict: Latency summaries in milliseconds, overall and per price source,
+                plus the time from entry order to protective orders and the
+                price and user cache statistics
+        """
+        return get_latency_stats(self.trade_latencies, self.prices)
+    
+    def get_request_budget_stats(self):
+        """Get request weight budget statistics
+        
+        Returns:
+            dict: Budget usage plus the weight used per running bot in the last minute
+        """
+        return get_request_budget_stats(self.request_budget, len(self.active_bots))
+    
+    def get_scheduler_stats(self):
+        """Get bot scheduler statistics
+        
+        Returns:
+            dict: Scheduled job count, run count and scheduling jitter
+        """
+        return self.scheduler.get_stats()
+    
     def calculate_performance(self, user_id, period='30d'):
         """Calculate trading performance for a user
         
+        '1d' aggregates the raw trades. Longer periods read the daily rollups
+        for whole days and the raw trades only for the part of the first day
+        inside the period.
+        
         Args:
             user_id (str): User ID
             period (str): Time period ('1d', '7d', '30d', 'all')
@@ -395,55 +810,4 @@ class TradingEngine:
         Returns:
             dict: Performance metrics
         """
-        # Calculate start date based on period
-        end_date = datetime.utcnow()
-        
-        if period == '1d':
-            start_date = end_date - timedelta(days=1)
-        elif period == '7d':
-            start_date = end_date - timedelta(days=7)
-        elif period == '30d':
-            start_date = end_date - timedelta(days=30)
-        else:  # 'all'
-            start_date = None
-        
-        # Get trades within period
-        if start_date:
-            trades = Trade.get_trades_by_date_range(user_id, start_date, end_date)
-        else:
-            trades = Trade.find({'user_id': user_id})
-        
-        if not trades:
-            return {
-                'total_trades': 0,
-                'profitable_trades': 0,
-                'losing_trades': 0,
-                'win_rate': 0,
-                'total_profit_loss': 0,
-                'average_profit_loss': 0,
-                'largest_profit': 0,
-                'largest_loss': 0
-            }
-        
-        # Calculate metrics
-        total_trades = len(trades)
-        profitable_trades = sum(1 for trade in trades if trade.get('profit_loss', 0) > 0)
-        losing_trades = sum(1 for trade in trades if trade.get('profit_loss', 0) < 0)
-        win_rate = profitable_trades / total_trades if total_trades > 0 else 0
-        
-        profit_losses = [trade.get('profit_loss', 0) for trade in trades]
-        total_profit_loss = sum(profit_losses)
-        average_profit_loss = total_profit_loss / total_trades if total_trades > 0 else 0
-        largest_profit = max(profit_losses) if profit_losses else 0
-        largest_loss = min(profit_losses) if profit_losses else 0
-        
-        return {
-            'total_trades': total_trades,
-            'profitable_trades': profitable_trades,
-            'losing_trades': losing_trades,
-            'win_rate': win_rate,
-            'total_profit_loss': total_profit_loss,
-            'average_profit_loss': average_profit_loss,
-            'largest_profit': largest_profit,
-            'largest_loss': largest_loss
-        }
\ No newline at end of file
+        return calculate_performance(user_id, period)
@@ -0,0 +1,124 @@
+from contextlib import nullcontext
+from threading import Lock
+
+import numpy as np
+
+from bot_engine.timeframes import candle_open, last_candle_close
+
+def estimate_volatility(candles, period=14):
+    """Estimate a market's volatility from its closed candles
+
+    Args:
+        candles (numpy.ndarray): Closed candles as rows of [timestamp, open, high, low, close, volume]
+        period (int): Number of bars averaged
+
+    Returns:
+        dict: 'atr' (mean true range of the last period bars), 'atr_pct' (ATR
+            relative to the last close), 'realized_volatility' (standard
+            deviation of the last period log returns), 'close' and 'bar' (open
+            timestamp of the last candle), or None without period + 1 candles
+    """
+    if len(candles) < period + 1:
+        return None
+
+    recent = candles[-(period + 1):]
+    high = recent[1:, 2]
+    low = recent[1:, 3]
+    close = recent[:, 4]
+    previous_close = close[:-1]
+
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - previous_close), np.abs(low - previous_close)))
+    atr = float(true_range.mean())
+    last_close = float(close[-1])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.diff(np.log(close))
+    realized_volatility = float(log_returns.std(ddof=1)) if np.isfinite(log_returns).all() else None
+
+    return {
+        'atr': atr,
+        'atr_pct': atr / last_close if last_close else None,
+        'realized_volatility': realized_volatility,
+        'close': last_close,
+        'bar': int(recent[-1, 0])
+    }
+
+
+class VolatilityCache:
+    """Volatility estimates per market, computed once per closed bar
+
+    Bots on the same (symbol, interval) share one estimate. It is computed
+    from the candles already buffered for the market, so reading it never
+    fetches from the exchange, and recomputed only after the next bar closed.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache"""
+        self.estimates = {}  # Dict of estimates: {(symbol, interval, period): estimate}
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def get(self, buffer, server_now, period=14, buffer_lock=None):
+        """Get the volatility estimate of a market as of its last closed bar
+
+        Args:
+            buffer (CandleBuffer): Candle buffer of the market
+            server_now (float): Current Unix time on the exchange clock
+            period (int): Number of bars averaged
+            buffer_lock (Lock, optional): Lock guarding the buffer, only taken to recompute
+
+        Returns:
+            dict: Estimate from estimate_volatility, or None if too few candles are buffered
+        """
+        key = (buffer.symbol, buffer.interval, period)
+
+        # Open timestamp of the newest closed bar
+        bar = int(candle_open(last_candle_close(server_now, buffer.interval) - 1, buffer.interval) * 1000)
+
+        with self._lock:
+            estimate = self.estimates.get(key)
+            if estimate is not None and estimate['bar'] == bar:
+                self.hits += 1
+                return estimate
+
+            self.misses += 1
+
+        with buffer_lock or nullcontext():
+            candles = buffer.to_array()
+            candles = candles[:np.searchsorted(candles[:, 0], bar, side='right')]
+            estimate = estimate_volatility(candles, period)
+
+        # Only cache the estimate of the bar that just closed; with the bar not yet
+        # buffered the next call tries again
+        if estimate is not None and estimate['bar'] == bar:
+            with self._lock:
+                self.estimates[key] = estimate
+
+        return estimate
+
+    def discard(self, symbol, interval):
+        """Drop the estimates of a market
+
+        Args:
+            symbol (str): Trading symbol
+            interval (str): Candlestick interval
+        """
+        with self._lock:
+            for key in [key for key in self.estimates if key[:2] == (symbol, interval)]:
+                del self.estimates[key]
+
+    def get_stats(self):
+        """Get cache statistics
+
+        Returns:
+            dict: Cached estimate count, hits, misses and hit ratio
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'estimates': len(self.estimates),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0
+        }
@@ -13,6 +13,16 @@ class Config:
     
     # MongoDB settings
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/trading_bot')
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))  # Connections per process
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))  # Wait for a pooled connection
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')  # e.g. 'primaryPreferred', 'secondaryPreferred'
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'True').lower() == 'true'  # Create indexes on startup
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))  # Cached users per process (0 disables the cache)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))  # Seconds a cached user is served
+    USER_CACHE_SYNC_INTERVAL = float(os.environ.get('USER_CACHE_SYNC_INTERVAL', '1'))  # Seconds between checks for other processes' updates
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
@@ -23,6 +33,19 @@ class Config:
     BINANCE_API_KEY = os.environ.get('BINANCE_API_KEY')
     BINANCE_API_SECRET = os.environ.get('BINANCE_API_SECRET')
     BINANCE_TESTNET = os.environ.get('BINANCE_TESTNET', 'True').lower() == 'true'
+    BINANCE_STREAM_URL = os.environ.get('BINANCE_STREAM_URL')  # e.g. wss://stream.binance.com:9443
+    STREAM_CONNECTION_SIZE = int(os.environ.get('STREAM_CONNECTION_SIZE', '200'))  # Streams per WebSocket connection (Binance max 1024)
+    
+    # Trading engine settings
+    TRADING_ENGINE = os.environ.get('TRADING_ENGINE', 'threaded')  # 'threaded', 'async' or 'sharded'
+    TRADING_ENGINE_WORKERS = int(os.environ.get('TRADING_ENGINE_WORKERS', '0'))  # Sharded worker processes (0 = CPU count)
+    ENGINE_SOCKET_PATH = os.environ.get('ENGINE_SOCKET_PATH')  # Engine service socket; web workers use it when set
+    ENGINE_LEASES = os.environ.get('ENGINE_LEASES', 'False').lower() == 'true'  # Share bots between engine nodes (threaded engine only)
+    ENGINE_NODE_ID = os.environ.get('ENGINE_NODE_ID')  # Unique per engine node (generated if unset)
+    RESTORE_BOTS = os.environ.get('RESTORE_BOTS', str(not ENGINE_LEASES)).lower() == 'true'  # Resume registered bots when engine_service.py starts (threaded, async and sharded engines; not with ENGINE_LEASES, whose leases keep the bots)
+    RISK_LEDGER_SYNC_INTERVAL = float(os.environ.get('RISK_LEDGER_SYNC_INTERVAL', '60'))  # Seconds between risk ledger rebuilds
+    POSITION_RECONCILE_INTERVAL = float(os.environ.get('POSITION_RECONCILE_INTERVAL', '60'))  # Seconds between position checks against open orders
+    RISK_BATCH_WINDOW = float(os.environ.get('RISK_BATCH_WINDOW', '0.005'))  # Async engine: seconds risk checks are batched (0 = per bot)
     
     # Trading settings
     DEFAULT_TRADE_AMOUNT = float(os.environ.get('DEFAULT_TRADE_AMOUNT', '10.0'))  # Default amount in USD
@@ -0,0 +1,51 @@
+"""Create the MongoDB indexes and report how the hot queries are executed
+
+With --explain, every hot query is explained after the indexes were
+created. The command exits with status 1 if any of them scans a whole
+collection or sorts in memory, so CI can catch a query that lost its
+index.
+
+Usage:
+    python db_indexes.py [--explain]
+"""
+import argparse
+import sys
+
+from flask import Flask
+from dotenv import load_dotenv
+
+from config.config import get_config
+from models.indexes import ensure_indexes, explain_queries
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--explain', action='store_true', help='explain the hot queries after creating the indexes')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+
+    with app.app_context():
+        for collection, names in ensure_indexes().items():
+            print(f"{collection}: {', '.join(names) or 'no indexes'}")
+
+        if not args.explain:
+            return
+
+        failed = False
+        for report in explain_queries():
+            problems = [name for name in ('collection_scan', 'in_memory_sort') if report[name]]
+            failed = failed or bool(problems)
+
+            print(f"{'FAIL' if problems else 'ok':<4} {report['name']:<32} {' <- '.join(report['stages'])} "
+                  f"indexes={','.join(report['indexes']) or '-'} keys={report['keys_examined']} docs={report['docs_examined']}"
+                  + (f" ({', '.join(problems)})" if problems else ''))
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Standalone trading engine service
+
+Runs the trading engine in its own long-lived process and serves it over a
+Unix socket. Start it once per host and set ENGINE_SOCKET_PATH for the web
+app, so every web worker (e.g. under gunicorn) uses this engine instead of
+creating its own. This is the process that resumes the registered bots
+(RESTORE_BOTS, on by default here); an engine embedded in the web app only
+does so when RESTORE_BOTS is set explicitly, and must run in a single worker.
+
+Usage:
+    ENGINE_SOCKET_PATH=/tmp/trading-engine.sock python engine_service.py
+"""
+import os
+import signal
+from threading import Event
+
+from flask import Flask
+from dotenv import load_dotenv
+
+from config.config import get_config
+from bot_engine.engine_service import EngineServer, create_trading_engine
+from models.database import close_clients
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+    socket_path = app.config.get('ENGINE_SOCKET_PATH') or '/tmp/trading-engine.sock'
+
+    stop_event = Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    with app.app_context():
+        engine = create_trading_engine(app.config, app)
+        server = EngineServer(engine, socket_path, app)
+        server.start()
+        print(f"Trading engine service listening on {socket_path} (pid {os.getpid()})")
+
+        stop_event.wait()
+
+        server.stop()
+        engine.close()
+        close_clients()
+        print("Trading engine service stopped")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 # Import models for easier access
 from models.user import User
+from models.user_cache import UserCache
 from models.trade import Trade
+from models.trade_rollup import TradeRollup
+from models.bot import Bot
+from models.bot_lease import BotLease
+from models.open_position import OpenPosition
 
-__all__ = ['User', 'Trade']
\ No newline at end of file
+__all__ = ['User', 'UserCache', 'Trade', 'TradeRollup', 'Bot', 'BotLease', 'OpenPosition']
\ No newline at end of file
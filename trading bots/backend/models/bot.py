@@ -0,0 +1,124 @@
+from pymongo import UpdateOne
+from datetime import datetime
+from models.database import get_database
+
+class Bot:
+    """Bot model for database operations
+    
+    Every bot the engine starts has one document holding its configuration,
+    its status ('running' or 'stopped') and its strategy state: the open
+    timestamp of the last bar it acted on and its streaming indicator state.
+    A restarted engine resumes every running bot from this registry.
+    """
+    
+    @staticmethod
+    def get_collection():
+        """Get the bots collection from MongoDB"""
+        db = get_database()
+        return db.bots
+    
+    @staticmethod
+    def create(bot_config):
+        """Register a running bot
+        
+        Args:
+            bot_config (dict): Bot configuration including its 'id'
+        
+        Returns:
+            str: Bot ID
+        """
+        bots = Bot.get_collection()
+        now = datetime.utcnow()
+        
+        bot = {key: value for key, value in bot_config.items() if key not in ('id', 'is_running')}
+        bot.update({
+            'status': 'running',
+            'state': {'last_acted_bar': None, 'strategy': None},
+            'updated_at': now
+        })
+        
+        bots.replace_one({'_id': bot_config['id']}, bot, upsert=True)
+        return bot_config['id']
+    
+    @staticmethod
+    def find_running():
+        """Find every running bot
+        
+        Returns:
+            list: List of bot documents
+        """
+        bots = Bot.get_collection()
+        
+        return list(bots.find({'status': 'running'}))
+    
+    @staticmethod
+    def find_by_user(user_id, status='running'):
+        """Find a user's bots
+        
+        Args:
+            user_id (str): User ID
+            status (str, optional): Only bots with this status (all bots if None)
+        
+        Returns:
+            list: List of bot documents
+        """
+        bots = Bot.get_collection()
+        
+        filters = {'user_id': user_id}
+        if status:
+            filters['status'] = status
+        
+        return list(bots.find(filters))
+    
+    @staticmethod
+    def set_status(bot_id, status):
+        """Set a bot's status
+        
+        Args:
+            bot_id (str): Bot ID
+            status (str): New status ('running' or 'stopped')
+        
+        Returns:
+            bool: True if the bot was found, False otherwise
+        """
+        bots = Bot.get_collection()
+        
+        result = bots.update_one(
+            {'_id': bot_id},
+            {'$set': {'status': status, 'updated_at': datetime.utcnow()}}
+        )
+        return result.matched_count > 0
+    
+    @staticmethod
+    def save_state(bot_id, state):
+        """Store a bot's strategy state
+        
+        Args:
+            bot_id (str): Bot ID
+            state (dict): Strategy state with 'last_acted_bar' and 'strategy'
+        """
+        bots = Bot.get_collection()
+        
+        bots.update_one({'_id': bot_id}, {'$set': {'state': state, 'updated_at': datetime.utcnow()}})
+    
+    @staticmethod
+    def save_states(states):
+        """Store the strategy state of many bots in one bulk write
+        
+        Args:
+            states (dict): Strategy state per bot: {bot_id: state}
+        
+        Returns:
+            int: Number of bots updated
+        """
+        if not states:
+            return 0
+        
+        bots = Bot.get_collection()
+        now = datetime.utcnow()
+        
+        result = bots.bulk_write([
+            UpdateOne({'_id': bot_id, 'status': 'running'}, {'$set': {'state': state, 'updated_at': now}})
+            for bot_id, state in states.items()
+        ], ordered=False)
+        return result.modified_count
@@ -0,0 +1,213 @@
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+from models.database import get_database
+
+class BotLease:
+    """Bot lease model for database operations
+    
+    Every running bot has one lease document naming the engine node that owns
+    it until ``expires_at``. Each time a lease changes owner its ``token`` is
+    incremented, so a node can prove it still holds the lease it was given
+    (fencing) before acting for the bot.
+    """
+    
+    @staticmethod
+    def get_collection():
+        """Get the bot leases collection from MongoDB"""
+        db = get_database()
+        return db.bot_leases
+    
+    @staticmethod
+    def get_node_collection():
+        """Get the engine nodes collection from MongoDB"""
+        db = get_database()
+        return db.engine_nodes
+    
+    @staticmethod
+    def create(bot_config, node_id, ttl):
+        """Create the lease of a new bot, owned by the creating node
+        
+        Args:
+            bot_config (dict): Bot configuration including its 'id'
+            node_id (str): Owner node ID
+            ttl (float): Lease duration in seconds
+            
+        Returns:
+            dict: Lease document
+        """
+        leases = BotLease.get_collection()
+        now = datetime.utcnow()
+        
+        lease = {
+            '_id': bot_config['id'],
+            'config': bot_config,
+            'owner': node_id,
+            'token': 1,
+            'expires_at': now + timedelta(seconds=ttl),
+            'updated_at': now
+        }
+        leases.insert_one(lease)
+        
+        return lease
+    
+    @staticmethod
+    def claim(node_id, ttl, exclude=()):
+        """Claim one bot whose lease is free or expired
+        
+        Args:
+            node_id (str): Claiming node ID
+            ttl (float): Lease duration in seconds
+            exclude (iterable): Bot IDs not to claim
+            
+        Returns:
+            dict: Claimed lease document with its new token, or None if no bot is free
+        """
+        leases = BotLease.get_collection()
+        now = datetime.utcnow()
+        
+        return leases.find_one_and_update(
+            {
+                '_id': {'$nin': list(exclude)},
+                '$or': [{'owner': None}, {'expires_at': {'$lt': now}}]
+            },
+            {
+                '$set': {'owner': node_id, 'expires_at': now + timedelta(seconds=ttl), 'updated_at': now},
+                '$inc': {'token': 1}
+            },
+            sort=[('expires_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    @staticmethod
+    def renew(node_id, bot_ids, ttl):
+        """Extend the leases a node still owns
+        
+        Args:
+            node_id (str): Owner node ID
+            bot_ids (list): IDs of the bots the node runs
+            ttl (float): Lease duration in seconds
+            
+        Returns:
+            dict: Tokens of every lease the node owns: {bot_id: token}
+        """
+        leases = BotLease.get_collection()
+        now = datetime.utcnow()
+        
+        leases.update_many(
+            {'_id': {'$in': list(bot_ids)}, 'owner': node_id, 'expires_at': {'$gte': now}},
+            {'$set': {'expires_at': now + timedelta(seconds=ttl), 'updated_at': now}}
+        )
+        
+        owned = leases.find({'owner': node_id, 'expires_at': {'$gte': now}}, {'token': 1})
+        return {lease['_id']: lease['token'] for lease in owned}
+    
+    @staticmethod
+    def validate(bot_id, node_id, token):
+        """Check that a node still holds a bot's lease with the given token
+        
+        Args:
+            bot_id (str): Bot ID
+            node_id (str): Owner node ID
+            token (int): Fencing token received when the lease was acquired
+            
+        Returns:
+            bool: True if the lease is held and unexpired, False otherwise
+        """
+        leases = BotLease.get_collection()
+        
+        lease = leases.find_one(
+            {'_id': bot_id, 'owner': node_id, 'token': token, 'expires_at': {'$gt': datetime.utcnow()}},
+            {'_id': 1}
+        )
+        return lease is not None
+    
+    @staticmethod
+    def release(bot_id, node_id, token):
+        """Give up a lease so another node can claim the bot
+        
+        Args:
+            bot_id (str): Bot ID
+            node_id (str): Owner node ID
+            token (int): Fencing token of the lease
+            
+        Returns:
+            bool: True if the lease was released, False otherwise
+        """
+        leases = BotLease.get_collection()
+        now = datetime.utcnow()
+        
+        result = leases.update_one(
+            {'_id': bot_id, 'owner': node_id, 'token': token},
+            {'$set': {'owner': None, 'expires_at': now, 'updated_at': now}}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def delete(bot_id, user_id):
+        """Delete a stopped bot's lease
+        
+        Args:
+            bot_id (str): Bot ID
+            user_id (str): User ID owning the bot
+            
+        Returns:
+            dict: Deleted lease document, or None if not found
+        """
+        leases = BotLease.get_collection()
+        return leases.find_one_and_delete({'_id': bot_id, 'config.user_id': user_id})
+    
+    @staticmethod
+    def find_by_user(user_id):
+        """Find the leases of a user's bots
+        
+        Args:
+            user_id (str): User ID
+            
+        Returns:
+            list: List of lease documents
+        """
+        leases = BotLease.get_collection()
+        return list(leases.find({'config.user_id': user_id}))
+    
+    @staticmethod
+    def count():
+        """Count all bot leases
+        
+        Returns:
+            int: Number of leases
+        """
+        leases = BotLease.get_collection()
+        return leases.count_documents({})
+    
+    @staticmethod
+    def heartbeat(node_id):
+        """Record that an engine node is alive
+        
+        Args:
+            node_id (str): Node ID
+        """
+        nodes = BotLease.get_node_collection()
+        nodes.update_one({'_id': node_id}, {'$set': {'heartbeat_at': datetime.utcnow()}}, upsert=True)
+    
+    @staticmethod
+    def remove_node(node_id):
+        """Remove an engine node that is shutting down
+        
+        Args:
+            node_id (str): Node ID
+        """
+        nodes = BotLease.get_node_collection()
+        nodes.delete_one({'_id': node_id})
+    
+    @staticmethod
+    def count_live_nodes(ttl):
+        """Count engine nodes with a recent heartbeat
+        
+        Args:
+            ttl (float): Seconds after which a silent node counts as gone
+            
+        Returns:
+            int: Number of live nodes
+        """
+        nodes = BotLease.get_node_collection()
+        return nodes.count_documents({'heartbeat_at': {'$gte': datetime.utcnow() - timedelta(seconds=ttl)}})
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class CountCache:
+    """Bounded LRU cache of query counts
+
+    Holds the trade counts the trade history pages reuse instead of running
+    count_documents on every page. Each lookup gives the age a count may
+    have; the least recently used count is evicted when max_size is reached.
+    Safe to share between request threads.
+    """
+
+    def __init__(self, max_size=10000):
+        """Initialize the count cache
+
+        Args:
+            max_size (int): Maximum cached counts (0 disables caching)
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()  # {filters key: (count, counted at)}, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = Lock()
+
+    def get(self, key, max_age):
+        """Get a cached count that is recent enough
+
+        Args:
+            key (str): Filters key
+            max_age (float): Seconds the count may be old
+
+        Returns:
+            int: Cached count, or None on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self.entries.get(key)
+
+            if entry is None or now - entry[1] >= max_age:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, count):
+        """Cache a count, evicting the least recently used counts if full
+
+        Args:
+            key (str): Filters key
+            count (int): Count of the filters
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self.entries[key] = (count, time.time())
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self):
+        """Get cache statistics
+
+        Returns:
+            dict: Cached count entries, hits, misses, hit ratio and evictions
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'counts': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions
+        }
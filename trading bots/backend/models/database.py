@@ -0,0 +1,87 @@
+import os
+from threading import Lock
+from flask import current_app
+from pymongo import MongoClient
+
+# Process-wide clients: {(MONGO_URI, client options): MongoClient}
+_clients = {}
+_clients_lock = Lock()
+
+def _reset_after_fork():
+    """Forget the parent's clients in a forked child
+
+    A MongoClient must not be used across a fork: its pooled sockets and
+    monitor threads belong to the parent. The child drops them (without
+    closing the parent's sockets) and creates its own client on first use.
+    """
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_client_options(config):
+    """Get the MongoClient options from the app configuration
+
+    Args:
+        config (dict): App configuration
+
+    Returns:
+        dict: MongoClient keyword arguments
+    """
+    return {
+        'maxPoolSize': config.get('MONGO_MAX_POOL_SIZE', 100),
+        'connectTimeoutMS': config.get('MONGO_CONNECT_TIMEOUT_MS', 5000),
+        'serverSelectionTimeoutMS': config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        'socketTimeoutMS': config.get('MONGO_SOCKET_TIMEOUT_MS', 30000),
+        'waitQueueTimeoutMS': config.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000),
+        'readPreference': config.get('MONGO_READ_PREFERENCE', 'primary')
+    }
+
+def get_client(config=None):
+    """Get the MongoClient shared by every model in this process
+
+    The client is created on first use and reused by all later calls, so
+    queries share one connection pool instead of each paying connection
+    setup and server discovery. A forked child process gets its own client.
+
+    Args:
+        config (dict, optional): App configuration (the current app's if omitted)
+
+    Returns:
+        pymongo.MongoClient: Shared client
+    """
+    config = config or current_app.config
+    options = get_client_options(config)
+    key = (config['MONGO_URI'], tuple(sorted(options.items())))
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = MongoClient(config['MONGO_URI'], **options)
+            _clients[key] = client
+
+    return client
+
+def get_database(config=None):
+    """Get the default database of the shared MongoClient
+
+    Args:
+        config (dict, optional): App configuration (the current app's if omitted)
+
+    Returns:
+        pymongo.database.Database: Database named in MONGO_URI
+    """
+    return get_client(config).get_database()
+
+def close_clients():
+    """Close every client of this process (e.g. on shutdown)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from models.database import get_database
+from models.user import TOMBSTONE_TTL
+
+# Indexes per collection, matching the queries the models run
+INDEXES = {
+    'trades': [
+        # Trade history (also keyset pages), recent trades, date ranges and profit/loss of a user
+        IndexModel([('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)], name='user_timestamp_id'),
+        # Trade history filtered by symbol
+        IndexModel([('user_id', ASCENDING), ('symbol', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+                   name='user_symbol_timestamp_id'),
+        # Trade history filtered by side
+        IndexModel([('user_id', ASCENDING), ('type', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)],
+                   name='user_type_timestamp_id'),
+        # Every user's trades of the day (risk ledger rebuild)
+        IndexModel([('timestamp', DESCENDING)], name='timestamp')
+    ],
+    'trade_rollups': [
+        # One rollup per user, day, symbol and bot; performance reads a user's days in range
+        IndexModel([('user_id', ASCENDING), ('day', ASCENDING), ('symbol', ASCENDING), ('bot_id', ASCENDING)],
+                   name='user_day_symbol_bot_unique', unique=True)
+    ],
+    'users': [
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+        IndexModel([('username', ASCENDING)], name='username_unique', unique=True),
+        # Users updated since the last user cache sync
+        IndexModel([('updated_at', ASCENDING)], name='updated_at')
+    ],
+    'user_tombstones': [
+        # Deleted users since the last user cache sync; purged once no cache can hold them
+        IndexModel([('updated_at', ASCENDING)], name='updated_at_ttl', expireAfterSeconds=TOMBSTONE_TTL)
+    ],
+    'bots': [
+        # Bots restored on engine start
+        IndexModel([('status', ASCENDING)], name='status'),
+        # Active bots of a user
+        IndexModel([('user_id', ASCENDING), ('status', ASCENDING)], name='user_status')
+    ],
+    'bot_leases': [
+        # Free leases and leases a node holds
+        IndexModel([('owner', ASCENDING), ('expires_at', ASCENDING)], name='owner_expires_at'),
+        # Expired leases, oldest first
+        IndexModel([('expires_at', ASCENDING)], name='expires_at'),
+        IndexModel([('config.user_id', ASCENDING)], name='config_user_id')
+    ],
+    'engine_nodes': [
+        IndexModel([('heartbeat_at', ASCENDING)], name='heartbeat_at')
+    ]
+}
+
+def get_query_plans():
+    """Get the hot queries whose plans are checked by explain_queries()
+
+    Filters use placeholder values; a plan depends on the query's shape,
+    not on the values.
+
+    Returns:
+        list: Queries as dicts with 'name', 'collection', 'filter' and optional 'sort'
+    """
+    user_id = '000000000000000000000000'
+    now = datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+    newest_first = [('timestamp', DESCENDING), ('_id', DESCENDING)]
+    last_seen = ObjectId()
+
+    return [
+        {'name': 'Trade.find by user', 'collection': 'trades', 'filter': {'user_id': user_id}, 'sort': newest_first},
+        {'name': 'Trade.get_trades_by_symbol', 'collection': 'trades',
+         'filter': {'user_id': user_id, 'symbol': 'BTC/USDT'}, 'sort': newest_first},
+        {'name': 'Trade.get_trades_by_date_range', 'collection': 'trades',
+         'filter': {'user_id': user_id, 'timestamp': {'$gte': month_ago, '$lte': now}}, 'sort': newest_first},
+        {'name': 'Trade.find after cursor', 'collection': 'trades',
+         'filter': {'$and': [{'user_id': user_id}, {'timestamp': {'$lte': now}},
+                             {'$or': [{'timestamp': {'$lt': now}}, {'_id': {'$lt': last_seen}}]}]},
+         'sort': newest_first},
+        {'name': '/trades by type and date', 'collection': 'trades',
+         'filter': {'user_id': user_id, 'type': 'buy', 'timestamp': {'$gte': month_ago}}, 'sort': newest_first},
+        {'name': 'Trade.get_profit_loss match', 'collection': 'trades',
+         'filter': {'user_id': user_id, 'timestamp': {'$gte': month_ago, '$lte': now}}},
+        {'name': 'Trade.get_user_totals match', 'collection': 'trades', 'filter': {'timestamp': {'$gte': month_ago}}},
+        {'name': 'Trade.get_protected_trades', 'collection': 'trades',
+         'filter': {'timestamp': {'$gte': month_ago},
+                    '$or': [{'take_profit_order_id': {'$ne': None}}, {'stop_loss_order_id': {'$ne': None}}]},
+         'sort': [('timestamp', ASCENDING)]},
+        {'name': 'TradeRollup.get_performance_stats', 'collection': 'trade_rollups',
+         'filter': {'user_id': user_id, 'day': {'$gte': month_ago}}},
+        {'name': 'User.find_by_email', 'collection': 'users', 'filter': {'email': 'user@example.com'}},
+        {'name': 'User.find_by_username', 'collection': 'users', 'filter': {'username': 'user'}},
+        {'name': 'User._sync_cache', 'collection': 'users', 'filter': {'updated_at': {'$gte': now}}},
+        {'name': 'User._sync_cache tombstones', 'collection': 'user_tombstones', 'filter': {'updated_at': {'$gte': now}}},
+        {'name': 'Bot.find_running', 'collection': 'bots', 'filter': {'status': 'running'}},
+        {'name': 'Bot.find_by_user', 'collection': 'bots', 'filter': {'user_id': user_id, 'status': 'running'}},
+        {'name': 'BotLease.claim', 'collection': 'bot_leases',
+         'filter': {'$or': [{'owner': None}, {'expires_at': {'$lt': now}}]}, 'sort': [('expires_at', ASCENDING)]},
+        {'name': 'BotLease.renew', 'collection': 'bot_leases', 'filter': {'owner': 'node', 'expires_at': {'$gte': now}}},
+        {'name': 'BotLease.find_by_user', 'collection': 'bot_leases', 'filter': {'config.user_id': user_id}},
+        {'name': 'BotLease.count_live_nodes', 'collection': 'engine_nodes', 'filter': {'heartbeat_at': {'$gte': now}}}
+    ]
+
+def ensure_indexes(db=None):
+    """Create the indexes of every collection
+
+    Safe to run on every start: indexes that already exist are left alone.
+    An index the server rejects (e.g. a unique index over duplicate emails)
+    is reported and skipped without stopping the others; connection errors
+    are raised.
+
+    Args:
+        db (pymongo.database.Database, optional): Database (the app's if omitted)
+
+    Returns:
+        dict: Names of the indexes ensured per collection
+    """
+    db = db if db is not None else get_database()
+    ensured = {}
+
+    for collection, indexes in INDEXES.items():
+        ensured[collection] = []
+
+        for index in indexes:
+            try:
+                ensured[collection] += db[collection].create_indexes([index])
+            except OperationFailure as e:
+                print(f"Error creating index {index.document['name']} on {collection}: {str(e)}")
+
+    return ensured
+
+def _plan_stages(plan):
+    """Flatten a query plan into its stages, outermost first
+
+    Args:
+        plan (dict): Winning plan from explain()
+
+    Returns:
+        list: Stages as dicts with 'stage' and, for index scans, 'indexName'
+    """
+    stages = [{'stage': plan.get('stage'), 'indexName': plan.get('indexName')}]
+
+    if 'inputStage' in plan:
+        stages += _plan_stages(plan['inputStage'])
+
+    for input_stage in plan.get('inputStages', []):
+        stages += _plan_stages(input_stage)
+
+    return stages
+
+def explain_queries(db=None):
+    """Explain the hot queries and report how each one is executed
+
+    Args:
+        db (pymongo.database.Database, optional): Database (the app's if omitted)
+
+    Returns:
+        list: One report per query with its 'stages', 'indexes', 'collection_scan'
+            and 'in_memory_sort' flags and, when available, keys and documents examined
+    """
+    db = db if db is not None else get_database()
+    reports = []
+
+    for query in get_query_plans():
+        cursor = db[query['collection']].find(query['filter'])
+        if query.get('sort'):
+            cursor = cursor.sort(query['sort'])
+
+        explain = cursor.limit(100).explain()
+        winning_plan = explain['queryPlanner']['winningPlan']
+        stages = _plan_stages(winning_plan.get('queryPlan', winning_plan))
+        execution = explain.get('executionStats', {})
+
+        reports.append({
+            'name': query['name'],
+            'collection': query['collection'],
+            'stages': [stage['stage'] for stage in stages],
+            'indexes': sorted({stage['indexName'] for stage in stages if stage['indexName']}),
+            'collection_scan': any(stage['stage'] == 'COLLSCAN' for stage in stages),
+            'in_memory_sort': any(stage['stage'] == 'SORT' for stage in stages),
+            'keys_examined': execution.get('totalKeysExamined'),
+            'docs_examined': execution.get('totalDocsExamined')
+        })
+
+    return reports
@@ -0,0 +1,184 @@
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+from models.database import get_database
+
+class OpenPosition:
+    """Open position model shared by every shard and engine node
+    
+    Each user has one document holding their open positions keyed by symbol
+    and side, the number of positions and their total entry amount. A
+    position is claimed with a single conditional update that only matches
+    while the user stays within their limits, so two engines can never both
+    take a user's last position slot. Every claim gets its own token, and a
+    position is only closed by the holder of the claim it was opened with.
+    """
+    
+    @staticmethod
+    def get_collection():
+        """Get the open positions collection from MongoDB"""
+        db = get_database()
+        return db.open_positions
+    
+    @staticmethod
+    def get_key(symbol, side):
+        """Get the key of a position in its user's 'positions'
+        
+        Args:
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            
+        Returns:
+            str: Position key
+        """
+        # Field names cannot contain dots
+        return f"{symbol.replace('.', '_')}|{side}"
+    
+    @staticmethod
+    def _field(symbol, side):
+        """Get the dotted field path of a position in its user's document"""
+        return f"positions.{OpenPosition.get_key(symbol, side)}"
+    
+    @staticmethod
+    def claim(user_id, symbol, side, amount, max_positions=None, max_exposure=None):
+        """Open a position if the user has none on the symbol and side and stays within limits
+        
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            amount (float): Entry amount in quote currency
+            max_positions (int, optional): Maximum number of open positions
+            max_exposure (float, optional): Maximum entry amount of the open positions
+            
+        Returns:
+            ObjectId: Claim token of the opened position, or None if it was not opened
+        """
+        # A user without a document is only matched by the upsert, which ignores the limits
+        if (max_positions is not None and max_positions < 1) or (max_exposure is not None and amount > max_exposure):
+            return None
+        
+        field = OpenPosition._field(symbol, side)
+        query = {'_id': user_id, field: {'$exists': False}}
+        
+        if max_positions is not None:
+            query['count'] = {'$lt': max_positions}
+        if max_exposure is not None:
+            query['exposure'] = {'$lte': max_exposure - amount}
+        
+        claim = ObjectId()
+        now = datetime.utcnow()
+        
+        try:
+            OpenPosition.get_collection().update_one(
+                query,
+                {
+                    '$set': {
+                        field: {'symbol': symbol, 'side': side, 'amount': amount, 'claim': claim, 'claimed_at': now},
+                        'updated_at': now
+                    },
+                    '$inc': {'count': 1, 'exposure': amount}
+                },
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The user's document exists but did not match: the position is open or a limit is reached
+            return None
+        
+        return claim
+    
+    @staticmethod
+    def get_claim(user_id, symbol, side):
+        """Get the claim token of an open position
+        
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            
+        Returns:
+            ObjectId: Claim token, or None if the position is not open
+        """
+        field = OpenPosition._field(symbol, side)
+        document = OpenPosition.get_collection().find_one({'_id': user_id, field: {'$exists': True}}, {field: 1})
+        
+        return document['positions'][OpenPosition.get_key(symbol, side)].get('claim') if document else None
+    
+    @staticmethod
+    def close(user_id, symbol, side, claim=None):
+        """Close a position
+        
+        Args:
+            user_id (str): User ID
+            symbol (str): Trading symbol
+            side (str): Entry side ('buy' or 'sell')
+            claim (ObjectId, optional): Claim token the position was opened with; a
+                position claimed again since is left open (closes any claim if omitted)
+            
+        Returns:
+            bool: True if the position was closed, False otherwise
+        """
+        positions = OpenPosition.get_collection()
+        field = OpenPosition._field(symbol, side)
+        
+        query = {'_id': user_id, field: {'$exists': True}}
+        if claim is not None:
+            query[f'{field}.claim'] = claim
+        
+        document = positions.find_one(query, {field: 1})
+        if not document:
+            return False
+        
+        position = document['positions'][OpenPosition.get_key(symbol, side)]
+        
+        # Only close the claim that was read, not one made since
+        result = positions.update_one(
+            {'_id': user_id, f'{field}.claim': position.get('claim')},
+            {
+                '$unset': {field: ''},
+                '$inc': {'count': -1, 'exposure': -position['amount']},
+                '$set': {'updated_at': datetime.utcnow()}
+            }
+        )
+        
+        return result.modified_count > 0
+    
+    @staticmethod
+    def close_stale(keep, claimed_before):
+        """Close the positions no engine holds any more
+        
+        Args:
+            keep (set): (user_id, symbol, side) of the positions that are still open
+            claimed_before (datetime): Only positions claimed before this are closed,
+                sparing the claims whose entry orders may still be in flight
+            
+        Returns:
+            int: Number of positions closed
+        """
+        closed = 0
+        
+        for document in OpenPosition.get_collection().find({'count': {'$gt': 0}}, {'positions': 1}):
+            for position in document.get('positions', {}).values():
+                if (document['_id'], position['symbol'], position['side']) in keep:
+                    continue
+                
+                claimed_at = position.get('claimed_at')
+                if claimed_at is not None and claimed_at >= claimed_before:
+                    continue
+                
+                if OpenPosition.close(document['_id'], position['symbol'], position['side'], position.get('claim')):
+                    closed += 1
+        
+        return closed
+    
+    @staticmethod
+    def find_by_user(user_id):
+        """Get a user's open positions
+        
+        Args:
+            user_id (str): User ID
+            
+        Returns:
+            dict: Document with 'positions', 'count' and 'exposure', or None without open positions
+        """
+        return OpenPosition.get_collection().find_one({'_id': user_id})
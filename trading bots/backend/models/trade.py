@@ -1,7 +1,26 @@
-from flask import current_app
-from pymongo import MongoClient, DESCENDING
+import base64
+import json
+from pymongo import ASCENDING, DESCENDING
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
 from bson.objectid import ObjectId
 from datetime import datetime
+from models.count_cache import CountCache
+from models.database import get_database
+from models.trade_rollup import TradeRollup
+
+# Process-wide cache of trade counts, shared by the request threads
+_count_cache = CountCache(max_size=10000)
+
+class _ObjectIdToStr(TypeDecoder):
+    """Decodes ObjectIds straight to strings for JSON responses"""
+    bson_type = ObjectId
+    
+    def transform_bson(self, value):
+        return str(value)
+
+# Decoding options returning ObjectIds as strings while the BSON is decoded,
+# instead of converting every document afterwards
+LEAN_CODEC_OPTIONS = CodecOptions(type_registry=TypeRegistry([_ObjectIdToStr()]))
 
 class Trade:
     """Trade model for database operations"""
@@ -9,13 +28,12 @@ class Trade:
     @staticmethod
     def get_collection():
         """Get the trades collection from MongoDB"""
-        mongo_client = MongoClient(current_app.config['MONGO_URI'])
-        db = mongo_client.get_database()
+        db = get_database()
         return db.trades
     
     @staticmethod
     def create(trade_data):
-        """Create a new trade record
+        """Create a new trade record and add it to its daily rollup
         
         Args:
             trade_data (dict): Trade data including user_id, symbol, type, etc.
@@ -32,6 +50,12 @@ class Trade:
         result = trades.insert_one(trade_data)
         
         if result.inserted_id:
+            # A failed rollup update must not lose the trade; rebuild the rollups to repair it
+            try:
+                TradeRollup.apply(trade_data)
+            except Exception as e:
+                print(f"Error updating trade rollup: {str(e)}")
+            
             return result.inserted_id
         return None
     
@@ -53,45 +77,107 @@ class Trade:
             return None
     
     @staticmethod
-    def find(filters, limit=100, skip=0, sort_by='timestamp', sort_order=DESCENDING):
+    def find(filters, limit=100, skip=0, sort_by='timestamp', sort_order=DESCENDING, after=None, projection=None):
         """Find trades with filters and pagination
         
+        Trades with equal sort values are ordered by _id, so the order is
+        stable between pages. With ``after`` the page starts right after the
+        trade a cursor points to (keyset pagination): the query seeks on the
+        (user_id, timestamp, _id) index instead of skipping, so a deep page
+        costs the same as the first.
+        
+        ObjectIds (``_id`` and ``user_id``) come back as strings, converted
+        while decoding. Pass ``projection`` to fetch only the fields needed.
+        
         Args:
             filters (dict): Filter criteria
             limit (int): Maximum number of trades to return
             skip (int): Number of trades to skip
             sort_by (str): Field to sort by
             sort_order (int): Sort order (pymongo.ASCENDING or pymongo.DESCENDING)
+            after (str, optional): Cursor of the last trade of the previous page (see get_cursor)
+            projection (list or dict, optional): Fields to return (all fields if omitted)
             
         Returns:
             list: List of trade documents
+            
+        Raises:
+            ValueError: If the cursor is invalid or the sort field is not 'timestamp'
         """
-        trades = Trade.get_collection()
+        trades = Trade.get_collection().with_options(codec_options=LEAN_CODEC_OPTIONS)
+        
+        if after:
+            if sort_by != 'timestamp':
+                raise ValueError("Cursor pagination requires sorting by timestamp")
+            
+            timestamp, trade_id = Trade.decode_cursor(after)
+            operator = '$lt' if sort_order == DESCENDING else '$gt'
+            bound = '$lte' if sort_order == DESCENDING else '$gte'
+            filters = {'$and': [
+                filters,
+                {'timestamp': {bound: timestamp}},
+                {'$or': [{'timestamp': {operator: timestamp}}, {'_id': {operator: trade_id}}]}
+            ]}
+        
+        cursor = trades.find(filters, projection).sort([(sort_by, sort_order), ('_id', sort_order)]).limit(limit).skip(skip)
         
-        cursor = trades.find(filters).sort(sort_by, sort_order).limit(limit).skip(skip)
+        return list(cursor)
+    
+    @staticmethod
+    def get_cursor(trade):
+        """Get the opaque pagination cursor pointing at a trade
         
-        # Convert ObjectId to string for JSON serialization
-        result = []
-        for trade in cursor:
-            trade['_id'] = str(trade['_id'])
-            if 'user_id' in trade and isinstance(trade['user_id'], ObjectId):
-                trade['user_id'] = str(trade['user_id'])
-            result.append(trade)
+        Args:
+            trade (dict): Trade document as returned by find()
+            
+        Returns:
+            str: Cursor for find(after=...)
+        """
+        position = {'t': trade['timestamp'].isoformat(), 'id': str(trade['_id'])}
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a pagination cursor
         
-        return result
+        Args:
+            cursor (str): Cursor from get_cursor()
+            
+        Returns:
+            tuple: (timestamp, trade ObjectId)
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            return datetime.fromisoformat(position['t']), ObjectId(position['id'])
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
     
     @staticmethod
-    def count(filters):
+    def count(filters, max_age=None):
         """Count trades matching filters
         
         Args:
             filters (dict): Filter criteria
+            max_age (float, optional): Seconds a previous count of the same filters may be reused
             
         Returns:
             int: Number of matching trades
         """
+        key = json.dumps(filters, sort_keys=True, default=str)
+        
+        if max_age:
+            count = _count_cache.get(key, max_age)
+            if count is not None:
+                return count
+        
         trades = Trade.get_collection()
-        return trades.count_documents(filters)
+        count = trades.count_documents(filters)
+        _count_cache.put(key, count)
+        
+        return count
     
     @staticmethod
     def get_recent_trades(user_id, limit=10):
@@ -122,7 +208,7 @@ class Trade:
         return Trade.find({'user_id': user_id, 'symbol': symbol}, limit=limit, skip=skip)
     
     @staticmethod
-    def get_trades_by_date_range(user_id, start_date, end_date, limit=100, skip=0):
+    def get_trades_by_date_range(user_id, start_date, end_date, limit=100, skip=0, projection=None):
         """Get trades for a user within a date range
         
         Args:
@@ -131,6 +217,7 @@ class Trade:
             end_date (datetime): End date
             limit (int): Maximum number of trades to return
             skip (int): Number of trades to skip
+            projection (list or dict, optional): Fields to return (all fields if omitted)
             
         Returns:
             list: List of trade documents
@@ -141,7 +228,7 @@ class Trade:
                 '$gte': start_date,
                 '$lte': end_date
             }
-        }, limit=limit, skip=skip)
+        }, limit=limit, skip=skip, projection=projection)
     
     @staticmethod
     def get_profit_loss(user_id, start_date=None, end_date=None):
@@ -182,4 +269,135 @@ class Trade:
         
         if result:
             return result[0]['total_profit_loss']
-        return 0.0
\ No newline at end of file
+        return 0.0
+    
+    @staticmethod
+    def get_performance_stats(user_id, start_date=None, end_date=None):
+        """Aggregate a user's trade statistics in a single $group stage
+        
+        Trades without a profit_loss count as 0, as in the rest of the app.
+        
+        Args:
+            user_id (str): User ID
+            start_date (datetime, optional): Start date
+            end_date (datetime, optional): End date
+            
+        Returns:
+            dict: 'total_trades', 'profitable_trades', 'losing_trades',
+                'total_profit_loss', 'largest_profit' and 'largest_loss'
+                (all 0 if there are no trades)
+        """
+        trades = Trade.get_collection()
+        
+        # Build match stage
+        match_stage = {'user_id': user_id}
+        
+        if start_date or end_date:
+            match_stage['timestamp'] = {}
+            
+            if start_date:
+                match_stage['timestamp']['$gte'] = start_date
+            
+            if end_date:
+                match_stage['timestamp']['$lte'] = end_date
+        
+        profit_loss = {'$ifNull': ['$profit_loss', 0]}
+        
+        pipeline = [
+            {'$match': match_stage},
+            {'$group': {
+                '_id': None,
+                'total_trades': {'$sum': 1},
+                'profitable_trades': {'$sum': {'$cond': [{'$gt': [profit_loss, 0]}, 1, 0]}},
+                'losing_trades': {'$sum': {'$cond': [{'$lt': [profit_loss, 0]}, 1, 0]}},
+                'total_profit_loss': {'$sum': profit_loss},
+                'largest_profit': {'$max': profit_loss},
+                'largest_loss': {'$min': profit_loss}
+            }}
+        ]
+        
+        result = list(trades.aggregate(pipeline))
+        
+        if result and result[0]['total_trades']:
+            stats = result[0]
+            del stats['_id']
+            return stats
+        
+        return {
+            'total_trades': 0,
+            'profitable_trades': 0,
+            'losing_trades': 0,
+            'total_profit_loss': 0,
+            'largest_profit': 0,
+            'largest_loss': 0
+        }
+    
+    @staticmethod
+    def get_user_totals(start_date, user_id=None, recent_since=None):
+        """Aggregate every user's trades since a date in a single $group stage
+        
+        Args:
+            start_date (datetime): Start date
+            user_id (str, optional): Only aggregate this user's trades
+            recent_since (datetime, optional): Also list the order IDs of the
+                trades made since this time
+            
+        Returns:
+            dict: {user_id: {'trade_count', 'profit_loss', 'exposure'}}, where
+                exposure is the traded amount, plus 'recent_order_ids' if
+                recent_since is given
+        """
+        trades = Trade.get_collection()
+        
+        match_stage = {'timestamp': {'$gte': start_date}}
+        if user_id:
+            match_stage['user_id'] = user_id
+        
+        group_stage = {
+            '_id': '$user_id',
+            'trade_count': {'$sum': 1},
+            'profit_loss': {'$sum': {'$ifNull': ['$profit_loss', 0]}},
+            'exposure': {'$sum': {'$ifNull': ['$amount', 0]}}
+        }
+        if recent_since:
+            group_stage['recent_order_ids'] = {
+                '$push': {'$cond': [{'$gte': ['$timestamp', recent_since]}, '$order_id', None]}
+            }
+        
+        pipeline = [
+            {'$match': match_stage},
+            {'$group': group_stage}
+        ]
+        
+        users = {totals.pop('_id'): totals for totals in trades.aggregate(pipeline)}
+        
+        if recent_since:
+            for totals in users.values():
+                totals['recent_order_ids'] = [order_id for order_id in totals['recent_order_ids'] if order_id]
+        
+        return users
+    
+    @staticmethod
+    def get_protected_trades(start_date):
+        """Get every user's trades since a date that placed protective orders
+        
+        Args:
+            start_date (datetime): Start date
+            
+        Returns:
+            list: Trades with the fields needed to book their positions, oldest first
+        """
+        trades = Trade.get_collection().with_options(codec_options=LEAN_CODEC_OPTIONS)
+        
+        cursor = trades.find(
+            {
+                'timestamp': {'$gte': start_date},
+                '$or': [{'take_profit_order_id': {'$ne': None}}, {'stop_loss_order_id': {'$ne': None}}]
+            },
+            {
+                '_id': 0, 'user_id': 1, 'symbol': 1, 'type': 1, 'quantity': 1, 'price': 1, 'amount': 1,
+                'timestamp': 1, 'take_profit_order_id': 1, 'stop_loss_order_id': 1
+            }
+        ).sort('timestamp', ASCENDING)
+        
+        return list(cursor)
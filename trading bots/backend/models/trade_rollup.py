@@ -0,0 +1,196 @@
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from datetime import datetime, timedelta
+from models.database import get_database
+
+class TradeRollup:
+    """Daily trade rollup model for database operations
+    
+    One document per user, UTC day, symbol and bot sums up that day's trades:
+    trade count, winning and losing trades, net, gross profit and gross loss,
+    fees and the largest profit and loss. Every Trade.create updates its
+    rollup, so performance over whole days reads a few rollups instead of
+    every trade. Trades without a profit_loss count as 0.
+    """
+    
+    @staticmethod
+    def get_collection():
+        """Get the trade rollups collection from MongoDB"""
+        db = get_database()
+        return db.trade_rollups
+    
+    @staticmethod
+    def get_day(timestamp):
+        """Get the UTC day a timestamp falls on
+        
+        Args:
+            timestamp (datetime): Timestamp
+            
+        Returns:
+            datetime: Midnight of the day
+        """
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    @staticmethod
+    def apply(trade):
+        """Add a new trade to its daily rollup
+        
+        Args:
+            trade (dict): Trade document
+        """
+        rollups = TradeRollup.get_collection()
+        profit_loss = trade.get('profit_loss') or 0
+        
+        rollups.update_one(
+            {
+                'user_id': trade['user_id'],
+                'day': TradeRollup.get_day(trade['timestamp']),
+                'symbol': trade.get('symbol'),
+                'bot_id': trade.get('bot_id')
+            },
+            {
+                '$inc': {
+                    'trade_count': 1,
+                    'wins': 1 if profit_loss > 0 else 0,
+                    'losses': 1 if profit_loss < 0 else 0,
+                    'profit_loss': profit_loss,
+                    'gross_profit': max(profit_loss, 0),
+                    'gross_loss': min(profit_loss, 0),
+                    'fees': trade.get('fee') or 0
+                },
+                '$max': {'largest_profit': profit_loss},
+                '$min': {'largest_loss': profit_loss},
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    def rebuild(user_id=None, batch_size=1000, settle_seconds=300):
+        """Recompute rollups from the raw trades (backfill)
+        
+        Only days before the current one are rebuilt: new trades only ever
+        update the current day's rollups, so the rebuild never races with
+        Trade.create and can run while the engine trades. Fresh values
+        overwrite the rollups in place and rollups without trades are deleted
+        afterwards, so readers never see missing days while it runs.
+        
+        Args:
+            user_id (str, optional): Only rebuild this user's rollups
+            batch_size (int): Rollups written per bulk write
+            settle_seconds (float): Seconds after midnight before the previous day is rebuilt,
+                so trades still being stored for it are included
+            
+        Returns:
+            int: Number of rollups written
+        """
+        trades = get_database().trades
+        rollups = TradeRollup.get_collection()
+        profit_loss = {'$ifNull': ['$profit_loss', 0]}
+        
+        now = datetime.utcnow()
+        cutoff = TradeRollup.get_day(now - timedelta(seconds=settle_seconds))
+        rebuild_id = ObjectId()  # Marks the rollups written by this rebuild
+        
+        match_stage = {'timestamp': {'$lt': cutoff}}
+        if user_id:
+            match_stage['user_id'] = user_id
+        
+        pipeline = [
+            {'$match': match_stage},
+            {'$group': {
+                '_id': {
+                    'user_id': '$user_id',
+                    'day': {'$dateFromParts': {
+                        'year': {'$year': '$timestamp'},
+                        'month': {'$month': '$timestamp'},
+                        'day': {'$dayOfMonth': '$timestamp'}
+                    }},
+                    'symbol': '$symbol',
+                    'bot_id': '$bot_id'
+                },
+                'trade_count': {'$sum': 1},
+                'wins': {'$sum': {'$cond': [{'$gt': [profit_loss, 0]}, 1, 0]}},
+                'losses': {'$sum': {'$cond': [{'$lt': [profit_loss, 0]}, 1, 0]}},
+                'profit_loss': {'$sum': profit_loss},
+                'gross_profit': {'$sum': {'$max': [profit_loss, 0]}},
+                'gross_loss': {'$sum': {'$min': [profit_loss, 0]}},
+                'fees': {'$sum': {'$ifNull': ['$fee', 0]}},
+                'largest_profit': {'$max': profit_loss},
+                'largest_loss': {'$min': profit_loss}
+            }}
+        ]
+        
+        written = 0
+        batch = []
+        
+        for group in trades.aggregate(pipeline, allowDiskUse=True):
+            key = group.pop('_id')
+            key.setdefault('symbol', None)
+            key.setdefault('bot_id', None)
+            group['updated_at'] = now
+            group['rebuild_id'] = rebuild_id
+            batch.append(UpdateOne(key, {'$set': group}, upsert=True))
+            
+            if len(batch) >= batch_size:
+                result = rollups.bulk_write(batch, ordered=False)
+                written += result.upserted_count + result.matched_count
+                batch = []
+        
+        if batch:
+            result = rollups.bulk_write(batch, ordered=False)
+            written += result.upserted_count + result.matched_count
+        
+        # Drop the rebuilt days' rollups this rebuild did not write (their trades are gone)
+        stale = {'day': {'$lt': cutoff}, 'rebuild_id': {'$ne': rebuild_id}}
+        if user_id:
+            stale['user_id'] = user_id
+        rollups.delete_many(stale)
+        
+        return written
+    
+    @staticmethod
+    def get_performance_stats(user_id, start_day=None):
+        """Aggregate a user's rollups from a day onwards
+        
+        Args:
+            user_id (str): User ID
+            start_day (datetime, optional): First day included (all days if omitted)
+            
+        Returns:
+            dict: Same keys as Trade.get_performance_stats (all 0 if there are no trades)
+        """
+        rollups = TradeRollup.get_collection()
+        
+        match_stage = {'user_id': user_id}
+        if start_day:
+            match_stage['day'] = {'$gte': start_day}
+        
+        pipeline = [
+            {'$match': match_stage},
+            {'$group': {
+                '_id': None,
+                'total_trades': {'$sum': '$trade_count'},
+                'profitable_trades': {'$sum': '$wins'},
+                'losing_trades': {'$sum': '$losses'},
+                'total_profit_loss': {'$sum': '$profit_loss'},
+                'largest_profit': {'$max': '$largest_profit'},
+                'largest_loss': {'$min': '$largest_loss'}
+            }}
+        ]
+        
+        result = list(rollups.aggregate(pipeline))
+        
+        if result and result[0]['total_trades']:
+            stats = result[0]
+            del stats['_id']
+            return stats
+        
+        return {
+            'total_trades': 0,
+            'profitable_trades': 0,
+            'losing_trades': 0,
+            'total_profit_loss': 0,
+            'largest_profit': 0,
+            'largest_loss': 0
+        }
@@ -1,7 +1,18 @@
-from flask import current_app
-from pymongo import MongoClient
+import copy
 from bson.objectid import ObjectId
 from datetime import datetime
+from flask import current_app
+from models.database import get_database
+from models.user_cache import UserCache
+
+# Seconds of clock skew and write latency between processes the cache sync tolerates
+CACHE_SYNC_MARGIN = 5
+
+# Seconds a deleted user's tombstone is kept for the cache syncs of other processes
+TOMBSTONE_TTL = 3600
+
+# Process-wide cache of user documents, created on first use
+_cache = None
 
 class User:
     """User model for database operations"""
@@ -9,10 +20,58 @@ class User:
     @staticmethod
     def get_collection():
         """Get the users collection from MongoDB"""
-        mongo_client = MongoClient(current_app.config['MONGO_URI'])
-        db = mongo_client.get_database()
+        db = get_database()
         return db.users
     
+    @staticmethod
+    def get_tombstone_collection():
+        """Get the collection of deleted users' tombstones from MongoDB"""
+        db = get_database()
+        return db.user_tombstones
+    
+    @staticmethod
+    def get_cache():
+        """Get the process-wide user cache, configured from the current app
+        
+        Returns:
+            UserCache: Shared cache
+        """
+        global _cache
+        
+        if _cache is None:
+            config = current_app.config
+            _cache = UserCache(
+                max_size=config.get('USER_CACHE_SIZE', 10000),
+                ttl=config.get('USER_CACHE_TTL', 60),
+                sync_interval=config.get('USER_CACHE_SYNC_INTERVAL', 1)
+            )
+        
+        return _cache
+    
+    @staticmethod
+    def _sync_cache(cache):
+        """Invalidate cached users that other processes updated or deleted since the last sync
+        
+        Args:
+            cache (UserCache): User cache
+        """
+        previous = cache.start_sync()
+        if previous is None:
+            return
+        
+        since = datetime.utcfromtimestamp(previous - CACHE_SYNC_MARGIN)
+        
+        try:
+            for user in User.get_collection().find({'updated_at': {'$gte': since}}, {'_id': 1}):
+                cache.invalidate(str(user['_id']))
+            
+            # Deleted users no longer have a document; their tombstones carry the stamp
+            for tombstone in User.get_tombstone_collection().find({'updated_at': {'$gte': since}}, {'_id': 1}):
+                cache.invalidate(str(tombstone['_id']))
+        except Exception as e:
+            print(f"Error syncing user cache: {str(e)}")
+            cache.clear()
+    
     @staticmethod
     def create(user_data):
         """Create a new user
@@ -36,21 +95,41 @@ class User:
         return None
     
     @staticmethod
-    def find_by_id(user_id):
+    def find_by_id(user_id, cached=True):
         """Find a user by ID
         
+        Served from the user cache when possible. Callers get their own copy
+        and may modify it.
+        
         Args:
             user_id (str): User ID
+            cached (bool): Allow a cached document (False forces a read,
+                e.g. before a read-modify-write)
             
         Returns:
             dict: User document, or None if not found
         """
+        user_id = str(user_id)
+        cache = User.get_cache()
+        
+        if cached:
+            User._sync_cache(cache)
+            user = cache.get(user_id)
+            if user is not None:
+                return copy.deepcopy(user)
+        
         users = User.get_collection()
         
         try:
-            return users.find_one({'_id': ObjectId(user_id)})
+            user = users.find_one({'_id': ObjectId(user_id)})
         except:
             return None
+        
+        if user is not None:
+            cache.put(user_id, user)
+            user = copy.deepcopy(user)
+        
+        return user
     
     @staticmethod
     def find_by_email(email):
@@ -102,11 +181,18 @@ class User:
             return result.modified_count > 0
         except:
             return False
+        finally:
+            # Other processes see the new updated_at on their next cache sync
+            User.get_cache().invalidate(str(user_id))
     
     @staticmethod
     def delete(user_id):
         """Delete a user
         
+        Leaves a tombstone stamped with the deletion time, so the cache syncs
+        of other processes drop the user too. Tombstones are purged by a TTL
+        index after TOMBSTONE_TTL seconds (see models/indexes.py).
+        
         Args:
             user_id (str): User ID
             
@@ -117,9 +203,19 @@ class User:
         
         try:
             result = users.delete_one({'_id': ObjectId(user_id)})
-            return result.deleted_count > 0
+            if result.deleted_count == 0:
+                return False
+            
+            User.get_tombstone_collection().update_one(
+                {'_id': ObjectId(user_id)},
+                {'$set': {'updated_at': datetime.utcnow()}},
+                upsert=True
+            )
+            return True
         except:
             return False
+        finally:
+            User.get_cache().invalidate(str(user_id))
     
     @staticmethod
     def list_all(limit=100, skip=0):
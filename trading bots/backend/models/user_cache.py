@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class UserCache:
+    """Bounded LRU cache of user documents with a time to live
+
+    Holds the documents User.find_by_id reads on every risk check and
+    notification. Entries expire after ttl seconds; the least recently used
+    entry is evicted when max_size is reached. Writes through User.update
+    and User.delete invalidate the entry in this process; writes from other
+    processes are picked up by the periodic sync User.find_by_id runs against
+    the updated_at stamps of the users and of deleted users' tombstones.
+    """
+
+    def __init__(self, max_size=10000, ttl=60, sync_interval=1):
+        """Initialize the user cache
+
+        Args:
+            max_size (int): Maximum cached users (0 disables caching)
+            ttl (float): Seconds a cached user is served without a reload
+            sync_interval (float): Minimum seconds between syncs with other processes
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.entries = OrderedDict()  # {user_id: (user, cached at)}, least recently used first
+        self.synced_at = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.syncs = 0
+        self._lock = Lock()
+
+    def get(self, user_id):
+        """Get a fresh cached user
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            dict: Cached user document, or None on a miss
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None or now - entry[1] > self.ttl:
+                if entry is not None:
+                    del self.entries[user_id]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user_id, user):
+        """Cache a user document, evicting the least recently used users if full
+
+        Args:
+            user_id (str): User ID
+            user (dict): User document
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self.entries[user_id] = (user, time.time())
+            self.entries.move_to_end(user_id)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        """Drop a user from the cache
+
+        Args:
+            user_id (str): User ID
+        """
+        with self._lock:
+            if self.entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached user"""
+        with self._lock:
+            self.entries.clear()
+
+    def start_sync(self):
+        """Claim the next sync with other processes if one is due
+
+        Only one caller gets the sync; the others keep using the cache.
+
+        Returns:
+            float: Unix time of the previous sync, or None if no sync is due
+        """
+        now = time.time()
+
+        with self._lock:
+            if now - self.synced_at < self.sync_interval:
+                return None
+
+            previous = self.synced_at
+            self.synced_at = now
+
+            # Nothing cached that could be stale
+            if not self.entries:
+                return None
+
+            self.syncs += 1
+            return previous
+
+    def get_stats(self):
+        """Get cache statistics
+
+        Returns:
+            dict: Cached user count, hits, misses, hit ratio, evictions, invalidations and syncs
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            'users': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'syncs': self.syncs
+        }
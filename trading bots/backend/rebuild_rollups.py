@@ -0,0 +1,37 @@
+"""Rebuild the daily trade rollups from the raw trades
+
+Backfills rollups for trades recorded before rollups existed and repairs
+rollups that missed an update. Days before the current one are rebuilt;
+the current day is kept up to date by every stored trade, so the rebuild
+can run while the engine trades.
+
+Usage:
+    python rebuild_rollups.py [--user USER_ID]
+"""
+import argparse
+import time
+
+from flask import Flask
+from dotenv import load_dotenv
+
+from config.config import get_config
+from models.trade_rollup import TradeRollup
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user', help='only rebuild this user\'s rollups')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(get_config())
+
+    with app.app_context():
+        started_at = time.time()
+        written = TradeRollup.rebuild(args.user)
+        print(f"Rebuilt {written} rollups in {time.time() - started_at:.1f}s")
+
+if __name__ == '__main__':
+    main()
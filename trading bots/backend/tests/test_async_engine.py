@@ -0,0 +1,71 @@
+import time
+
+import mongomock
+import pytest
+
+from bot_engine.async_trading_engine import AsyncTradingEngine
+from bot_engine.candle_buffer import CandleBuffer
+from bot_engine.strategies.rsi_strategy import RSIStrategy
+from models.bot import Bot
+
+HOUR_MS = 3600 * 1000
+
+BOT_CONFIG = {'id': 'bot-1', 'user_id': 'user-1', 'symbol': 'BTC/USDT', 'strategy': 'rsi', 'interval': '1h',
+              'amount': 10.0, 'take_profit': 4.0, 'stop_loss': 2.0, 'is_running': True}
+
+def make_candles(count):
+    start = (int(time.time() * 1000) // HOUR_MS - count) * HOUR_MS
+    return [[start + index * HOUR_MS, 100.0, 101.0, 99.0, 100.0 + (index % 7) - 3, 1.0] for index in range(count)]
+
+@pytest.fixture
+def engine(monkeypatch):
+    collection = mongomock.MongoClient().db.bots
+    monkeypatch.setattr(Bot, 'get_collection', staticmethod(lambda: collection))
+
+    engine = AsyncTradingEngine(persist_bots=True)
+    yield engine
+    engine.close()
+
+def test_restored_bot_resumes_its_strategy_state(engine):
+    candles = make_candles(60)
+    buffer = CandleBuffer('BTC/USDT', '1h')
+    buffer.extend(candles)
+    engine.markets[('BTC/USDT', '1h')] = {'buffer': buffer, 'lock': None, 'fetched_at': time.time(), 'fetch_count': 1}
+
+    strategy = RSIStrategy()
+    strategy.update_closed(candles[:50], '1h', time.time() * 1000)
+    state = strategy.get_state()
+
+    engine._call(engine._start_bot(dict(BOT_CONFIG), {'last_acted_bar': None, 'strategy': state}))
+
+    assert engine.active_bots['bot-1']['strategy'].get_state() == state
+
+def test_checkpoint_saves_the_strategy_state(engine):
+    Bot.get_collection().insert_one({'_id': 'bot-1', 'status': 'running'})
+    engine._call(engine._start_bot(dict(BOT_CONFIG)))
+
+    strategy = RSIStrategy()
+    strategy.update_closed(make_candles(30), '1h', time.time() * 1000)
+    engine.active_bots['bot-1']['state'] = {'last_acted_bar': None, 'strategy': strategy.get_state()}
+
+    assert engine.checkpoint_bots() == 1
+    saved = Bot.get_collection().find_one({'_id': 'bot-1'})['state']['strategy']
+    assert saved['last_timestamp'] == strategy.last_timestamp
+    assert saved['current_values'] == strategy.get_state()['current_values']
+    # Unchanged state is not written again
+    assert engine.checkpoint_bots() == 0
+
+def test_last_bot_stopping_drops_its_market(engine):
+    buffer = CandleBuffer('BTC/USDT', '1h')
+    buffer.extend(make_candles(60))
+    engine.markets[('BTC/USDT', '1h')] = {'buffer': buffer, 'lock': None, 'fetched_at': time.time(), 'fetch_count': 1}
+    engine._call(engine._start_bot(dict(BOT_CONFIG)))
+    engine._call(engine._start_bot(dict(BOT_CONFIG, id='bot-2')))
+    assert engine.get_volatility('BTC/USDT', '1h') is not None
+
+    engine._call(engine._stop_bot('user-1', 'bot-1'))
+    assert ('BTC/USDT', '1h') in engine.markets
+
+    engine._call(engine._stop_bot('user-1', 'bot-2'))
+    assert ('BTC/USDT', '1h') not in engine.markets
+    assert engine.volatility.get_stats()['estimates'] == 0
@@ -0,0 +1,24 @@
+from models.count_cache import CountCache
+
+def test_evicts_the_least_recently_used_count():
+    cache = CountCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a', max_age=60) == 1
+
+    cache.put('c', 3)
+
+    assert cache.get('b', max_age=60) is None
+    assert cache.get('a', max_age=60) == 1
+    assert cache.get('c', max_age=60) == 3
+    assert cache.get_stats()['evictions'] == 1
+
+def test_counts_older_than_max_age_miss(monkeypatch):
+    cache = CountCache()
+    monkeypatch.setattr('models.count_cache.time.time', lambda: 1000.0)
+    cache.put('a', 1)
+
+    monkeypatch.setattr('models.count_cache.time.time', lambda: 1030.0)
+
+    assert cache.get('a', max_age=60) == 1
+    assert cache.get('a', max_age=30) is None
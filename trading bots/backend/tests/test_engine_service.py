@@ -0,0 +1,32 @@
+import os
+import stat
+
+import pytest
+
+from bot_engine import engine_service
+from bot_engine.engine_service import EngineServer, create_trading_engine
+
+@pytest.fixture(autouse=True)
+def no_engines(monkeypatch):
+    def build(*args, **kwargs):
+        raise AssertionError("an engine was created")
+
+    for name in ('TradingEngine', 'AsyncTradingEngine', 'ShardedTradingEngine'):
+        monkeypatch.setattr(engine_service, name, build)
+
+@pytest.mark.parametrize('engine_type', ['async', 'sharded'])
+def test_leases_require_the_threaded_engine(engine_type):
+    with pytest.raises(ValueError, match='threaded engine'):
+        create_trading_engine({'TRADING_ENGINE': engine_type, 'ENGINE_LEASES': True, 'RESTORE_BOTS': False})
+
+def test_leases_cannot_restore_bots():
+    with pytest.raises(ValueError, match='RESTORE_BOTS'):
+        create_trading_engine({'TRADING_ENGINE': 'threaded', 'ENGINE_LEASES': True, 'RESTORE_BOTS': True})
+
+def test_socket_is_created_without_access_for_other_users(tmp_path):
+    server = EngineServer(object(), str(tmp_path / 'engine.sock'))
+    server.start()
+    try:
+        assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o660
+    finally:
+        server.stop()
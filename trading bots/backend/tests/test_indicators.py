@@ -0,0 +1,100 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bot_engine.indicators import EMA, MACD, RSI
+from bot_engine.strategies.ema_crossover_strategy import EMACrossoverStrategy
+from bot_engine.strategies.macd_strategy import MACDStrategy
+from bot_engine.strategies.rsi_strategy import RSIStrategy
+
+HOUR_MS = 3600 * 1000
+START_MS = 1600000000000 // HOUR_MS * HOUR_MS
+
+def make_candles(count=200):
+    candles = []
+    for index in range(count):
+        close = 100 + 10 * math.sin(index / 5) + 3 * math.sin(index / 1.7) + 0.05 * index
+        candles.append([START_MS + index * HOUR_MS, close - 0.5, close + 1.0, close - 1.0, close, 10.0 + index % 3])
+    return candles
+
+CANDLES = make_candles()
+
+def to_frame(candles):
+    return pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+def assert_close(streamed, vectorized):
+    np.testing.assert_allclose(np.array(streamed, dtype=float), np.array(vectorized, dtype=float),
+                               rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_ema_matches_pandas():
+    ema = EMA(9)
+    streamed = [ema.update(candle[4]) for candle in CANDLES]
+
+    assert_close(streamed, to_frame(CANDLES)['close'].ewm(span=9, adjust=False).mean())
+
+def test_rsi_matches_vectorized_rsi():
+    rsi = RSI(14)
+    streamed = [rsi.update(candle[4]) for candle in CANDLES]
+
+    strategy = RSIStrategy()
+    assert_close(streamed, strategy._calculate_rsi(to_frame(CANDLES)['close'], 14))
+
+def test_macd_matches_vectorized_macd():
+    macd = MACD(12, 26, 9)
+    streamed = [macd.update(candle[4]) for candle in CANDLES]
+
+    vectorized = MACDStrategy()._calculate_macd(to_frame(CANDLES)['close'], 12, 26, 9)
+    for index in range(3):
+        assert_close([values[index] for values in streamed], vectorized[index])
+
+def test_revising_the_current_bar_matches_its_final_close():
+    revised = MACD(12, 26, 9)
+    for candle in CANDLES:
+        revised.update(candle[1], new_bar=True)
+        revised.update(candle[4], new_bar=False)
+
+    direct = MACD(12, 26, 9)
+    for candle in CANDLES:
+        direct.update(candle[4])
+
+    assert_close(revised.value, direct.value)
+
+@pytest.mark.parametrize('strategy_class', [EMACrossoverStrategy, RSIStrategy, MACDStrategy])
+def test_closed_bar_signals_match_generate_signals(strategy_class):
+    expected = strategy_class().generate_signals(to_frame(CANDLES))['signal'].tolist()
+    assert any(expected)
+
+    strategy = strategy_class()
+    signals = []
+
+    # Each poll sees the candles so far, the newest still in progress
+    for index in range(1, len(CANDLES)):
+        now_ms = CANDLES[index][0] + HOUR_MS // 2
+        signal, signal_bar = strategy.update_closed(CANDLES[:index + 1], '1h', now_ms)
+        assert signal_bar == CANDLES[index - 1][0]
+        signals.append(signal)
+
+    assert signals == expected[:-1]
+
+@pytest.mark.parametrize('strategy_class', [EMACrossoverStrategy, RSIStrategy, MACDStrategy])
+def test_restored_state_continues_the_series(strategy_class):
+    expected = strategy_class().generate_signals(to_frame(CANDLES))['signal'].tolist()
+    middle = len(CANDLES) // 2
+
+    strategy = strategy_class()
+    signals = [strategy.update(candle) for candle in CANDLES[:middle]]
+
+    # The state goes through the same JSON-like round trip as the bots collection
+    state = json.loads(json.dumps(strategy.get_state()))
+    restored = strategy_class()
+    restored.set_state(state)
+    signals += [restored.update(candle) for candle in CANDLES[middle:]]
+
+    uninterrupted = strategy_class()
+    uninterrupted.update_many(CANDLES)
+
+    assert signals == expected
+    assert_close(restored._current_values, uninterrupted._current_values)
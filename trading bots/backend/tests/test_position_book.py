@@ -0,0 +1,131 @@
+import queue
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from bot_engine.position_book import PositionBook
+from bot_engine.risk_manager import RiskManager
+from bot_engine.sharded_engine import ShardEngine
+from models.open_position import OpenPosition
+from models.user import User
+
+USER = {'_id': 'user-1', 'account_balance': 1000.0,
+        'settings': {'risk_management': {'max_open_positions': 2, 'max_open_exposure': 25.0, 'max_trade_size': 50.0,
+                                               'max_trades_per_day': 100}}}
+
+@pytest.fixture
+def shards(monkeypatch):
+    collection = mongomock.MongoClient().db.open_positions
+    monkeypatch.setattr(OpenPosition, 'get_collection', staticmethod(lambda: collection))
+    monkeypatch.setattr(User, 'find_by_id', staticmethod(lambda user_id: USER if user_id == USER['_id'] else None))
+
+    engines = [ShardEngine(queue.Queue(), shared_positions=True) for _ in range(2)]
+    for engine in engines:
+        engine.risk_ledger.ready = True
+
+    yield engines
+
+    for engine in engines:
+        engine.close()
+
+def can_trade(engine, symbol, amount=100.0):
+    return RiskManager(USER['_id'], ledger=engine.risk_ledger, positions=engine.positions).can_trade(
+        USER['_id'], symbol, amount, True, reserve=True
+    )
+
+def test_max_open_positions_hold_across_shards(shards):
+    first, second = shards
+
+    assert can_trade(first, 'BTC/USDT')
+    assert can_trade(second, 'ETH/USDT')
+    # Each shard holds one position, but the user's limit of two is reached
+    assert not can_trade(first, 'SOL/USDT')
+    assert not can_trade(second, 'XRP/USDT')
+
+    # Closing a position on one shard frees the slot on the other
+    first.positions.add_fill(USER['_id'], 'BTC/USDT', 'buy', 1.0, 100.0, 100.0, ('tp-1', 'sl-1'), timestamp=1)
+    first.positions.reconcile('BTC/USDT', set(), as_of=2)
+    assert can_trade(second, 'SOL/USDT')
+
+def test_same_position_and_exposure_hold_across_shards(shards):
+    first, second = shards
+
+    assert can_trade(first, 'BTC/USDT', 200.0)
+    assert not can_trade(second, 'BTC/USDT', 10.0)
+    # 200 + 60 exceeds the open exposure limit of 25% of the balance
+    assert not can_trade(second, 'ETH/USDT', 60.0)
+
+    # A failed order frees its reservation everywhere
+    first.positions.release(USER['_id'], 'BTC/USDT', 'buy')
+    assert second.positions.count(USER['_id']) == 0
+    assert can_trade(second, 'ETH/USDT', 60.0)
+
+def can_trade_batch(engine, *symbols):
+    intents = [{'bot_id': f'bot-{symbol}', 'user_id': USER['_id'], 'symbol': symbol, 'amount': 100.0, 'is_buy': True}
+               for symbol in symbols]
+    return RiskManager(ledger=engine.risk_ledger, positions=engine.positions).can_trade_batch(intents, reserve=True)
+
+def test_batches_claim_the_positions_they_allow(shards):
+    first, second = shards
+
+    # One of the user's two slots is taken; the next batch gets the last one
+    assert can_trade(first, 'BTC/USDT')
+    assert can_trade_batch(first, 'ETH/USDT', 'SOL/USDT') == [True, False]
+
+    # The following batches see the claimed position while its order is in flight
+    assert can_trade_batch(first, 'SOL/USDT') == [False]
+    assert can_trade_batch(second, 'XRP/USDT') == [False]
+
+    # A failed order frees the slot for the next batch
+    first.positions.release(USER['_id'], 'ETH/USDT', 'buy')
+    assert can_trade_batch(second, 'XRP/USDT') == [True]
+
+def test_a_stale_closer_leaves_a_new_claim_open(shards):
+    first, _ = shards
+
+    claim = OpenPosition.claim(USER['_id'], 'BTC/USDT', 'buy', 100.0)
+    assert OpenPosition.close(USER['_id'], 'BTC/USDT', 'buy', claim)
+
+    # Claimed again with the same amount: the old claim no longer closes it
+    assert OpenPosition.claim(USER['_id'], 'BTC/USDT', 'buy', 100.0) not in (None, claim)
+    assert not OpenPosition.close(USER['_id'], 'BTC/USDT', 'buy', claim)
+    assert first.positions.has(USER['_id'], 'BTC/USDT', 'buy')
+
+def test_restore_closes_shared_positions_of_a_crashed_engine(shards):
+    first, second = shards
+
+    # The crashed engine held two positions; only ETH/USDT was filled and recorded
+    assert can_trade(first, 'BTC/USDT')
+    assert can_trade(first, 'ETH/USDT')
+    OpenPosition.get_collection().update_one(
+        {'_id': USER['_id']}, {'$set': {'positions.BTC/USDT|buy.claimed_at': datetime.utcnow() - timedelta(hours=1),
+                                        'positions.ETH/USDT|buy.claimed_at': datetime.utcnow() - timedelta(hours=1)}}
+    )
+    trades = [{'user_id': USER['_id'], 'symbol': 'ETH/USDT', 'type': 'buy', 'quantity': 1.0, 'price': 100.0,
+               'amount': 100.0, 'timestamp': datetime.utcnow(), 'take_profit_order_id': 'tp-1', 'stop_loss_order_id': 'sl-1'}]
+
+    second.positions.restore(trades)
+
+    assert second.positions.count(USER['_id']) == 1
+    assert not second.positions.has(USER['_id'], 'BTC/USDT', 'buy')
+
+    # The restored position took over the shared claim and closes it
+    second.positions.reconcile('ETH/USDT', set(), as_of=time.time() + 1)
+    assert second.positions.count(USER['_id']) == 0
+
+def test_reconcile_closes_unprotected_positions_but_not_reservations():
+    book = PositionBook()
+    book.add_fill('user-1', 'BTC/USDT', 'buy', 1.0, 100.0, 100.0, (None, None), timestamp=time.time() - 60)
+    book.add_fill('user-1', 'ETH/USDT', 'buy', 1.0, 100.0, 100.0, ('tp-1', 'sl-1'), timestamp=time.time() - 60)
+    assert book.reserve('user-1', 'BTC/USDT', 'sell', 50.0)
+
+    # Both protective legs of BTC/USDT failed: nothing on the exchange keeps it open
+    closed = book.reconcile('BTC/USDT', set(), as_of=time.time())
+    book.reconcile('ETH/USDT', {'sl-1'}, as_of=time.time())
+
+    assert [(position['symbol'], position['side']) for position in closed] == [('BTC/USDT', 'buy')]
+    assert book.has('user-1', 'BTC/USDT', 'sell')
+    assert book.has('user-1', 'ETH/USDT', 'buy')
+    assert book.get_stats() == {'users': 1, 'positions': 2, 'opened': 3, 'closed': 1}
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from bot_engine.async_trading_engine import AsyncTradingEngine
+from bot_engine.risk_ledger import RiskLedger
+from bot_engine.trading_engine import TradingEngine
+from models.trade import Trade
+
+def make_trade(order_id, amount, user_id='user-1'):
+    return {'user_id': user_id, 'order_id': order_id, 'amount': amount, 'timestamp': datetime.utcnow()}
+
+def test_rebuild_replays_trade_recorded_during_aggregation(monkeypatch):
+    ledger = RiskLedger()
+    stored = make_trade('order-1', 100.0)
+    ledger.record(stored)
+
+    def get_user_totals(start_date, user_id=None, recent_since=None):
+        # Another trade is executed while the aggregation reads the collection
+        ledger.record(make_trade('order-2', 50.0))
+        return {'user-1': {'trade_count': 1, 'profit_loss': 0.0, 'exposure': 100.0, 'recent_order_ids': ['order-1']}}
+
+    monkeypatch.setattr(Trade, 'get_user_totals', get_user_totals)
+    ledger.rebuild()
+
+    assert ledger.get('user-1') == {'trade_count': 2, 'profit_loss': 0.0, 'exposure': 150.0}
+    assert ledger.get_stats()['replayed'] == 1
+
+def test_rebuild_does_not_count_stored_trades_twice(monkeypatch):
+    ledger = RiskLedger()
+    ledger.record(make_trade('order-1', 100.0))
+    ledger.record(make_trade('order-2', 50.0))
+
+    monkeypatch.setattr(Trade, 'get_user_totals', lambda start_date, user_id=None, recent_since=None: {
+        'user-1': {'trade_count': 2, 'profit_loss': 0.0, 'exposure': 150.0, 'recent_order_ids': ['order-1', 'order-2']},
+        'user-2': {'trade_count': 1, 'profit_loss': -5.0, 'exposure': 20.0, 'recent_order_ids': ['order-3']}
+    })
+    ledger.rebuild()
+
+    assert ledger.get('user-1') == {'trade_count': 2, 'profit_loss': 0.0, 'exposure': 150.0}
+    assert ledger.get('user-2') == {'trade_count': 1, 'profit_loss': -5.0, 'exposure': 20.0}
+    assert ledger.get_stats()['replayed'] == 0
+
+@pytest.mark.parametrize('engine_class', [TradingEngine, AsyncTradingEngine])
+def test_trade_counts_when_storing_it_fails(monkeypatch, engine_class):
+    def create(trade):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(Trade, 'create', staticmethod(create))
+    engine = engine_class()
+    engine.risk_ledger.ready = True
+    try:
+        bot_config = {'id': 'bot-1', 'user_id': 'user-1', 'symbol': 'BTC/USDT'}
+        trade_result = {'side': 'buy', 'amount': 100.0, 'price': 50000.0, 'quantity': 0.002, 'fee': 0.1,
+                        'order_id': 'order-1'}
+
+        with pytest.raises(RuntimeError):
+            engine._record_trade(bot_config, 'buy', trade_result)
+
+        assert engine.risk_ledger.get('user-1')['trade_count'] == 1
+        assert engine.risk_ledger.get('user-1')['exposure'] == 100.0
+    finally:
+        engine.close()
@@ -0,0 +1,73 @@
+import pytest
+
+from bot_engine.risk_manager import RiskManager
+from models.user import User
+
+RISK_SETTINGS = {'max_trade_size': 50.0}
+
+class FixedVolatility:
+    """Market data returning one volatility estimate for every market"""
+
+    def __init__(self, estimate):
+        self.estimate = estimate
+
+    def get_volatility(self, symbol, interval, period=14):
+        return self.estimate
+
+@pytest.fixture(autouse=True)
+def no_user_reads(monkeypatch):
+    def find_by_id(user_id, cached=True):
+        raise AssertionError("position sizing read the user")
+
+    monkeypatch.setattr(User, 'find_by_id', staticmethod(find_by_id))
+
+def test_size_uses_the_bot_stop_loss():
+    risk_manager = RiskManager(market_data=FixedVolatility({'atr_pct': 0.01, 'realized_volatility': 0.02}))
+
+    # Losing 2% at a 4% stop risks 1% of the balance
+    size = risk_manager.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, interval='1h', stop_loss=4.0)
+    assert size == pytest.approx(250.0)
+
+def test_size_falls_back_to_volatility_without_stop_loss():
+    risk_manager = RiskManager(market_data=FixedVolatility({'atr_pct': 0.01, 'realized_volatility': 0.02}))
+
+    assert risk_manager.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, interval='1h') == pytest.approx(500.0)
+    assert risk_manager.size_position(
+        1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, interval='1h', method='realized'
+    ) == pytest.approx(250.0)
+
+def test_higher_volatility_sizes_down_a_bot_with_the_default_stop():
+    calm = RiskManager(market_data=FixedVolatility({'atr_pct': 0.005, 'realized_volatility': 0.005}))
+    volatile = RiskManager(market_data=FixedVolatility({'atr_pct': 0.02, 'realized_volatility': 0.02}))
+
+    # A 1% stop is inside the 2% default stop loss; a 4% stop is wider and halves the size
+    calm_size = calm.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, interval='1h', stop_loss=2.0)
+    volatile_size = volatile.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, interval='1h', stop_loss=2.0)
+    assert calm_size == pytest.approx(500.0)
+    assert volatile_size == pytest.approx(250.0)
+
+def test_calculate_position_size_reads_the_user(monkeypatch):
+    user = {'account_balance': 1000.0, 'settings': {'risk_management': dict(RISK_SETTINGS)}}
+    monkeypatch.setattr(User, 'find_by_id', staticmethod(lambda user_id, cached=True: user if user_id == 'user-1' else None))
+    risk_manager = RiskManager()
+
+    assert risk_manager.calculate_position_size('user-1', 'BTC/USDT', 1.0) == pytest.approx(10.0)
+    assert risk_manager.calculate_position_size('user-1', 'BTC/USDT', 1.0, stop_loss=4.0) == pytest.approx(250.0)
+    assert risk_manager.calculate_position_size('user-2', 'BTC/USDT', 1.0) == 0
+
+def test_size_is_capped_at_max_trade_size():
+    risk_manager = RiskManager()
+
+    assert risk_manager.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0, stop_loss=0.5) == pytest.approx(500.0)
+    # Without a stop distance the risk amount itself is traded
+    assert risk_manager.size_position(1000.0, RISK_SETTINGS, 'BTC/USDT', 1.0) == pytest.approx(10.0)
+
+def test_trade_amount_is_sized_only_with_risk_per_trade():
+    risk_manager = RiskManager()
+    bot_config = {'symbol': 'BTC/USDT', 'interval': '1h', 'amount': 100.0, 'stop_loss': 2.0}
+    user = {'account_balance': 1000.0, 'settings': {'risk_management': dict(RISK_SETTINGS)}}
+
+    assert risk_manager.get_trade_amount(user, bot_config) == 100.0
+
+    user['settings']['risk_management']['risk_per_trade'] = 0.5
+    assert risk_manager.get_trade_amount(user, bot_config) == pytest.approx(250.0)
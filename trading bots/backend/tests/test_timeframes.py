@@ -0,0 +1,57 @@
+import calendar
+
+import pytest
+
+from bot_engine.strategies.rsi_strategy import RSIStrategy
+from bot_engine.timeframes import candle_close, candle_open, last_candle_close, next_candle_close
+
+def utc(year, month, day, hour=0):
+    return calendar.timegm((year, month, day, hour, 0, 0))
+
+def test_weekly_candles_open_on_monday():
+    # 2024-01-11 is a Thursday, the weekday of the Unix epoch
+    assert candle_open(utc(2024, 1, 11, 12), '1w') == utc(2024, 1, 8)
+    assert candle_close(utc(2024, 1, 11, 12), '1w') == utc(2024, 1, 15)
+
+def test_weekly_boundary():
+    assert last_candle_close(utc(2024, 1, 8), '1w') == utc(2024, 1, 8)
+    assert last_candle_close(utc(2024, 1, 8) - 1, '1w') == utc(2024, 1, 1)
+    assert next_candle_close(utc(2024, 1, 8) - 1, '1w') == utc(2024, 1, 8)
+
+@pytest.mark.parametrize('year, month, next_month', [
+    (2024, 1, (2024, 2)),  # 31 days
+    (2024, 2, (2024, 3)),  # 29 days (leap year)
+    (2023, 2, (2023, 3)),  # 28 days
+    (2024, 12, (2025, 1))  # Year rollover
+])
+def test_monthly_candles_follow_the_calendar(year, month, next_month):
+    last_second = utc(*next_month, 1) - 1
+    assert candle_open(last_second, '1M') == utc(year, month, 1)
+    assert candle_close(last_second, '1M') == utc(*next_month, 1)
+    assert last_candle_close(utc(*next_month, 1), '1M') == utc(*next_month, 1)
+
+def test_intraday_candles_align_to_the_epoch():
+    assert last_candle_close(1000.5, '1m') == 960
+    assert next_candle_close(1000.5, '1m') == 1020
+    assert next_candle_close(utc(2024, 1, 1, 5), '4h') == utc(2024, 1, 1, 8)
+
+def test_unknown_interval():
+    with pytest.raises(ValueError):
+        candle_open(0, '1x')
+    with pytest.raises(ValueError):
+        candle_close(0, 'M')
+
+def test_open_month_candle_is_not_closed_after_thirty_days():
+    strategy = RSIStrategy()
+    candles = [
+        [utc(2023, 12, 1) * 1000, 100, 101, 99, 100, 1],
+        [utc(2024, 1, 1) * 1000, 100, 102, 98, 101, 1]
+    ]
+
+    # 30.5 days into January the January candle is still open
+    _, signal_bar = strategy.update_closed(candles, '1M', (utc(2024, 1, 31) + 43200) * 1000)
+    assert signal_bar == utc(2023, 12, 1) * 1000
+
+    strategy.reset()
+    _, signal_bar = strategy.update_closed(candles, '1M', utc(2024, 2, 1) * 1000)
+    assert signal_bar == utc(2024, 1, 1) * 1000
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from api.trading_routes import trading_bp, MAX_TRADES_PER_PAGE
+from models.trade import Trade
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def find(filters, limit=100, skip=0, after=None, **kwargs):
+        calls.append(limit)
+        return [{'_id': str(index), 'timestamp': datetime(2024, 1, 1, index)} for index in range(limit)]
+
+    monkeypatch.setattr(Trade, 'find', staticmethod(find))
+    monkeypatch.setattr(Trade, 'count', staticmethod(lambda filters, max_age=None: 0))
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    app.config['ENGINE_SOCKET_PATH'] = '/tmp/unused-engine.sock'
+    JWTManager(app)
+    app.register_blueprint(trading_bp, url_prefix='/api/trading')
+
+    with app.app_context():
+        token = create_access_token(identity='user-1')
+
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    client.find_calls = calls
+    return client
+
+@pytest.mark.parametrize('query', [
+    'limit=0&cursor=', 'limit=-5&cursor=', f'limit={MAX_TRADES_PER_PAGE + 1}&cursor=', 'limit=0', 'limit=ten', 'page=0'
+])
+def test_invalid_page_size_is_rejected(client, query):
+    response = client.get(f'/api/trading/trades?{query}')
+
+    assert response.status_code == 400
+    assert client.find_calls == []
+
+def test_cursor_page_within_limits(client):
+    response = client.get('/api/trading/trades?limit=2&cursor=')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['trades']) == 2
+    assert response.get_json()['pagination']['next_cursor']
+    assert client.find_calls == [3]
@@ -0,0 +1,33 @@
+import mongomock
+import pytest
+
+import models.user
+from models.user import User
+from models.user_cache import UserCache
+
+@pytest.fixture
+def database(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(User, 'get_collection', staticmethod(lambda: db.users))
+    monkeypatch.setattr(User, 'get_tombstone_collection', staticmethod(lambda: db.user_tombstones))
+    return db
+
+def use_cache(monkeypatch, cache):
+    monkeypatch.setattr(models.user, '_cache', cache)
+
+def test_delete_drops_the_user_from_other_processes_caches(monkeypatch, database):
+    user_id = str(User.create({'email': 'user@example.com', 'username': 'user'}))
+    first = UserCache(sync_interval=0)
+    second = UserCache(sync_interval=0)
+
+    for cache in (first, second):
+        use_cache(monkeypatch, cache)
+        assert User.find_by_id(user_id) is not None
+
+    use_cache(monkeypatch, first)
+    assert User.delete(user_id)
+
+    # The second process still held the user; its next sync sees the tombstone
+    use_cache(monkeypatch, second)
+    assert User.find_by_id(user_id) is None
+    assert second.get_stats()['invalidations'] == 1